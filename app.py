@@ -1,16 +1,51 @@
+import threading
+import time
+
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
 from plotly.subplots import make_subplots
-
-from src.agents import HedgeFund
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Importiere unsere eigenen Module
-from src.data_loader import load_stock_data
-from src.indicators import add_indicators
-from src.predictor import StockPredictor
+from src import low_memory
+from src.agents import AGENT_REGISTRY, DEFAULT_AGENTS, HedgeFund
+from src.artifacts import load_latest_bundle
+from src.collector import collect_ticker
+from src.correlation import (
+    DEFAULT_PEERS,
+    DEFAULT_WINDOW,
+    add_correlation_features,
+    load_close_panel,
+    return_panel,
+    rolling_beta_corr,
+    rolling_matrices,
+)
+from src.downsample import ChartResolutions
+from src.indicators import (
+    calculate_fourier_transform,
+    calculate_seasonal_decomposition,
+)
+from src.instrumentation import (
+    MemoryBudgetExceeded,
+    cache_miss,
+    enable_session,
+    instrumented,
+    is_enabled,
+    memory_enabled,
+    records_frame,
+    span,
+    start_collecting,
+)
+from src.news_store import NewsStore
+from src.predictor import INTERVAL, StockPredictor
+from src.price_store import PriceStore
+from src.pyramid import RESOLUTIONS, BarPyramid
 from src.scraper import NewsScraper
 from src.sentiment import SentimentAnalyzer
+from src.sentiment_index import DailySentimentIndex
+from src.term_index import TermFrequencyIndex, render_wordcloud
 
 st.set_page_config(page_title="NVIDIA Stock AI", layout="wide", page_icon="📈")
 
@@ -21,42 +56,313 @@ st.markdown("Erweiterte statistische Analyse & KI-Prognose.")
 st.sidebar.header("Konfiguration")
 ticker = st.sidebar.text_input("Aktien Ticker", "NVDA")
 period = st.sidebar.selectbox("Zeitraum", ["6mo", "1y", "2y", "5y"], index=1)
+resolution = st.sidebar.selectbox(
+    "Auflösung", list(RESOLUTIONS), index=1, format_func=RESOLUTIONS.get
+)
+
+active_agents = st.sidebar.multiselect(
+    "Agenten im Rat",
+    list(AGENT_REGISTRY),
+    default=DEFAULT_AGENTS,
+    format_func=lambda key: AGENT_REGISTRY[key][1],
+)
+
+peers_text = st.sidebar.text_input(
+    "Vergleichswerte (Korrelation & Beta)", " ".join(DEFAULT_PEERS)
+)
+peers = tuple(
+    dict.fromkeys(
+        p.upper() for p in peers_text.replace(",", " ").split() if p.upper() != ticker.upper()
+    )
+)
+correlation_features = st.sidebar.checkbox(
+    "Beta & Korrelation als KI-Features", value=False, disabled=not peers
+)
+model_peers = peers if correlation_features else ()
+
+# Messung & Sparmodus gelten pro Session. Startwerte (STOCK_PERF / STOCK_LOW_MEMORY)
+# einmal pro Session übernehmen, danach gelten die Widgets
+st.session_state.setdefault("perf_on", is_enabled())
+st.session_state.setdefault("perf_memory", memory_enabled())
+st.session_state.setdefault("low_memory_on", low_memory.is_enabled())
+st.session_state.setdefault("budget_mb", (low_memory.budget_bytes() or 0) // 2**20)
+
+perf_on = st.sidebar.checkbox("⏱️ Performance messen", key="perf_on")
+perf_memory = perf_on and st.sidebar.checkbox(
+    "Speicher-Peaks messen (langsamer)", key="perf_memory"
+)
+
+# Sparmodus: float32 & Views statt Kopien, Speicher-Budget pro Stufe (misst dann immer Speicher)
+low_memory_on = st.sidebar.checkbox("🪶 Sparmodus (wenig RAM)", key="low_memory_on")
+budget_mb = st.sidebar.number_input(
+    "Speicher-Budget pro Stufe (MB, 0 = ohne)",
+    min_value=0,
+    step=128,
+    key="budget_mb",
+    disabled=not low_memory_on,
+)
+
+
+def apply_session_modes():
+    """Messung & Sparmodus dieser Session für den laufenden Kontext setzen (nicht prozessweit)."""
+    enable_session(perf_on, memory=perf_memory)
+    low_memory.enable_session(low_memory_on, budget_mb=budget_mb or None)
+
+
+apply_session_modes()
+perf_records = start_collecting()
+run_start = time.perf_counter()
 
 if st.sidebar.button("Daten aktualisieren 🔄"):
     st.cache_data.clear()
+    # Geteilte Frames & Chart-Auflösungen hängen an den Daten und müssen mit neu aufgebaut werden
+    st.session_state["refresh_resources"] = True
 
 
 # --- Cache Funktionen ---
+@instrumented("cache:bundle", cached=True)
+@st.cache_resource(ttl=60)
+def get_bundle(ticker, period):
+    cache_miss()
+    # Vorberechnetes Bundle (python -m src.artifacts), falls vorhanden: dann wird nur gezeichnet
+    return load_latest_bundle(ticker, period)
+
+
+@st.cache_resource
+def get_pyramid(ticker, float32=False):
+    # Eine gespeicherte Basis (Tagesbars), Wochen & Monate werden daraus aggregiert.
+    # Eigene Pyramide pro Modus: der Indikator-Cache liegt im Sparmodus als float32 vor
+    return BarPyramid.from_store(PriceStore(), ticker, sync=False)
+
+
+@instrumented("cache:refresh_pyramid", cached=True)
+@st.cache_data(ttl=900)
+def refresh_pyramid(ticker, intraday, float32=False):
+    cache_miss()
+    # Höchstens alle 15 Minuten nachladen; nur die offenen Buckets werden neu aggregiert
+    pyramid = get_pyramid(ticker, float32)
+    store = PriceStore()
+    if intraday:
+        pyramid.ensure_intraday(store, ticker, sync=False)
+    pyramid.refresh(store, ticker)
+    return pyramid.levels
+
+
+@instrumented("cache:data", cached=True)
+@st.cache_data(ttl=900)
+def get_data(ticker, period, resolution="1d"):
+    cache_miss()
+    refresh_pyramid(ticker, intraday=resolution == "1h")
+    return get_pyramid(ticker).window(resolution, period)
+
+
+@instrumented("cache:data_shared", cached=True)
+@st.cache_resource(ttl=900)
+def get_shared_data(ticker, period, resolution="1d"):
+    # Sparmodus: Ein View in den Indikator-Cache der Pyramide für alle Aufrufer
+    # (cache_data würde bei jedem Treffer eine Kopie entpicklen). Nur lesend verwenden!
+    cache_miss()
+    refresh_pyramid(ticker, resolution == "1h", float32=True)
+    return get_pyramid(ticker, float32=True).window(resolution, period)
+
+
+def load_data(ticker, period, resolution="1d"):
+    if low_memory.is_enabled():
+        return get_shared_data(ticker, period, resolution)
+    return get_data(ticker, period, resolution)
+
+
+@instrumented("cache:return_panel", cached=True)
+@st.cache_data(ttl=900)
+def get_return_panel(tickers, float32=False):
+    cache_miss()
+    # Tagesrenditen aller Ticker aus dem PriceStore (fehlende werden nachgeladen)
+    closes = load_close_panel(tickers)
+    return return_panel(closes, np.float32 if float32 else np.float64)
+
+
+def load_model_data(ticker, period, peers=()):
+    """Die Daten fürs Modell, mit Peers inklusive Beta_/Corr_-Features."""
+    data = load_data(ticker, period)
+    if not peers:
+        return data
+    returns = get_return_panel((ticker, *peers), low_memory.is_enabled())
+    if ticker not in returns:
+        return data
+    return add_correlation_features(data, returns, ticker)
+
+
+@instrumented("cache:news", cached=True)
+@st.cache_data(ttl=60)
+def get_news_and_sentiment(ticker):
+    cache_miss()
+    # Die News kommen aus dem lokalen Store, den der Collector (src/collector.py) befüllt.
+    # Nur die letzten Tage, sonst wäre die Stimmung ein Mittel über Monate
+    store = NewsStore()
+    news_df = store.load_recent(ticker)
+    if not news_df.empty:
+        return news_df
+
+    # Nichts Aktuelles im Store (Collector läuft nicht): einmalig live scrapen und ablegen.
+    # Wie im Collector: nur neue Titel bewerten & in den Tages-Index zählen
+    collect_ticker(ticker, store, NewsScraper(), SentimentAnalyzer())
+    return store.load_recent(ticker)
+
+
+@instrumented("cache:sentiment_index", cached=True)
+@st.cache_data(ttl=60)
+def get_sentiment_index(ticker):
+    cache_miss()
+    return DailySentimentIndex(NewsStore()).daily(ticker)
+
+
+@instrumented("cache:decomposition", cached=True)
 @st.cache_data
-def get_data(ticker, period):
-    df = load_stock_data(ticker, period=period)
-    df = add_indicators(df)
-    return df
+def get_decomposition(ticker, period):
+    cache_miss()
+    # Quartals-Saison (ca. 60 Handelstage)
+    return calculate_seasonal_decomposition(load_data(ticker, period), period=60)
 
 
+@instrumented("cache:fft", cached=True)
 @st.cache_data
-def get_news_and_sentiment(ticker):
-    scraper = NewsScraper()
-    mixed_df = scraper.get_all_sources(ticker)
-    analyzer = SentimentAnalyzer()
-    return analyzer.analyze_news(mixed_df)
+def get_fourier(ticker, period):
+    cache_miss()
+    return calculate_fourier_transform(load_data(ticker, period))
 
 
 @st.cache_resource
-def train_model(df):
+def get_term_index(ticker):
+    # Bleibt über Reruns erhalten, neue Posts werden nur einmal tokenisiert
+    return TermFrequencyIndex(SentimentAnalyzer())
+
+
+@instrumented("cache:model", cached=True)
+@st.cache_resource(ttl=900)
+def train_model(ticker, period, peers=(), float32=False):
+    cache_miss()
+    # Schlüssel sind nur Ticker, Zeitraum, Peers & Sparmodus
+    # (kein Hashen des DataFrames bei jedem Rerun)
     predictor = StockPredictor()
-    predictor.train(df)
+    predictor.train(
+        load_model_data(ticker, period, peers), sentiment_daily=get_sentiment_index(ticker)
+    )
     return predictor
 
 
-# --- Hauptlogik ---
-with st.spinner("Lade komplexe Finanzdaten..."):
-    df = get_data(ticker, period)
+@instrumented("cache:prediction", cached=True)
+@st.cache_data(ttl=60)
+def get_prediction(ticker, period, peers=(), float32=False):
+    cache_miss()
+    news_df = get_news_and_sentiment(ticker)
+    sentiment = float(news_df["Sentiment_Score"].mean()) if not news_df.empty else 0.0
+    predictor = train_model(ticker, period, peers, float32)
+    prediction = predictor.predict_with_sentiment(
+        load_model_data(ticker, period, peers), sentiment_score=sentiment
+    )
+    importances = pd.DataFrame(
+        {
+            "Feature": predictor.features,
+            "Wichtigkeit": predictor.model.feature_importances_,
+        }
+    )
+    return prediction, importances
+
+
+def data_key(data):
+    """Billige Identität einer Zeitreihe (Länge & letzter Zeitstempel) statt eines Hashes."""
+    return len(data), data.index[-1] if len(data) else None
+
+
+@st.cache_resource(max_entries=32)
+def get_resolutions(ticker, period, resolution, version, key, _df):
+    cache_miss()
+    # Auflösungsstufen pro Ticker, Zeitraum, Bar-Auflösung & Bundle-Version (None = live geladen).
+    # `key` (data_key) sorgt dafür, dass nachgeladene Bars neue Stufen bekommen
+    return ChartResolutions(_df)
+
+
+@st.cache_resource(max_entries=32)
+def get_decomposition_resolutions(ticker, period, version, key, _decomposition):
+    cache_miss()
+    return ChartResolutions(pd.DataFrame(_decomposition))
 
-if df is None:
+
+def load_news():
+    return bundle.news if bundle is not None else get_news_and_sentiment(ticker)
+
+
+def lazy_tab(name, render, precomputed=None):
+    """
+    Rendert einen Tab erst, nachdem er für Ticker & Zeitraum einmal geöffnet wurde.
+    Als Fragment läuft beim Öffnen nur dieser Tab neu, nicht die ganze Seite.
+    Mit passendem Artefakt-Bundle (`precomputed`, Standard: das Bundle) gibt es nichts
+    zu berechnen, dann wird sofort gezeichnet.
+    """
+    if precomputed is None:
+        precomputed = bundle is not None
+
+    @st.fragment
+    def body():
+        # Fragment-Reruns laufen ohne den Seitenkopf: Modi der Session erneut setzen
+        apply_session_modes()
+        opened = st.session_state.setdefault("opened_tabs", set())
+        if not precomputed and (name, ticker, period) not in opened:
+            st.caption("Die Berechnung startet erst, wenn dieser Tab geöffnet wird.")
+            if not st.button("▶️ Analyse laden", key=f"load_{name}"):
+                return
+            opened.add((name, ticker, period))
+        # Tabs laufen als Fragment auch einzeln neu, daher die eigene Zeit direkt im Tab
+        try:
+            with span(f"tab:{name}") as s:
+                render()
+        except MemoryBudgetExceeded as e:
+            st.error(f"🪶 Speicher-Budget überschritten: {e}")
+        if s.wall_ms is not None:
+            st.caption(f"⏱️ {s.wall_ms:.0f} ms")
+
+    body()
+
+
+# --- Hauptlogik ---
+if st.session_state.pop("refresh_resources", False):
+    get_shared_data.clear()
+    get_resolutions.clear()
+    get_decomposition_resolutions.clear()
+
+bundle = get_bundle(ticker, period)
+# Vorhersage & Rat aus dem Bundle nur, wenn das Modell mit denselben Vergleichswerten trainiert wurde
+model_bundle = bundle if bundle is not None and bundle.peers == model_peers else None
+if bundle is not None and resolution == "1d":
+    df = bundle.indicators
+    st.sidebar.caption(f"📦 Artefakt-Bundle {bundle.version} ({bundle.built_at})")
+else:
+    with st.spinner("Lade komplexe Finanzdaten..."):
+        try:
+            df = load_data(ticker, period, resolution)
+        except MemoryBudgetExceeded as e:
+            st.error(f"🪶 Speicher-Budget überschritten: {e}")
+            st.stop()
+
+if df is None or df.empty:
     st.error("Daten konnten nicht geladen werden.")
     st.stop()
 
+# Zoom-Bereich: Die Charts bekommen nur diesen Ausschnitt, ausgedünnt auf ein festes Punkt-Budget
+bundle_version = bundle.version if bundle is not None else None
+# Nicht per Decorator gemessen: .clear() muss erreichbar bleiben
+with span("cache:resolutions", cached=True):
+    resolutions = get_resolutions(
+        ticker, period, resolution, bundle_version, data_key(df), df
+    )
+zoom_start, zoom_end = st.sidebar.slider(
+    "Zoom",
+    min_value=df.index[0].date(),
+    max_value=df.index[-1].date(),
+    value=(df.index[0].date(), df.index[-1].date()),
+)
+zoom = (pd.Timestamp(zoom_start), pd.Timestamp(zoom_end) + pd.Timedelta(days=1))
+
 # Key Metrics oben
 latest = df.iloc[-1]
 col1, col2, col3, col4 = st.columns(4)
@@ -74,7 +380,7 @@ col4.metric(
 )
 
 # --- Tabs für bessere Übersicht ---
-tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs(
+tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs(
     [
         "📊 Chart",
         "📉 Momentum",
@@ -83,20 +389,25 @@ tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs(
         "☁️ NLP",
         "🔬 Math & Cycles",
         "🕵️ Agenten Rat",
+        "🔗 Korrelation",
     ]
 )
 
 # TAB 1: Hauptchart
 with tab1:
     st.subheader("Preisentwicklung & Bollinger Bands")
+    candles = resolutions.candles(*zoom)
+    upper = resolutions.line("Bollinger_Upper", *zoom)
+    lower = resolutions.line("Bollinger_Lower", *zoom)
+    sma50 = resolutions.line("SMA_50", *zoom)
     fig = go.Figure()
     fig.add_trace(
         go.Candlestick(
-            x=df.index,
-            open=df["Open"],
-            high=df["High"],
-            low=df["Low"],
-            close=df["Close"],
+            x=candles.index,
+            open=candles["Open"],
+            high=candles["High"],
+            low=candles["Low"],
+            close=candles["Close"],
             name="OHLC",
         )
     )
@@ -104,16 +415,16 @@ with tab1:
     # Bollinger Bands
     fig.add_trace(
         go.Scatter(
-            x=df.index,
-            y=df["Bollinger_Upper"],
+            x=upper.index,
+            y=upper,
             line=dict(color="gray", width=1, dash="dot"),
             name="Upper Band",
         )
     )
     fig.add_trace(
         go.Scatter(
-            x=df.index,
-            y=df["Bollinger_Lower"],
+            x=lower.index,
+            y=lower,
             line=dict(color="gray", width=1, dash="dot"),
             fill="tonexty",
             name="Lower Band",
@@ -121,8 +432,8 @@ with tab1:
     )
     fig.add_trace(
         go.Scatter(
-            x=df.index,
-            y=df["SMA_50"],
+            x=sma50.index,
+            y=sma50,
             line=dict(color="orange", width=2),
             name="SMA 50",
         )
@@ -141,27 +452,34 @@ with tab1:
 with tab2:
     st.subheader("MACD Trend Analyse")
 
+    macd = resolutions.line("MACD", *zoom)
+    macd_signal = resolutions.line("MACD_Signal", *zoom)
+    macd_hist = resolutions.line("MACD_Hist", *zoom)
+
     # MACD Plot
     fig_macd = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3])
 
     # MACD Line & Signal
     fig_macd.add_trace(
-        go.Scatter(x=df.index, y=df["MACD"], line=dict(color="blue"), name="MACD"),
+        go.Scatter(x=macd.index, y=macd, line=dict(color="blue"), name="MACD"),
         row=1,
         col=1,
     )
     fig_macd.add_trace(
         go.Scatter(
-            x=df.index, y=df["MACD_Signal"], line=dict(color="orange"), name="Signal"
+            x=macd_signal.index,
+            y=macd_signal,
+            line=dict(color="orange"),
+            name="Signal",
         ),
         row=1,
         col=1,
     )
 
     # Histogramm
-    colors = ["green" if val >= 0 else "red" for val in df["MACD_Hist"]]
+    colors = np.where(macd_hist >= 0, "green", "red")
     fig_macd.add_trace(
-        go.Bar(x=df.index, y=df["MACD_Hist"], marker_color=colors, name="Histogramm"),
+        go.Bar(x=macd_hist.index, y=macd_hist, marker_color=colors, name="Histogramm"),
         row=2,
         col=1,
     )
@@ -180,10 +498,13 @@ with tab2:
 with tab3:
     st.subheader("On-Balance Volume (OBV)")
 
+    close = resolutions.line("Close", *zoom)
+    obv = resolutions.line("OBV", *zoom)
+
     fig_obv = make_subplots(rows=2, cols=1, shared_xaxes=True)
-    fig_obv.add_trace(go.Scatter(x=df.index, y=df["Close"], name="Preis"), row=1, col=1)
+    fig_obv.add_trace(go.Scatter(x=close.index, y=close, name="Preis"), row=1, col=1)
     fig_obv.add_trace(
-        go.Scatter(x=df.index, y=df["OBV"], line=dict(color="purple"), name="OBV"),
+        go.Scatter(x=obv.index, y=obv, line=dict(color="purple"), name="OBV"),
         row=2,
         col=1,
     )
@@ -198,19 +519,28 @@ with tab3:
     * **Preis steigt + OBV fällt (Divergenz):** Warnsignal! Der Anstieg wird nicht durch Volumen gestützt (mögliche Trendwende).
     """)
 
+
 # TAB 4: KI & News
-with tab4:
+def render_prediction():
     st.subheader("🤖 KI Vorhersage & News")
 
-    # News holen
-    with st.spinner("Analysiere News..."):
-        news_df = get_news_and_sentiment(ticker)
-        avg_sentiment = news_df["Sentiment_Score"].mean() if not news_df.empty else 0
+    if model_bundle is not None:
+        news_df = model_bundle.news
+        prediction = model_bundle.prediction
+        importances = model_bundle.feature_importances
+    else:
+        # News holen
+        with st.spinner("Analysiere News..."):
+            news_df = get_news_and_sentiment(ticker)
+
+        # Modell trainieren (inkl. Feature Importance)
+        with st.spinner("Trainiere KI mit neuen Indikatoren..."):
+            prediction, importances = get_prediction(ticker, period, model_peers, low_memory_on)
 
-    # Modell trainieren
-    with st.spinner("Trainiere KI mit neuen Indikatoren..."):
-        predictor = train_model(df)
-        prediction = predictor.predict_with_sentiment(df, sentiment_score=avg_sentiment)
+    # float(): Scores sind float32, st.progress akzeptiert nur Python-Floats
+    avg_sentiment = (
+        float(news_df["Sentiment_Score"].mean()) if not news_df.empty else 0.0
+    )
 
     col_res1, col_res2 = st.columns(2)
 
@@ -219,6 +549,12 @@ with tab4:
             "KI Prognose (Return)", f"{prediction['final_predicted_return'] * 100:.2f}%"
         )
         st.metric("Erwarteter Preis", f"${prediction['predicted_price']:.2f}")
+        if "price_low" in prediction:
+            # Ältere Bundles haben noch kein Band
+            st.caption(
+                f"{INTERVAL:.0%}-Prognoseband: ${prediction['price_low']:.2f} – "
+                f"${prediction['price_high']:.2f} · Konfidenz {prediction['confidence']:.0%}"
+            )
 
         st.write("---")
         st.write(f"News Stimmung: **{avg_sentiment:.2f}**")
@@ -227,31 +563,30 @@ with tab4:
     with col_res2:
         st.markdown("### Warum dieses Ergebnis?")
         st.write("Die KI hat folgende Faktoren gewichtet:")
-        # Feature Importance auslesen
-        importances = (
-            pd.DataFrame(
-                {
-                    "Feature": predictor.features,
-                    "Wichtigkeit": predictor.model.feature_importances_,
-                }
-            )
-            .sort_values(by="Wichtigkeit", ascending=False)
-            .head(5)
+        st.dataframe(
+            importances.sort_values(by="Wichtigkeit", ascending=False).head(5),
+            hide_index=True,
         )
 
-        st.dataframe(importances, hide_index=True)
-
     if not news_df.empty:
         st.subheader("Letzte Schlagzeilen")
         st.dataframe(news_df[["Date", "Title", "Sentiment_Score"]], hide_index=True)
 
+
+with tab4:
+    lazy_tab("prediction", render_prediction, precomputed=model_bundle is not None)
+
+
 # TAB 5: Social Sentiment & Insider Talk
-with tab5:
+def render_social():
     st.subheader("📢 Social Sentiment & Insider Talk")
     st.markdown(
         "Was denken die Privatanleger auf **Stocktwits** und **Reddit** im Vergleich zu den Medien?"
     )
 
+    with st.spinner("Analysiere News..."):
+        news_df = load_news()
+
     if not news_df.empty:
         # Daten aufteilen
         social_df = news_df[news_df["Type"] == "Social"]
@@ -309,26 +644,27 @@ with tab5:
 
         with col_viz:
             st.markdown("### ☁️ Worüber reden die Trader?")
-            # Wordcloud nur aus Social Media Daten
-            import matplotlib.pyplot as plt
-            from wordcloud import WordCloud
-
-            analyzer = SentimentAnalyzer()
+            # Wordcloud nur aus Social Media Daten (Häufigkeiten aus dem laufenden Index)
+            if bundle is not None:
+                frequencies = bundle.term_frequencies
+            else:
+                term_index = get_term_index(ticker)
+                term_index.update(news_df)
 
-            clean_text = analyzer.get_text_for_wordcloud(
-                social_df if not social_df.empty else news_df
-            )
-            if len(clean_text) > 0:
+                frequencies = term_index.frequencies(
+                    types=["Social"] if not social_df.empty else None,
+                    since=news_df["Date"].min(),
+                )
+            if frequencies:
                 # Eigene Farben für Wordcloud (Orange/Weiß für Reddit/Social Style)
-                wordcloud = WordCloud(
-                    width=800, height=500, background_color="#0e1117", colormap="Wistia"
-                ).generate(clean_text)
-                fig_wc, ax = plt.subplots(figsize=(10, 6))
-                ax.imshow(wordcloud, interpolation="bilinear")
-                ax.axis("off")
-                # Hintergrund transparent machen für Dark Mode
-                fig_wc.patch.set_facecolor("#0e1117")
-                st.pyplot(fig_wc)
+                wordcloud_image = render_wordcloud(
+                    frequencies,
+                    width=800,
+                    height=500,
+                    background_color="#0e1117",
+                    colormap="Wistia",
+                )
+                st.image(wordcloud_image, width="stretch")
             else:
                 st.info("Nicht genug Social Daten für eine Wolke.")
 
@@ -359,8 +695,13 @@ with tab5:
     else:
         st.warning("Keine Daten gefunden. API Limit oder Internet-Problem?")
 
+
+with tab5:
+    lazy_tab("social", render_social)
+
+
 # TAB 6: Mathematische Zeitreihen-Analyse
-with tab6:
+def render_math():
     st.subheader("Mathematische Zeitreihen-Analyse")
     st.markdown(
         "Identifikation von versteckten Mustern und Zyklen, die dem bloßen Auge verborgen bleiben."
@@ -370,16 +711,12 @@ with tab6:
     with st.spinner("Berechne Fourier-Transformation & Zerlegung..."):
         # Für Decomposition brauchen wir genug Daten (mind. 2 Jahre empfohlen für period=252)
         decomposition = None
-        if len(df) > 300:
-            from src.indicators import (
-                calculate_fourier_transform,
-                calculate_seasonal_decomposition,
-            )
-
-            decomposition = calculate_seasonal_decomposition(
-                df, period=60
-            )  # Quartals-Saison (ca. 60 Handelstage)
-            fourier_df = calculate_fourier_transform(df)
+        if len(df) > 300 and bundle is not None:
+            decomposition = bundle.decomposition
+            fourier_df = bundle.fourier
+        elif len(df) > 300:
+            decomposition = get_decomposition(ticker, period)
+            fourier_df = get_fourier(ticker, period)
         else:
             st.warning(
                 "Für diese Analyse werden mindestens 2 Jahre Daten benötigt. Bitte Zeitraum in der Sidebar erhöhen."
@@ -392,6 +729,17 @@ with tab6:
             "Zerlegt den Kurs in drei Komponenten: Den langfristigen Trend, das wiederkehrende Muster (Saison) und das Rauschen (Noise)."
         )
 
+        decomposition_resolutions = get_decomposition_resolutions(
+            ticker,
+            period,
+            bundle_version,
+            data_key(decomposition["trend"]),
+            decomposition,
+        )
+        trend = decomposition_resolutions.line("trend", *zoom)
+        seasonal = decomposition_resolutions.line("seasonal", *zoom)
+        resid = decomposition_resolutions.line("resid", *zoom)
+
         fig_decomp = make_subplots(
             rows=3,
             cols=1,
@@ -407,8 +755,8 @@ with tab6:
         # Trend
         fig_decomp.add_trace(
             go.Scatter(
-                x=df.index,
-                y=decomposition["trend"],
+                x=trend.index,
+                y=trend,
                 line=dict(color="blue"),
                 name="Trend",
             ),
@@ -418,8 +766,8 @@ with tab6:
         # Seasonal
         fig_decomp.add_trace(
             go.Scatter(
-                x=df.index,
-                y=decomposition["seasonal"],
+                x=seasonal.index,
+                y=seasonal,
                 line=dict(color="green"),
                 name="Saisonalität",
             ),
@@ -429,8 +777,8 @@ with tab6:
         # Residuals
         fig_decomp.add_trace(
             go.Scatter(
-                x=df.index,
-                y=decomposition["resid"],
+                x=resid.index,
+                y=resid,
                 mode="markers",
                 marker=dict(color="gray", size=2),
                 name="Residuals",
@@ -480,26 +828,57 @@ with tab6:
             f"💡 **Insight:** Der stärkste erkannte Zyklus wiederholt sich etwa alle **{top_cycle:.1f} Tage**. Achte auf Muster in diesem Abstand!"
         )
 
+
+with tab6:
+    lazy_tab("math", render_math)
+
+
 # TAB 7: AI Agent Council
-with tab7:
+def render_council():
     st.subheader("🕵️ Der KI-Investoren Rat")
     st.markdown(
-        "Wir simulieren ein Team aus drei Experten-Agenten, die unterschiedliche Daten analysieren und zu einem gemeinsamen Entschluss kommen."
+        "Wir simulieren ein Team aus Experten-Agenten, die unterschiedliche Daten analysieren und zu einem gemeinsamen Entschluss kommen."
     )
 
-    # Wir brauchen Daten aus den anderen Modulen, die wir oben schon geladen haben
-    # (df, news_df, prediction, decomposition) sind schon da
-
-    fund = HedgeFund()
-
-    # Decomposition muss eventuell neu berechnet werden, falls Tab 6 nicht geklickt wurde
-    if "decomposition" not in locals() or decomposition is None:
-        from src.indicators import calculate_seasonal_decomposition
+    if not active_agents:
+        st.warning("Bitte mindestens einen Agenten in der Sidebar auswählen.")
+        return
 
-        decomposition = calculate_seasonal_decomposition(df, period=60)
+    fund = HedgeFund(agents=active_agents)
 
-    # Analyse starten
-    agents, verdict, color = fund.get_verdict(df, news_df, prediction, decomposition)
+    # Jede Eingabe wird nur berechnet, wenn ein aktiver Agent sie braucht (über die Caches)
+    if model_bundle is not None:
+        providers = {
+            "indicators": lambda inputs: df,
+            "news": lambda inputs: model_bundle.news,
+            "prediction": lambda inputs: model_bundle.prediction,
+            "decomposition": lambda inputs: model_bundle.decomposition,
+        }
+    else:
+        providers = {
+            "indicators": lambda inputs: df,
+            "news": lambda inputs: get_news_and_sentiment(ticker),
+            "prediction": lambda inputs: get_prediction(
+                ticker, period, model_peers, low_memory_on
+            )[0],
+            "decomposition": lambda inputs: get_decomposition(ticker, period),
+        }
+
+    # Worker-Threads brauchen den Streamlit-Kontext für die Cache-Funktionen
+    script_ctx = get_script_run_ctx()
+
+    # Das Bundle enthält das Urteil des Standard-Rats, nur eine andere Besetzung wird live berechnet
+    council = model_bundle.council if model_bundle is not None else None
+    if council is not None and council[0] == list(fund.agents):
+        _, agents, verdict, color = council
+    else:
+        # Analyse starten
+        agents, verdict, color = fund.convene(
+            providers,
+            initializer=lambda: add_script_run_ctx(
+                threading.current_thread(), script_ctx
+            ),
+        )
 
     # Großes Ergebnis anzeigen
     st.markdown("---")
@@ -510,9 +889,7 @@ with tab7:
     st.markdown("---")
 
     # Karten für jeden Agenten anzeigen
-    col_a1, col_a2, col_a3 = st.columns(3)
-
-    for col, agent in zip([col_a1, col_a2, col_a3], agents):
+    for col, agent in zip(st.columns(len(agents)), agents):
         with col:
             # Farbe für den Agenten Header
             header_color = (
@@ -534,3 +911,99 @@ with tab7:
     st.info(
         "💡 **Das Prinzip:** Multi-Agenten-Systeme reduzieren Fehler, indem sie nicht nur einer Datenquelle vertrauen (z.B. nur dem Chart), sondern technische, fundamentale und statistische Signale gegeneinander abwägen."
     )
+
+
+with tab7:
+    lazy_tab("council", render_council, precomputed=model_bundle is not None)
+
+
+# TAB 8: Korrelation & Beta gegen Peers
+def render_correlation():
+    st.subheader("🔗 Korrelation & Beta gegen Peers")
+    if not peers:
+        st.warning("Bitte Vergleichswerte in der Sidebar eintragen.")
+        return
+
+    window = st.slider("Fenster (Handelstage)", 20, 250, DEFAULT_WINDOW, step=10)
+    with st.spinner("Lade Kurse der Vergleichswerte..."):
+        returns = get_return_panel((ticker, *peers), low_memory.is_enabled())
+    missing = [t for t in (ticker, *peers) if t not in returns]
+    if missing:
+        st.warning(f"Keine Kurse für: {', '.join(missing)}")
+    if ticker not in returns or len(returns.columns) < 2:
+        return
+    # Gleicher Zeitraum wie die übrigen Tabs
+    returns = returns.loc[df.index[0] :]
+    if len(returns) < window:
+        st.warning("Zu wenig gemeinsame Daten für dieses Fenster.")
+        return
+
+    ((timestamp, (_, corr)),) = rolling_matrices(returns, window).items()
+    st.markdown(f"### Korrelationsmatrix ({window} Tage bis {timestamp.date()})")
+    fig_heat = go.Figure(
+        go.Heatmap(
+            z=corr.to_numpy(),
+            x=corr.columns,
+            y=corr.index,
+            zmin=-1,
+            zmax=1,
+            colorscale="RdBu",
+            text=corr.round(2).to_numpy(),
+            texttemplate="%{text}",
+        )
+    )
+    fig_heat.update_layout(height=max(400, 40 * len(corr)), yaxis_autorange="reversed")
+    st.plotly_chart(fig_heat, width="stretch")
+
+    features = rolling_beta_corr(returns, ticker, window)
+    latest = features.iloc[-1]
+    others = [c for c in returns.columns if c != ticker]
+    st.markdown(f"### {ticker} gegen Peers")
+    st.dataframe(
+        pd.DataFrame(
+            {
+                "Peer": others,
+                "Beta": [latest[f"Beta_{p}"] for p in others],
+                "Korrelation": [latest[f"Corr_{p}"] for p in others],
+            }
+        ),
+        hide_index=True,
+    )
+
+    fig_corr = go.Figure()
+    for peer in others:
+        fig_corr.add_trace(
+            go.Scatter(x=features.index, y=features[f"Corr_{peer}"], name=peer)
+        )
+    fig_corr.update_layout(
+        yaxis_title=f"Rollierende Korrelation ({window} Tage)", height=400, hovermode="x"
+    )
+    st.plotly_chart(fig_corr, width="stretch")
+    st.caption(
+        "Beta > 1: Die Aktie schwankt stärker als der Vergleichswert. Mit der Sidebar-Option "
+        "fließen Beta & Korrelation auch ins KI-Modell ein."
+    )
+
+
+with tab8:
+    lazy_tab("correlation", render_correlation, precomputed=False)
+
+# --- Performance-Panel ---
+if perf_on or low_memory_on:
+    with st.sidebar.expander("⏱️ Performance", expanded=False):
+        st.caption(f"Gesamter Lauf: {(time.perf_counter() - run_start) * 1000:.0f} ms")
+        if low_memory.budget_bytes():
+            st.caption(f"🪶 Budget pro Stufe: {low_memory.budget_bytes() / 2**20:.0f} MB")
+        perf_df = records_frame(perf_records)
+        if perf_df.empty:
+            st.write("Keine Messungen in diesem Lauf.")
+        else:
+            st.dataframe(
+                perf_df.drop(columns=[] if memory_enabled() else ["peak_kb"]),
+                hide_index=True,
+                column_config={
+                    "wall_ms": st.column_config.NumberColumn("Wall (ms)", format="%.1f"),
+                    "cpu_ms": st.column_config.NumberColumn("CPU (ms)", format="%.1f"),
+                    "peak_kb": st.column_config.NumberColumn("Peak (KB)", format="%.0f"),
+                },
+            )
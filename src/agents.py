@@ -1,4 +1,46 @@
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import instrumented
+
+# Kodierung der Voten für die vektorisierte Historie
+VOTE_CODES = {"BULLISH": 1, "NEUTRAL": 0, "BEARISH": -1}
+VOTE_LABELS = {code: label for label, code in VOTE_CODES.items()}
+
+# Registry aller Agenten: Key -> (Klasse, Name, Rolle)
+AGENT_REGISTRY = {}
+DEFAULT_AGENTS = ["technical", "sentiment", "quant"]
+
+
+def register_agent(key, name, role, requires):
+    """
+    Meldet eine Agenten-Klasse im Rat an.
+
+    Args:
+        key (str): Eindeutiger Schlüssel (z.B. "technical").
+        name (str): Anzeigename des Agenten.
+        role (str): Rolle im Rat.
+        requires (list): Eingaben, die der Agent braucht
+            ("indicators", "news", "prediction", "decomposition").
+    """
+
+    def decorator(cls):
+        cls.requires = tuple(requires)
+        AGENT_REGISTRY[key] = (cls, name, role)
+        return cls
+
+    return decorator
+
+
 class Agent:
+    requires = ()
+    # Spalten-Präfix in der Voten-Historie (Standard: der Registry-Key)
+    history_prefix = None
+
     def __init__(self, name, role):
         self.name = name
         self.role = role
@@ -6,20 +48,96 @@ class Agent:
         self.reason = "Keine Daten verfügbar."
         self.confidence = 0.0
 
+    def evaluate(self, inputs):
+        """Bewertet anhand der (lazy) Eingaben. `inputs[key]` liefert nur deklarierte Eingaben."""
+        raise NotImplementedError
+
+    def evaluate_history(self, history):
+        """
+        Vektorisierte Voten für jede Bar (HedgeFund.get_verdict_history).
+        `history` enthält indicators, predicted_returns, share_up, sentiment_features und
+        decomposition (alles außer indicators optional).
+        Returns:
+            pd.DataFrame: Vote (-1/0/1), Confidence und Score pro Bar.
+        """
+        raise NotImplementedError
+
+    def evaluate_bar(self, history, position):
+        """Wie evaluate(), aber auf den Daten bis zur Bar `position` (für VerdictHistory.explain)."""
+        raise NotImplementedError
+
+    @classmethod
+    def has_history(cls):
+        return cls.evaluate_history is not Agent.evaluate_history
+
+
+def _prefetch(inputs, key):
+    try:
+        inputs[key]
+    except Exception:
+        pass
+
+
+class LazyInputs:
+    """
+    Berechnet Eingaben für den Rat erst bei Bedarf und nur einmal (memoized, thread-sicher).
+    Provider bekommen dieses Objekt und können so selbst andere Eingaben anfordern.
+    """
 
+    def __init__(self, providers):
+        self.providers = providers
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            future = self._futures.get(key)
+            owner = future is None
+            if owner:
+                future = self._futures[key] = Future()
+
+        if owner:
+            # Wer zuerst fragt, rechnet; alle anderen warten auf dasselbe Ergebnis
+            try:
+                future.set_result(self.providers[key](self))
+            except BaseException as e:
+                future.set_exception(e)
+        return future.result()
+
+    def computed(self):
+        """Die Keys, die tatsächlich berechnet wurden."""
+        with self._lock:
+            return [key for key, future in self._futures.items() if future.done()]
+
+
+@register_agent("technical", "Dr. Chart", "Technical Analysis", ["indicators"])
 class TechnicalAgent(Agent):
+    # Schwellen der Regeln (src/backtest.py prüft Alternativen dazu)
+    RSI_LOW = 30
+    RSI_HIGH = 70
+    history_prefix = "Tech"
+
+    def evaluate(self, inputs):
+        return self.analyze(inputs["indicators"])
+
+    def evaluate_history(self, history):
+        return self.analyze_history(history["indicators"])
+
+    def evaluate_bar(self, history, position):
+        return self.analyze(history["indicators"].iloc[: position + 1])
+
     def analyze(self, df):
         last = df.iloc[-1]
         score = 0
         reasons = []
 
         # RSI
-        if last["RSI"] < 30:
+        if last["RSI"] < self.RSI_LOW:
             score += 1
             reasons.append(
                 f"RSI extrem niedrig ({last['RSI']:.0f}), Gegenbewegung wahrscheinlich."
             )
-        elif last["RSI"] > 70:
+        elif last["RSI"] > self.RSI_HIGH:
             score -= 1
             reasons.append(f"RSI extrem hoch ({last['RSI']:.0f}), Überhitzung droht.")
         else:
@@ -55,8 +173,55 @@ class TechnicalAgent(Agent):
         self.reason = " | ".join(reasons)
         return self
 
+    def analyze_history(self, df):
+        """
+        Vektorisierte Variante von analyze() für jede Zeile (Bar) auf einmal.
+        Returns:
+            pd.DataFrame: Vote (-1/0/1), Confidence und Score pro Bar.
+        """
+        rsi = df["RSI"].to_numpy()
+        close = df["Close"].to_numpy()
+
+        score = np.where(
+            rsi < self.RSI_LOW, 1.0, np.where(rsi > self.RSI_HIGH, -1.0, 0.0)
+        )
+        score += np.where(
+            close < df["Bollinger_Lower"].to_numpy(),
+            1.0,
+            np.where(close > df["Bollinger_Upper"].to_numpy(), -1.0, 0.0),
+        )
+        score += np.where(
+            df["MACD"].to_numpy() > df["MACD_Signal"].to_numpy(), 0.5, -0.5
+        )
 
+        vote = np.where(score >= 1, 1, np.where(score <= -1, -1, 0))
+        confidence = np.where(vote != 0, np.minimum(np.abs(score) / 3, 1.0), 0.5)
+        return pd.DataFrame(
+            {"Vote": vote, "Confidence": confidence, "Score": score}, index=df.index
+        )
+
+
+@register_agent("sentiment", "Mr. Hype", "Sentiment Analysis", ["news"])
 class SentimentAgent(Agent):
+    history_prefix = "Sent"
+
+    def evaluate(self, inputs):
+        return self.analyze(inputs["news"])
+
+    def evaluate_history(self, history):
+        # Ohne Tages-Sentiment bleibt Mr. Hype für jede Bar neutral
+        index = history["indicators"].index
+        features = history.get("sentiment_features")
+        if features is None:
+            return pd.DataFrame({"Vote": 0, "Confidence": 0.0, "Score": 0.0}, index=index)
+        return self.analyze_history(features.reindex(index))
+
+    def evaluate_bar(self, history, position):
+        features = history.get("sentiment_features")
+        if features is None:
+            return self.analyze(None)
+        return self.analyze_daily(features.loc[history["indicators"].index[position]])
+
     def analyze(self, news_df):
         if news_df is None or news_df.empty:
             self.vote = "NEUTRAL"
@@ -70,6 +235,9 @@ class SentimentAgent(Agent):
         social_df = news_df[news_df["Type"] == "Social"]
         social_sent = social_df["Sentiment_Score"].mean() if not social_df.empty else 0
 
+        return self._evaluate(avg_sentiment, social_sent, not social_df.empty)
+
+    def _evaluate(self, avg_sentiment, social_sent, has_social):
         reasons = []
         score = 0
 
@@ -86,7 +254,7 @@ class SentimentAgent(Agent):
             )
 
         # 2. Social Media Hype Faktor
-        if not social_df.empty:
+        if has_social:
             if social_sent > 0.25:
                 score += 0.5
                 reasons.append("Privatanleger (Social) sind euphorisch.")
@@ -114,8 +282,49 @@ class SentimentAgent(Agent):
         self.confidence = min(abs(avg_sentiment) * 3, 1.0)
         return self
 
+    def analyze_daily(self, row):
+        """Bewertet eine Zeile des Tages-Sentiment Index (siehe sentiment_index)."""
+        if row["Sent_Count"] == 0:
+            self.vote = "NEUTRAL"
+            self.reason = "Keine News-Daten für diesen Tag."
+            self.confidence = 0.0
+            return self
+        # Ohne Social-Items steht Sent_Social auf 0 -> wirkt wie "Ruhe", der Score ist identisch
+        return self._evaluate(row["Sent_Mean"], row["Sent_Social"], True)
+
+    def analyze_history(self, sentiment_features):
+        """
+        Vektorisierte Variante auf den (per As-of Join angehängten) Tages-Features.
+        Returns:
+            pd.DataFrame: Vote (-1/0/1), Confidence und Score pro Bar.
+        """
+        avg = sentiment_features["Sent_Mean"].to_numpy()
+        social = sentiment_features["Sent_Social"].to_numpy()
+        has_news = sentiment_features["Sent_Count"].to_numpy() > 0
+
+        score = np.where(avg > 0.15, 1.0, np.where(avg < -0.15, -1.0, 0.0))
+        score += np.where(social > 0.25, 0.5, np.where(social < -0.25, -0.5, 0.0))
+        score = np.where(has_news, score, 0.0)
+
+        vote = np.where(score > 0.5, 1, np.where(score < -0.5, -1, 0))
+        confidence = np.where(has_news, np.minimum(np.abs(avg) * 3, 1.0), 0.0)
+        return pd.DataFrame(
+            {"Vote": vote, "Confidence": confidence, "Score": score},
+            index=sentiment_features.index,
+        )
+
 
+@register_agent(
+    "quant", "The Brain", "Quantitative Analysis", ["prediction", "decomposition"]
+)
 class QuantAgent(Agent):
+    # Ab dieser prognostizierten Rendite zählt das ML-Modell als Signal (±)
+    THRESHOLD = 0.005
+    history_prefix = "Quant"
+
+    def evaluate(self, inputs):
+        return self.analyze(inputs["prediction"], inputs["decomposition"])
+
     def analyze(self, prediction_dict, decomposition):
         pred_return = prediction_dict["final_predicted_return"]
 
@@ -123,12 +332,12 @@ class QuantAgent(Agent):
         score = 0
 
         # ML Modell
-        if pred_return > 0.005:
+        if pred_return > self.THRESHOLD:
             score += 1
             reasons.append(
                 f"KI-Modell prognostiziert Anstieg (+{pred_return * 100:.2f}%)."
             )
-        elif pred_return < -0.005:
+        elif pred_return < -self.THRESHOLD:
             score -= 1
             reasons.append(
                 f"KI-Modell prognostiziert Rückgang ({pred_return * 100:.2f}%)."
@@ -137,6 +346,11 @@ class QuantAgent(Agent):
             reasons.append(
                 f"KI-Modell erwartet Seitwärtsbewegung ({pred_return * 100:.2f}%)."
             )
+        if "return_low" in prediction_dict:
+            reasons.append(
+                f"Prognoseband: {prediction_dict['return_low'] * 100:+.2f}% "
+                f"bis {prediction_dict['return_high'] * 100:+.2f}%."
+            )
 
         # Saisonalität
         if decomposition is not None:
@@ -164,23 +378,158 @@ class QuantAgent(Agent):
             self.vote = "NEUTRAL"
 
         self.reason = " | ".join(reasons)
-        self.confidence = 0.8
+        # Anteil der Bäume, die die Richtung des Votums teilen (StockPredictor.forecast_bands).
+        # Ein Votum gegen die Mehrheit der Bäume (z.B. durch die Saison) bleibt bei 0.5
+        confidence = prediction_dict.get("confidence", 0.8)
+        if self.vote != "NEUTRAL":
+            if "share_up" in prediction_dict:
+                up = prediction_dict["share_up"]
+                confidence = up if self.vote == "BULLISH" else 1 - up
+            confidence = max(confidence, 0.5)
+        self.confidence = confidence
         return self
 
+    def evaluate_history(self, history):
+        index = history["indicators"].index
+        share_up = history.get("share_up")
+        return self.analyze_history(
+            history["predicted_returns"].reindex(index),
+            history.get("decomposition"),
+            share_up.reindex(index) if share_up is not None else None,
+        )
+
+    def evaluate_bar(self, history, position):
+        bar = history["indicators"].index[position]
+        prediction = {"final_predicted_return": history["predicted_returns"].loc[bar]}
+        share_up = history.get("share_up")
+        if share_up is not None and not pd.isna(share_up.loc[bar]):
+            up = float(share_up.loc[bar])
+            prediction.update(share_up=up, confidence=max(up, 1 - up))
+
+        decomposition = history.get("decomposition")
+        if decomposition is not None:
+            decomposition = {key: series.loc[:bar] for key, series in decomposition.items()}
+        return self.analyze(prediction, decomposition)
+
+    def analyze_history(self, predicted_returns, decomposition=None, share_up=None):
+        """
+        Vektorisierte Variante von analyze() für jede Bar.
+
+        Args:
+            predicted_returns (pd.Series): Rendite-Prognose pro Bar (z.B. StockPredictor.predict_returns).
+                Für eine ehrliche Rückschau sollten das Out-of-Sample Prognosen sein.
+            decomposition (dict, optional): Ergebnis von calculate_seasonal_decomposition.
+            share_up (pd.Series, optional): Anteil der Bäume mit positiver Prognose pro Bar
+                (predict_bands()["Up"]). Ohne bleibt die Konfidenz bei 0.8.
+        """
+        pred = predicted_returns.to_numpy()
+        score = np.where(
+            pred > self.THRESHOLD, 1.0, np.where(pred < -self.THRESHOLD, -1.0, 0.0)
+        )
+        score += self.seasonal_history(predicted_returns.index, decomposition)
+
+        vote = np.where(score > 0.5, 1, np.where(score < -0.5, -1, 0))
+        confidence = np.full(len(pred), 0.8)
+        if share_up is not None:
+            # Wie analyze(): Anteil der Bäume in Richtung des Votums (mindestens 0.5),
+            # neutral der Anteil in der Mehrheitsrichtung
+            up = share_up.reindex(predicted_returns.index).to_numpy(dtype=np.float64)
+            agreeing = np.where(
+                vote == 1, up, np.where(vote == -1, 1 - up, np.maximum(up, 1 - up))
+            )
+            agreeing = np.where(vote != 0, np.maximum(agreeing, 0.5), agreeing)
+            confidence = np.where(np.isnan(up), confidence, agreeing)
+        return pd.DataFrame(
+            {"Vote": vote, "Confidence": confidence, "Score": score},
+            index=predicted_returns.index,
+        )
+
+    @staticmethod
+    def seasonal_history(index, decomposition=None):
+        """Saisonalitäts-Anteil des Scores (+0.5/0/-0.5) pro Bar, 0 ohne Zerlegung."""
+        if decomposition is None:
+            return np.zeros(len(index))
+
+        # Gleiches Fenster wie analyze(): die letzten 5 Werte bis einschließlich der Bar
+        seasonal = decomposition["seasonal"].reindex(index)
+        # Am Anfang gibt es weniger als 5 Werte, analyze() nimmt dann einfach alle vorhandenen
+        window_mean = seasonal.rolling(5, min_periods=1).mean().to_numpy()
+        first = seasonal.shift(4).fillna(seasonal.iloc[0])
+        rising = (seasonal - first).to_numpy() > 0
+        return np.where(
+            (window_mean > 0) & rising, 0.5, np.where(window_mean < 0, -0.5, 0.0)
+        )
+
 
 class HedgeFund:
-    def __init__(self):
+    def __init__(self, agents=None):
+        """
+        Args:
+            agents (list, optional): Keys aus AGENT_REGISTRY, die im Rat sitzen.
+                Standard: technical, sentiment, quant.
+        """
         self.tech_agent = TechnicalAgent("Dr. Chart", "Technical Analysis")
         self.sent_agent = SentimentAgent("Mr. Hype", "Sentiment Analysis")
         self.quant_agent = QuantAgent("The Brain", "Quantitative Analysis")
 
+        builtin = {
+            "technical": self.tech_agent,
+            "sentiment": self.sent_agent,
+            "quant": self.quant_agent,
+        }
+        self.agents = {}
+        for key in agents if agents is not None else DEFAULT_AGENTS:
+            if key in builtin:
+                self.agents[key] = builtin[key]
+            else:
+                cls, name, role = AGENT_REGISTRY[key]
+                self.agents[key] = cls(name, role)
+
+    def requirements(self):
+        """Alle Eingaben, die die aktiven Agenten brauchen."""
+        return sorted({req for agent in self.agents.values() for req in agent.requires})
+
     def get_verdict(self, df, news_df, prediction, decomposition):
-        r1 = self.tech_agent.analyze(df)
-        r2 = self.sent_agent.analyze(news_df)
-        r3 = self.quant_agent.analyze(prediction, decomposition)
+        inputs = {
+            "indicators": df,
+            "news": news_df,
+            "prediction": prediction,
+            "decomposition": decomposition,
+        }
+        providers = {key: (lambda _, value=value: value) for key, value in inputs.items()}
+        return self.convene(providers, max_workers=1)
+
+    @instrumented("council")
+    def convene(self, providers, max_workers=4, initializer=None):
+        """
+        Lässt den Rat abstimmen. Eingaben werden nur berechnet, wenn ein aktiver Agent sie braucht.
+
+        Args:
+            providers (dict): Eingabe-Key -> Funktion(inputs), die den Wert berechnet.
+                Über `inputs[...]` kann ein Provider andere Eingaben anfordern (einmalig berechnet).
+            max_workers (int): Unabhängige Eingaben werden parallel in Threads vorberechnet.
+            initializer (callable, optional): Wird in jedem Worker-Thread einmal ausgeführt.
+        """
+        inputs = LazyInputs(providers)
+        required = self.requirements()
 
-        agents = [r1, r2, r3]
+        if max_workers > 1 and len(required) > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(max_workers, len(required)), initializer=initializer
+            ) as pool:
+                # Ein Kontext pro Eingabe: Messung (contextvars) läuft in den Threads weiter.
+                # Fehler tauchen spätestens beim Agenten wieder auf
+                contexts = [contextvars.copy_context() for _ in required]
+                list(
+                    pool.map(
+                        lambda ctx, key: ctx.run(_prefetch, inputs, key), contexts, required
+                    )
+                )
 
+        agents = [agent.evaluate(inputs) for agent in self.agents.values()]
+        return self._majority(agents)
+
+    def _majority(self, agents):
         votes = [a.vote for a in agents]
         bullish = votes.count("BULLISH")
         bearish = votes.count("BEARISH")
@@ -191,3 +540,97 @@ class HedgeFund:
             return agents, "VERKAUFEN (BEARISH)", "red"
         else:
             return agents, "HALTEN (NEUTRAL)", "gray"
+
+    def get_verdict_history(
+        self,
+        df,
+        predicted_returns,
+        sentiment_features=None,
+        decomposition=None,
+        share_up=None,
+    ):
+        """
+        Berechnet Voten, Sicherheiten und das Mehrheitsvotum der aktiven Agenten für JEDE Bar
+        in einem Durchgang. Begründungen werden erst bei Bedarf erzeugt (VerdictHistory.explain).
+
+        Args:
+            df: DataFrame mit Indikatoren (add_indicators).
+            predicted_returns (pd.Series): Rendite-Prognose pro Bar.
+            sentiment_features (pd.DataFrame, optional): Tages-Sentiment pro Bar
+                (sentiment_index.add_sentiment_features). Ohne: Mr. Hype bleibt neutral.
+            decomposition (dict, optional): Ergebnis von calculate_seasonal_decomposition.
+            share_up (pd.Series, optional): Anteil der Bäume mit positiver Prognose pro Bar
+                (StockPredictor.predict_bands()["Up"]), für die Konfidenz von The Brain.
+
+        Raises:
+            ValueError: Wenn ein aktiver Agent keine Historie kann (evaluate_history fehlt).
+        """
+        missing = [key for key, agent in self.agents.items() if not agent.has_history()]
+        if missing:
+            raise ValueError(f"Agenten ohne Voten-Historie: {', '.join(missing)}")
+
+        history = {
+            "indicators": df,
+            "predicted_returns": predicted_returns,
+            "share_up": share_up,
+            "sentiment_features": sentiment_features,
+            "decomposition": decomposition,
+        }
+        columns = {}
+        votes = []
+        for key, agent in self.agents.items():
+            result = agent.evaluate_history(history)
+            prefix = agent.history_prefix or key.title()
+            columns[f"{prefix}_Vote"] = result["Vote"].to_numpy()
+            columns[f"{prefix}_Confidence"] = result["Confidence"].to_numpy()
+            votes.append(result["Vote"].to_numpy())
+
+        votes = np.column_stack(votes) if votes else np.zeros((len(df), 0))
+        bullish = (votes == 1).sum(axis=1)
+        bearish = (votes == -1).sum(axis=1)
+
+        frame = pd.DataFrame(
+            {
+                **columns,
+                "Bullish": bullish,
+                "Bearish": bearish,
+                "Verdict": np.sign(bullish - bearish),
+            },
+            index=df.index,
+        )
+        return VerdictHistory(self, frame, history)
+
+
+class VerdictHistory:
+    """
+    Ergebnis von HedgeFund.get_verdict_history.
+    `frame` enthält die Voten als Zahlen (-1/0/1), Texte entstehen nur für angezeigte Bars.
+    """
+
+    def __init__(self, fund, frame, history):
+        self.fund = fund
+        self.frame = frame
+        self._history = history
+        self._explained = {}
+
+    def labels(self):
+        """Das Mehrheitsvotum als Text (BULLISH/NEUTRAL/BEARISH) pro Bar."""
+        return self.frame["Verdict"].map(VOTE_LABELS)
+
+    def explain(self, position):
+        """
+        Erzeugt die aktiven Agenten inkl. Begründung für eine Bar (Position im Index), mit Cache.
+        Nutzt die normalen analyze()-Methoden auf den Daten bis zu dieser Bar.
+        """
+        if position < 0:
+            position += len(self.frame)
+        if position in self._explained:
+            return self._explained[position]
+
+        # Frische Instanzen: die Agenten des Rats behalten ihr aktuelles Votum
+        agents = [
+            type(agent)(agent.name, agent.role).evaluate_bar(self._history, position)
+            for agent in self.fund.agents.values()
+        ]
+        self._explained[position] = agents
+        return agents
@@ -0,0 +1,335 @@
+"""
+Artefakt-Pipeline: Rechnet alles Teure (Laden, Indikatoren, NLP, Training, Zerlegung, FFT, Agenten-Rat)
+vorab und legt es als versioniertes Bundle pro Ticker & Zeitraum ab. Das Dashboard lädt das Bundle
+memory-mapped und zeichnet nur noch.
+
+Layout:
+    artifacts/<TICKER>/<period>/v<N>/manifest.json
+                                    /<frame>.npy        # Werte (Spalten x Zeilen, float64)
+                                    /<frame>.index.npy  # Zeitachse (datetime64[ns])
+                                    /news.parquet       # Bewertete News (Text, nicht mmap-fähig)
+    artifacts/<TICKER>/<period>/LATEST                  # Name der aktuellen Version
+
+Start:
+    uv run python -m src.artifacts NVDA AMD --period 1y 2y
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.agents import DEFAULT_AGENTS, Agent, HedgeFund
+from src.indicators import (
+    add_indicators,
+    calculate_fourier_transform,
+    calculate_seasonal_decomposition,
+)
+from src.news_schema import to_compact
+from src.news_store import NewsStore
+
+DEFAULT_ARTIFACT_ROOT = "artifacts"
+MANIFEST = "manifest.json"
+LATEST = "LATEST"
+# Ältere Bundles werden ignoriert (dann rechnet das Dashboard live)
+DEFAULT_MAX_AGE = "1D"
+
+
+def _json_default(value):
+    # numpy Skalare (z.B. aus predict_with_sentiment) als Python-Typen schreiben
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Nicht serialisierbar: {type(value)}")
+
+
+def write_frame(directory, name, df):
+    """
+    Speichert einen numerischen DataFrame als eine (Spalten x Zeilen) float64-Matrix.
+    So kann ihn read_frame() ohne Kopie als einen einzigen Block wieder einblenden.
+    """
+    values = np.ascontiguousarray(df.to_numpy(dtype=np.float64).T)
+    np.save(os.path.join(directory, f"{name}.npy"), values)
+    np.save(
+        os.path.join(directory, f"{name}.index.npy"),
+        df.index.to_numpy(dtype="datetime64[ns]"),
+    )
+    return {"columns": list(df.columns), "rows": len(df)}
+
+
+def read_frame(directory, name, columns, mmap=True):
+    """Lädt einen mit write_frame() gespeicherten DataFrame (read-only, memory-mapped)."""
+    mode = "r" if mmap else None
+    values = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode)
+    index = np.load(os.path.join(directory, f"{name}.index.npy"), mmap_mode=mode)
+    return pd.DataFrame(
+        values.T, index=pd.DatetimeIndex(index), columns=columns, copy=False
+    )
+
+
+class ArtifactBundle:
+    """Eine fertige Bundle-Version. Frames werden erst beim ersten Zugriff eingeblendet."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self._frames = {}
+
+    @property
+    def version(self):
+        return self.manifest["version"]
+
+    @property
+    def built_at(self):
+        return self.manifest["built_at"]
+
+    @property
+    def age(self):
+        """Alter des Bundles (Build-Zeit in lokaler Zeit, wie time.strftime sie schreibt)."""
+        built = time.mktime(time.strptime(self.built_at, "%Y-%m-%d %H:%M:%S"))
+        return pd.Timedelta(seconds=max(time.time() - built, 0))
+
+    @property
+    def peers(self):
+        """Vergleichswerte, mit denen das Modell trainiert wurde (leer = ohne Beta/Korrelation)."""
+        return tuple(self.manifest.get("peers", ()))
+
+    def frame(self, name):
+        if name not in self.manifest["frames"]:
+            return None
+        if name not in self._frames:
+            columns = self.manifest["frames"][name]["columns"]
+            self._frames[name] = read_frame(self.path, name, columns)
+        return self._frames[name]
+
+    @property
+    def indicators(self):
+        return self.frame("indicators")
+
+    @property
+    def decomposition(self):
+        frame = self.frame("decomposition")
+        if frame is None:
+            return None
+        return {col: frame[col] for col in frame.columns}
+
+    @property
+    def fourier(self):
+        return pd.DataFrame(self.manifest["fourier"])
+
+    @property
+    def news(self):
+        return to_compact(pd.read_parquet(os.path.join(self.path, "news.parquet")))
+
+    @property
+    def prediction(self):
+        return self.manifest["prediction"]
+
+    @property
+    def feature_importances(self):
+        return pd.DataFrame(self.manifest["feature_importances"])
+
+    @property
+    def term_frequencies(self):
+        return self.manifest["term_frequencies"]
+
+    @property
+    def council(self):
+        """(agents, verdict, color) wie HedgeFund.get_verdict(), plus die Agenten-Keys."""
+        council = self.manifest["council"]
+        agents = []
+        for entry in council["agents"]:
+            agent = Agent(entry["name"], entry["role"])
+            agent.vote = entry["vote"]
+            agent.confidence = entry["confidence"]
+            agent.reason = entry["reason"]
+            agents.append(agent)
+        return council["keys"], agents, council["verdict"], council["color"]
+
+
+def _versions(directory):
+    if not os.path.isdir(directory):
+        return []
+    found = [re.fullmatch(r"v(\d+)", name) for name in os.listdir(directory)]
+    return sorted(int(m.group(1)) for m in found if m)
+
+
+def load_latest_bundle(
+    ticker, period, root=DEFAULT_ARTIFACT_ROOT, max_age=DEFAULT_MAX_AGE
+):
+    """
+    Die aktuelle Version für Ticker & Zeitraum oder None, wenn noch nichts gebaut wurde
+    oder sie älter als `max_age` ist (None = beliebig alt).
+    """
+    directory = os.path.join(root, ticker.upper(), period)
+    try:
+        with open(os.path.join(directory, LATEST), encoding="utf-8") as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    bundle = ArtifactBundle(os.path.join(directory, version))
+    if max_age is not None and bundle.age > pd.Timedelta(max_age):
+        print(
+            f"⚠️ Bundle {ticker.upper()} ({period}) {bundle.version} vom {bundle.built_at} "
+            f"ist älter als {max_age}, es wird live gerechnet."
+        )
+        return None
+    return bundle
+
+
+def build_bundle(
+    ticker,
+    period="1y",
+    root=DEFAULT_ARTIFACT_ROOT,
+    store=None,
+    scrape=False,
+    keep=3,
+):
+    """
+    Führt die komplette Dashboard-Pipeline aus und schreibt eine neue Bundle-Version.
+    Die Version wird erst nach dem vollständigen Schreiben über LATEST sichtbar.
+
+    Args:
+        store (NewsStore, optional): Quelle für bewertete News & Tages-Sentiment.
+        scrape (bool): Ist der Store für den Ticker leer, einmal live sammeln.
+        keep (int): Anzahl der Versionen, die aufbewahrt werden.
+
+    Returns:
+        ArtifactBundle: Die neue Version.
+    """
+    # Teure Abhängigkeiten (yfinance, sklearn, NLTK) nur im Build-Schritt laden
+    from src.collector import collect_ticker
+    from src.data_loader import load_stock_data
+    from src.predictor import StockPredictor
+    from src.scraper import NewsScraper
+    from src.sentiment import SentimentAnalyzer
+    from src.sentiment_index import DailySentimentIndex
+    from src.term_index import TermFrequencyIndex
+
+    ticker = ticker.upper()
+    df = add_indicators(load_stock_data(ticker, period=period))
+    if df is None:
+        raise ValueError(f"Keine Kursdaten für {ticker}")
+
+    store = store or NewsStore()
+    news_df = store.load_recent(ticker)
+    analyzer = None
+    if news_df.empty and scrape:
+        analyzer = SentimentAnalyzer()
+        collect_ticker(ticker, store, NewsScraper(), analyzer)
+        news_df = store.load_recent(ticker)
+
+    predictor = StockPredictor()
+    predictor.train(df, sentiment_daily=DailySentimentIndex(store).daily(ticker))
+    avg_sentiment = (
+        float(news_df["Sentiment_Score"].mean()) if not news_df.empty else 0.0
+    )
+    prediction = predictor.predict_with_sentiment(df, sentiment_score=avg_sentiment)
+
+    # Quartals-Saison (ca. 60 Handelstage), wie im Dashboard
+    decomposition = calculate_seasonal_decomposition(df, period=60)
+    fourier_df = calculate_fourier_transform(df)
+    agents, verdict, color = HedgeFund().get_verdict(
+        df, news_df, prediction, decomposition
+    )
+
+    term_frequencies = {}
+    if not news_df.empty:
+        term_index = TermFrequencyIndex(analyzer or SentimentAnalyzer())
+        term_index.update(news_df)
+        has_social = (news_df["Type"] == "Social").any()
+        term_frequencies = term_index.frequencies(
+            types=["Social"] if has_social else None, since=news_df["Date"].min()
+        )
+
+    directory = os.path.join(root, ticker, period)
+    os.makedirs(directory, exist_ok=True)
+    version = f"v{(_versions(directory) or [0])[-1] + 1}"
+    staging = os.path.join(directory, f".{version}.tmp")
+    os.makedirs(staging)
+
+    frames = {"indicators": write_frame(staging, "indicators", df)}
+    if decomposition is not None:
+        frames["decomposition"] = write_frame(
+            staging, "decomposition", pd.DataFrame(decomposition)
+        )
+    news_df.to_parquet(os.path.join(staging, "news.parquet"))
+
+    manifest = {
+        "ticker": ticker,
+        "period": period,
+        "version": version,
+        "built_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "frames": frames,
+        # Das Modell wird ohne Beta/Korrelation-Features trainiert
+        "peers": [],
+        "prediction": prediction,
+        "feature_importances": {
+            "Feature": list(predictor.features),
+            "Wichtigkeit": predictor.model.feature_importances_.tolist(),
+        },
+        "fourier": {col: fourier_df[col].tolist() for col in fourier_df.columns},
+        "term_frequencies": term_frequencies,
+        "council": {
+            "keys": list(DEFAULT_AGENTS),
+            "verdict": verdict,
+            "color": color,
+            "agents": [
+                {
+                    "name": a.name,
+                    "role": a.role,
+                    "vote": a.vote,
+                    "confidence": a.confidence,
+                    "reason": a.reason,
+                }
+                for a in agents
+            ],
+        },
+    }
+    with open(os.path.join(staging, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, default=_json_default, ensure_ascii=False)
+
+    # Erst umbenennen, dann den Zeiger atomar umsetzen: Leser sehen nie ein halbes Bundle
+    os.rename(staging, os.path.join(directory, version))
+    pointer = os.path.join(directory, f".{LATEST}.tmp")
+    with open(pointer, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(directory, LATEST))
+
+    for old in _versions(directory)[:-keep] if keep else []:
+        shutil.rmtree(os.path.join(directory, f"v{old}"), ignore_errors=True)
+
+    return ArtifactBundle(os.path.join(directory, version))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dashboard-Artefakte vorberechnen")
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--period", nargs="+", default=["1y"])
+    parser.add_argument("--root", default=DEFAULT_ARTIFACT_ROOT)
+    parser.add_argument("--keep", type=int, default=3, help="Versionen aufbewahren")
+    parser.add_argument(
+        "--scrape", action="store_true", help="Leeren News-Store einmal live befüllen"
+    )
+    args = parser.parse_args(argv)
+
+    store = NewsStore()
+    for ticker in args.tickers:
+        for period in args.period:
+            start = time.perf_counter()
+            bundle = build_bundle(
+                ticker, period, args.root, store, args.scrape, args.keep
+            )
+            print(
+                f"📦 {ticker.upper()} ({period}) → {bundle.path} "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Vektorisierter Signal-Backtester für die Regeln von Dr. Chart (RSI/Bollinger/MACD) und
+The Brain (Rendite-Schwellen). Aus Indikator- und Prognose-Spalten werden Positionen
+(-1/0/1) pro Bar, daraus PnL, Drawdown, Turnover und Sharpe inklusive Transaktionskosten.
+
+Ein ganzes Parameter-Gitter wird als ein gebroadcastetes Array (Konfigurationen x Bars)
+gerechnet, nicht per Python-Schleife pro Konfiguration. Nur bei sehr vielen Zellen wird das
+Gitter in Blöcke geteilt, damit der Speicher begrenzt bleibt.
+
+Achtung: Die beste Konfiguration ist In-Sample ausgewählt (Overfitting-Gefahr).
+
+Start:
+    uv run python -m src.backtest NVDA --period 5y --cost-bps 5 --top 10
+"""
+
+import argparse
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from src.agents import QuantAgent, TechnicalAgent
+from src.instrumentation import instrumented
+
+# Standard-Gitter: 36 x 36 x 9 = 11.664 Konfigurationen für Dr. Chart,
+# 61 x 61 = 3.721 für The Brain
+RSI_LOWS = np.arange(10, 46)
+RSI_HIGHS = np.arange(55, 91)
+BOLLINGER_KS = np.arange(1.0, 3.01, 0.25)
+QUANT_THRESHOLDS = np.round(np.arange(0, 0.0301, 0.0005), 4)
+
+DEFAULT_COST_BPS = 5.0
+# Obergrenze für Konfigurationen x Bars pro Block (~50 MB Zwischenergebnisse)
+BATCH_CELLS = 2**21
+
+METRICS = ["total_return", "sharpe", "max_drawdown", "turnover", "trades", "exposure"]
+
+
+def periods_per_year(index):
+    """Bars pro Jahr aus dem Zeitindex (Tagesdaten: ~252)."""
+    if len(index) < 2:
+        return 252.0
+    days = (index[-1] - index[0]).total_seconds() / 86400
+    if days < 30:
+        return 252.0
+    return (len(index) - 1) / (days / 365.25)
+
+
+def grid(**params):
+    """Kartesisches Produkt der Parameter als DataFrame (eine Zeile pro Konfiguration)."""
+    names = list(params)
+    rows = itertools.product(*(np.atleast_1d(params[name]) for name in names))
+    return pd.DataFrame(list(rows), columns=names)
+
+
+def technical_positions(df, rsi_low, rsi_high, bollinger_k, long_only=False):
+    """
+    Positionen nach TechnicalAgent.analyze_history für viele Konfigurationen auf einmal.
+
+    Args:
+        df: DataFrame mit Indikatoren (add_indicators).
+        rsi_low, rsi_high, bollinger_k (array-like): Je ein Wert pro Konfiguration
+            (Bollinger-Bänder mit k Standardabweichungen, Original: k = 2).
+
+    Returns:
+        np.ndarray int8: (Konfigurationen x Bars).
+    """
+    rsi = df["RSI"].to_numpy()
+    close = df["Close"].to_numpy()
+    sma = df["SMA_20"].to_numpy()
+    # Die Bänder in add_indicators liegen bei SMA ± 2 Std
+    upper_width = (df["Bollinger_Upper"].to_numpy() - sma) / 2
+    lower_width = (sma - df["Bollinger_Lower"].to_numpy()) / 2
+
+    # Vergleiche nur einmal pro verschiedenem Parameterwert, danach Zeilen per Index holen
+    lows, low_rows = np.unique(np.asarray(rsi_low, dtype=np.float64), return_inverse=True)
+    highs, high_rows = np.unique(np.asarray(rsi_high, dtype=np.float64), return_inverse=True)
+    ks, k_rows = np.unique(np.asarray(bollinger_k, dtype=np.float64), return_inverse=True)
+
+    # Score verdoppelt, damit alles ganzzahlig bleibt: RSI ±2, Bollinger ±2, MACD ±1
+    buy = 2 * (rsi < lows[:, None]).astype(np.int8)
+    sell = 2 * (rsi > highs[:, None]).astype(np.int8)
+    bands = 2 * (close < sma - ks[:, None] * lower_width).astype(np.int8)
+    bands -= 2 * (close > sma + ks[:, None] * upper_width).astype(np.int8)
+    macd = np.where(df["MACD"].to_numpy() > df["MACD_Signal"].to_numpy(), 1, -1)
+
+    score = buy[low_rows]
+    score -= sell[high_rows]
+    score += bands[k_rows]
+    score += macd.astype(np.int8)
+
+    # score >= 1 -> BULLISH, score <= -1 -> BEARISH (wie im Agenten)
+    positions = (score >= 2).astype(np.int8) - (score <= -2).astype(np.int8)
+    return np.maximum(positions, 0) if long_only else positions
+
+
+def quant_positions(
+    predicted_returns, long_threshold, short_threshold, seasonal=None, long_only=False
+):
+    """
+    Positionen nach QuantAgent.analyze_history für viele Schwellen auf einmal.
+
+    Args:
+        predicted_returns: Rendite-Prognose pro Bar (Out-of-Sample!).
+        long_threshold, short_threshold (array-like): Je ein Wert pro Konfiguration
+            (Original: 0.005 / 0.005, also ±0.5%).
+        seasonal (np.ndarray, optional): QuantAgent.seasonal_history (+0.5/0/-0.5).
+
+    Returns:
+        np.ndarray int8: (Konfigurationen x Bars).
+    """
+    pred = np.asarray(predicted_returns, dtype=np.float64)
+    long_threshold = np.asarray(long_threshold, dtype=np.float64)[:, None]
+    short_threshold = np.asarray(short_threshold, dtype=np.float64)[:, None]
+
+    # Score verdoppelt: ML ±2, Saisonalität ±1; BULLISH ab score > 0.5 (also > 1)
+    score = 2 * (pred > long_threshold).astype(np.int8)
+    score -= 2 * (pred < -short_threshold).astype(np.int8)
+    if seasonal is not None:
+        score += np.rint(2 * np.asarray(seasonal)).astype(np.int8)
+
+    positions = (score > 1).astype(np.int8) - (score < -1).astype(np.int8)
+    return np.maximum(positions, 0) if long_only else positions
+
+
+def evaluate_positions(positions, returns, cost_bps=DEFAULT_COST_BPS, periods=252.0):
+    """
+    Kennzahlen für (Konfigurationen x Bars) Positionen, alle Konfigurationen zugleich.
+    Die Position am Schluss von Bar t verdient die Rendite von Bar t+1,
+    Kosten fallen pro gehandelter Einheit an (|Positionsänderung| * cost_bps).
+
+    Returns:
+        dict: Kennzahl -> np.ndarray (eine Zahl pro Konfiguration).
+    """
+    positions = np.atleast_2d(positions)
+    # Viele Konfigurationen handeln identisch, gerechnet wird jede Positionsfolge nur einmal
+    positions, rows = _unique_rows(positions)
+    held = positions[:, :-1]
+    next_returns = np.asarray(returns, dtype=np.float64)[1:]
+    bars = held.shape[1]
+
+    # Positionsänderungen bleiben int8 (|Δ| <= 2), erst die PnL ist float64
+    trades = np.abs(np.diff(held, axis=1, prepend=0))
+    pnl = held * next_returns
+    pnl -= trades * (cost_bps / 1e4)
+
+    # Mittelwert & Streuung aus Summe und Quadratsumme (ein Durchlauf per einsum)
+    mean = pnl.sum(axis=1) / max(bars, 1)
+    variance = np.einsum("ij,ij->i", pnl, pnl) / max(bars, 1) - mean**2
+    std = np.sqrt(np.maximum(variance, 0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods), 0.0)
+
+    # In-place, damit pro Block nur zwei große float-Arrays entstehen
+    equity = np.add(pnl, 1, out=pnl)
+    np.cumprod(equity, axis=1, out=equity)
+    peak = np.maximum.accumulate(equity, axis=1)
+    # Tiefster Stand relativ zum bisherigen Hoch
+    underwater = np.divide(equity, peak, out=peak).min(axis=1, initial=1.0)
+
+    metrics = {
+        "total_return": equity[:, -1] - 1 if bars else np.zeros(len(held)),
+        "sharpe": sharpe,
+        "max_drawdown": 1 - underwater,
+        # Gehandelte Einheiten pro Jahr (1 = einmal komplett rein oder raus)
+        "turnover": trades.sum(axis=1, dtype=np.int64) / max(bars, 1) * periods,
+        "trades": np.count_nonzero(trades, axis=1),
+        "exposure": np.count_nonzero(held, axis=1) / max(bars, 1),
+    }
+    return {name: values[rows] for name, values in metrics.items()}
+
+
+def _unique_rows(positions):
+    """Verschiedene Zeilen (-1/0/1) plus Index je Originalzeile, über gepackte Bits als Schlüssel."""
+    bits = np.packbits(np.concatenate([positions > 0, positions < 0], axis=1), axis=1)
+    keys = np.ascontiguousarray(bits).view(np.dtype((np.void, bits.shape[1]))).ravel()
+    _, first, rows = np.unique(keys, return_index=True, return_inverse=True)
+    return positions[first], rows.ravel()
+
+
+def run_grid(configs, positions_fn, returns, cost_bps=DEFAULT_COST_BPS, periods=252.0):
+    """
+    Wertet alle Konfigurationen aus (blockweise, falls Konfigurationen x Bars zu groß wird).
+
+    Args:
+        configs (pd.DataFrame): Eine Zeile pro Konfiguration (siehe grid()).
+        positions_fn: Funktion(**Spalten als Arrays) -> (Block x Bars) Positionen.
+        returns: Rendite pro Bar (Close.pct_change()).
+
+    Returns:
+        pd.DataFrame: configs plus Kennzahlen, sortiert nach Sharpe.
+    """
+    batch = max(1, BATCH_CELLS // max(len(returns), 1))
+    metrics = {name: [] for name in METRICS}
+    for start in range(0, len(configs), batch):
+        block = configs.iloc[start : start + batch]
+        positions = positions_fn(**{name: block[name].to_numpy() for name in block})
+        for name, values in evaluate_positions(positions, returns, cost_bps, periods).items():
+            metrics[name].append(values)
+
+    result = configs.reset_index(drop=True)
+    for name in METRICS:
+        result[name] = np.concatenate(metrics[name]) if metrics[name] else []
+    return result.sort_values("sharpe", ascending=False, kind="stable")
+
+
+@instrumented("backtest:technical")
+def backtest_technical(
+    df,
+    rsi_low=RSI_LOWS,
+    rsi_high=RSI_HIGHS,
+    bollinger_k=BOLLINGER_KS,
+    cost_bps=DEFAULT_COST_BPS,
+    long_only=False,
+):
+    """Gitter-Backtest der Regeln von Dr. Chart. Returns: DataFrame (siehe run_grid)."""
+    configs = grid(rsi_low=rsi_low, rsi_high=rsi_high, bollinger_k=bollinger_k)
+    returns = df["Close"].pct_change().to_numpy()
+
+    def positions_fn(**params):
+        return technical_positions(df, long_only=long_only, **params)
+
+    return run_grid(configs, positions_fn, returns, cost_bps, periods_per_year(df.index))
+
+
+@instrumented("backtest:quant")
+def backtest_quant(
+    df,
+    predicted_returns,
+    long_threshold=QUANT_THRESHOLDS,
+    short_threshold=QUANT_THRESHOLDS,
+    decomposition=None,
+    cost_bps=DEFAULT_COST_BPS,
+    long_only=False,
+):
+    """
+    Gitter-Backtest der Schwellen von The Brain.
+
+    Args:
+        predicted_returns (pd.Series): Rendite-Prognose pro Bar, wird auf df.index gelegt.
+            Für ein ehrliches Ergebnis nur Out-of-Sample Prognosen übergeben.
+        decomposition (dict, optional): Ergebnis von calculate_seasonal_decomposition.
+    """
+    pred = predicted_returns.reindex(df.index).to_numpy()
+    seasonal = QuantAgent.seasonal_history(df.index, decomposition)
+    configs = grid(long_threshold=long_threshold, short_threshold=short_threshold)
+    returns = df["Close"].pct_change().to_numpy()
+
+    def positions_fn(**params):
+        return quant_positions(pred, seasonal=seasonal, long_only=long_only, **params)
+
+    return run_grid(configs, positions_fn, returns, cost_bps, periods_per_year(df.index))
+
+
+def _rank_of(result, **params):
+    """Platz (1 = bester Sharpe) einer Konfiguration im Ergebnis, None wenn nicht im Gitter."""
+    match = np.ones(len(result), dtype=bool)
+    for name, value in params.items():
+        match &= np.isclose(result[name].to_numpy(), value)
+    positions = np.flatnonzero(match)
+    return (int(positions[0]) + 1, result.iloc[positions[0]]) if len(positions) else None
+
+
+def _print_result(title, result, top, **current):
+    print(f"\n📊 {title}: {len(result):,} Konfigurationen")
+    print(result.head(top).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    ranked = _rank_of(result, **current)
+    if ranked is not None:
+        rank, row = ranked
+        print(
+            f"👉 Aktuelle Regeln {current}: Platz {rank:,}/{len(result):,}, "
+            f"Sharpe {row['sharpe']:.2f}, Rendite {row['total_return'] * 100:.1f}%"
+        )
+
+
+def main(argv=None):
+    from src.data_loader import load_stock_data
+    from src.indicators import add_indicators
+    from src.predictor import StockPredictor
+
+    parser = argparse.ArgumentParser(description="Vektorisierter Backtest der Agenten-Regeln")
+    parser.add_argument("ticker")
+    parser.add_argument("--period", default="5y")
+    parser.add_argument("--interval", default="1d")
+    parser.add_argument("--cost-bps", type=float, default=DEFAULT_COST_BPS)
+    parser.add_argument("--long-only", action="store_true")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument(
+        "--test-size",
+        type=float,
+        default=0.2,
+        help="Anteil am Ende für die Out-of-Sample Prognosen von The Brain",
+    )
+    args = parser.parse_args(argv)
+
+    df = add_indicators(load_stock_data(args.ticker, args.period, args.interval))
+
+    technical = backtest_technical(df, cost_bps=args.cost_bps, long_only=args.long_only)
+    _print_result(
+        f"{args.ticker} Dr. Chart (ganze Historie)",
+        technical,
+        args.top,
+        rsi_low=TechnicalAgent.RSI_LOW,
+        rsi_high=TechnicalAgent.RSI_HIGH,
+        bollinger_k=2.0,
+    )
+
+    # The Brain nur auf dem Zeitraum, den das Modell nicht gesehen hat
+    split = len(df) - int(np.ceil(len(df) * args.test_size))
+    predictor = StockPredictor()
+    predictor.train(df.iloc[:split])
+    test = df.iloc[split:]
+    quant = backtest_quant(
+        test,
+        predictor.predict_returns(test),
+        cost_bps=args.cost_bps,
+        long_only=args.long_only,
+    )
+    _print_result(
+        f"{args.ticker} The Brain (Out-of-Sample, {len(test)} Bars)",
+        quant,
+        args.top,
+        long_threshold=QuantAgent.THRESHOLD,
+        short_threshold=QuantAgent.THRESHOLD,
+    )
+
+
+if __name__ == "__main__":
+    main()
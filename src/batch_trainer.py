@@ -0,0 +1,275 @@
+"""
+Batch-Training: Ein StockPredictor pro Ticker für ein ganzes Universum (z.B. nächtliches Retraining).
+
+Die Feature-Matrizen aller Ticker werden einmal im Hauptprozess gebaut und hintereinander in
+einen gemeinsamen Shared-Memory Block geschrieben (X als float32 wie intern im Wald, Ziel als
+float64). Die Worker eines Prozess-Pools blenden den Block beim Start ein und trainieren direkt
+darauf, ohne Pickling der Daten und ohne eigene pandas-Kopien. Das Kern-Budget wird auf
+parallele Ticker und Threads im Wald (n_jobs) aufgeteilt. Jedes Modell wird vom Worker selbst
+per joblib gespeichert.
+
+Layout:
+    <out>/<TICKER>.joblib    # Fertiger StockPredictor (Modell, Features, Tages-Sentiment)
+
+Start:
+    uv run python -m src.batch_trainer NVDA AMD TSM AVGO --period 2y --cores 8
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import instrumented
+from src.news_store import DEFAULT_DB_PATH
+
+DEFAULT_MODEL_DIR = os.path.join("data", "models")
+# Blöcke im Shared Memory beginnen auf Cache-Line-Grenzen
+ALIGNMENT = 64
+
+# Pro Worker-Prozess: der eingeblendete Block und das Layout (siehe _init_worker)
+_shared = {}
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def split_cores(cores, tickers):
+    """
+    Teilt das Kern-Budget auf: so viele Ticker parallel wie möglich, übrige Kerne als
+    Threads in die Wälder. Returns: (Prozesse, n_jobs pro Wald).
+    """
+    workers = max(1, min(cores, tickers))
+    return workers, max(1, cores // workers)
+
+
+def build_features(tickers, period="2y", db_path=DEFAULT_DB_PATH):
+    """
+    Lädt Kurse, berechnet Indikatoren & prepare_data() für alle Ticker (im Hauptprozess).
+    Returns:
+        dict: Ticker -> (X, y, features, sentiment_daily). Ticker ohne Daten fehlen.
+    """
+    from src.data_loader import load_stock_data
+    from src.indicators import add_indicators
+    from src.news_store import NewsStore
+    from src.predictor import StockPredictor
+    from src.sentiment_index import DailySentimentIndex
+
+    index = DailySentimentIndex(NewsStore(db_path)) if os.path.exists(db_path) else None
+
+    prepared = {}
+    for ticker in tickers:
+        df = load_stock_data(ticker, period=period)
+        if df is None or df.empty:
+            print(f"⚠️ {ticker}: Keine Kursdaten, wird übersprungen.")
+            continue
+        df = add_indicators(df)
+        sentiment_daily = StockPredictor.usable_sentiment(
+            df, index.daily(ticker) if index is not None else None
+        )
+        predictor = StockPredictor()
+        X, y = predictor.prepare_data(df, sentiment_daily)
+        if len(X) < 10:
+            print(f"⚠️ {ticker}: Zu wenig Zeilen ({len(X)}), wird übersprungen.")
+            continue
+        prepared[ticker] = (X, y, predictor.features, sentiment_daily)
+    return prepared
+
+
+class FeatureStore:
+    """
+    Alle Feature-Matrizen in einem Shared-Memory Block. Pro Ticker liegen X (Zeilen x Features,
+    float32, C-Order) und y (float64) hintereinander; `layout` beschreibt die Offsets.
+    """
+
+    def __init__(self, prepared):
+        self.layout = {}
+        offset = 0
+        for ticker, (X, y, features, _) in prepared.items():
+            x_offset = _aligned(offset)
+            y_offset = _aligned(x_offset + X.shape[0] * X.shape[1] * 4)
+            offset = y_offset + len(y) * 8
+            self.layout[ticker] = {
+                "rows": len(y),
+                "features": list(features),
+                "x_offset": x_offset,
+                "y_offset": y_offset,
+            }
+
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for ticker, (X, y, features, _) in prepared.items():
+            X_view, y_view = self.arrays(self.shm.buf, self.layout[ticker])
+            # Spaltenweise, damit kein zweiter kompletter float64-Frame entsteht
+            for column, feature in enumerate(features):
+                X_view[:, column] = X[feature].to_numpy()
+            y_view[:] = y.to_numpy()
+            del X_view, y_view
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def nbytes(self):
+        return self.shm.size
+
+    @staticmethod
+    def arrays(buffer, entry):
+        """X und y eines Tickers als Sichten auf `buffer` (keine Kopie)."""
+        rows, width = entry["rows"], len(entry["features"])
+        X = np.ndarray((rows, width), dtype=np.float32, buffer=buffer, offset=entry["x_offset"])
+        y = np.ndarray((rows,), dtype=np.float64, buffer=buffer, offset=entry["y_offset"])
+        return X, y
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _init_worker(name, layout, sentiment, n_jobs, directory):
+    _shared.update(
+        # Pool-Worker teilen sich den Resource-Tracker des Hauptprozesses, der den Block freigibt
+        shm=shared_memory.SharedMemory(name=name),
+        layout=layout,
+        sentiment=sentiment,
+        n_jobs=n_jobs,
+        directory=directory,
+    )
+
+
+def train_ticker(ticker):
+    """
+    Trainiert das Modell eines Tickers direkt auf dem Shared-Memory Block und speichert es.
+    Returns:
+        dict: Eine Zeile der Ergebnis-Tabelle.
+    """
+    from src.predictor import StockPredictor
+
+    start = time.perf_counter()
+    entry = _shared["layout"][ticker]
+    X, y = FeatureStore.arrays(_shared["shm"].buf, entry)
+
+    predictor = StockPredictor()
+    predictor.model.set_params(n_jobs=_shared["n_jobs"])
+    predictor.features = entry["features"]
+    predictor.sentiment_daily = _shared["sentiment"].get(ticker)
+    # Frames nur als Hülle um die Sichten: float32 & einzelner Block, sklearn kopiert nicht
+    predictor.fit(
+        pd.DataFrame(X, columns=entry["features"], copy=False),
+        pd.Series(y, name="Target_Return", copy=False),
+    )
+    # Das gespeicherte Modell soll später nicht mit mehreren Threads vorhersagen
+    predictor.model.set_params(n_jobs=None)
+
+    path = save_model(predictor, ticker, _shared["directory"])
+    return {
+        "Ticker": ticker,
+        "Rows": entry["rows"],
+        "Features": len(entry["features"]),
+        "Accuracy": predictor.metrics["accuracy"],
+        "R2": predictor.metrics["r2"],
+        "Seconds": time.perf_counter() - start,
+        "Path": path,
+    }
+
+
+def save_model(predictor, ticker, directory=DEFAULT_MODEL_DIR):
+    """Speichert den Predictor atomar (erst vollständig schreiben, dann umbenennen)."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{ticker.upper()}.joblib")
+    joblib.dump(predictor, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def load_model(ticker, directory=DEFAULT_MODEL_DIR):
+    """Der gespeicherte StockPredictor eines Tickers oder None, wenn es noch keinen gibt."""
+    path = os.path.join(directory, f"{ticker.upper()}.joblib")
+    if not os.path.exists(path):
+        return None
+    return joblib.load(path)
+
+
+@instrumented("batch_train")
+def train_universe(
+    tickers, period="2y", cores=None, directory=DEFAULT_MODEL_DIR, db_path=DEFAULT_DB_PATH
+):
+    """
+    Trainiert & speichert ein Modell pro Ticker auf einem Prozess-Pool.
+    Returns:
+        pd.DataFrame: Ergebnis pro Ticker (Zeilen, Trefferquote, R², Laufzeit, Pfad).
+    """
+    prepared = build_features(tickers, period, db_path)
+    if not prepared:
+        return pd.DataFrame()
+
+    workers, n_jobs = split_cores(cores or os.cpu_count(), len(prepared))
+    store = FeatureStore(prepared)
+    sentiment = {ticker: entry[3] for ticker, entry in prepared.items()}
+    # Größte Matrizen zuerst, damit am Ende kein einzelner langer Ticker übrig bleibt
+    order = sorted(
+        prepared, key=lambda t: prepared[t][0].shape[0] * prepared[t][0].shape[1], reverse=True
+    )
+    del prepared
+    print(
+        f"🧵 {len(order)} Ticker, {store.nbytes / 2**20:.1f} MB Shared Memory, "
+        f"{workers} Prozesse x {n_jobs} Threads"
+    )
+
+    rows = []
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(store.name, store.layout, sentiment, n_jobs, directory),
+        ) as pool:
+            futures = {pool.submit(train_ticker, ticker): ticker for ticker in order}
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    row = future.result()
+                except Exception as e:
+                    row = {"Ticker": ticker, "Error": str(e)}
+                    print(f"❌ {ticker}: {e}")
+                else:
+                    print(
+                        f"🧠 {ticker}: {row['Rows']} Zeilen, "
+                        f"{row['Accuracy']:.1f}% Richtung in {row['Seconds']:.1f}s"
+                    )
+                rows.append(row)
+    finally:
+        store.close()
+
+    return pd.DataFrame(rows).sort_values("Ticker").reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Modelle für ein Ticker-Universum trainieren")
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--period", default="2y")
+    parser.add_argument(
+        "--cores", type=int, default=None, help="Kern-Budget (Standard: alle Kerne)"
+    )
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="News-Store (optional)")
+    parser.add_argument("--out", default=DEFAULT_MODEL_DIR)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    table = train_universe(
+        [t.upper() for t in args.tickers], args.period, args.cores, args.out, args.db
+    )
+    if table.empty:
+        print("⚠️ Keine Modelle trainiert.")
+        return
+    print(table.to_string(index=False))
+    print(f"💾 {len(table)} Modelle unter {args.out} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+"""
+Benchmark-Suite für die Pipeline auf synthetischen Daten in mehreren Größen
+(1 Jahr Tagesbars bis 1 Mio. Minutenbars). Ergebnisse landen als JSON,
+Abweichungen gegenüber einer gespeicherten Baseline lassen den Lauf fehlschlagen.
+
+Start:
+    uv run python -m src.benchmark --save-baseline              # Baseline anlegen
+    uv run python -m src.benchmark                              # Gegen Baseline prüfen
+    uv run python -m src.benchmark --sizes all --only indicators fourier
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BASELINE_PATH = os.path.join("benchmarks", "baseline.json")
+DEFAULT_RESULTS_PATH = os.path.join("benchmarks", "latest.json")
+
+# Größe -> (Anzahl Bars, Frequenz, Anzahl News-Items)
+SIZES = {
+    "1y_daily": (252, "B", 100),
+    "10y_daily": (2520, "B", 1000),
+    "100k_intraday": (100_000, "min", 5000),
+    "1m_intraday": (1_000_000, "min", 20000),
+}
+DEFAULT_SIZES = ["1y_daily", "10y_daily", "100k_intraday"]
+
+WORDS = (
+    "nvidia chips ai datacenter demand record revenue guidance beats misses "
+    "rally selloff bullish bearish gpu blackwell export china rates fed tech "
+    "growth margin supply shortage upgrade downgrade target calls puts moon"
+).split()
+
+
+def synthetic_ohlcv(rows, freq="B", seed=42):
+    """Zufälliger Kursverlauf (geometrische Irrfahrt) mit plausiblen OHLCV-Spalten."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))
+    spread = np.abs(rng.normal(0, 0.01, rows)) * close
+    open_ = close * (1 + rng.normal(0, 0.005, rows))
+    return pd.DataFrame(
+        {
+            "Open": open_,
+            "High": np.maximum(open_, close) + spread,
+            "Low": np.minimum(open_, close) - spread,
+            "Close": close,
+            "Volume": rng.integers(1_000_000, 50_000_000, rows).astype(np.float64),
+        },
+        index=pd.date_range("2000-01-03", periods=rows, freq=freq),
+    )
+
+
+def synthetic_news(items, seed=42):
+    """Zufällige Schlagzeilen & Posts im Format von NewsScraper.get_all_sources()."""
+    rng = np.random.default_rng(seed)
+    titles = [
+        " ".join(rng.choice(WORDS, size=rng.integers(6, 14))) + f" #{i}"
+        for i in range(items)
+    ]
+    social = rng.random(items) < 0.6
+    return pd.DataFrame(
+        {
+            "Date": pd.Timestamp("2024-01-01")
+            + pd.to_timedelta(rng.integers(0, 30 * 24 * 60, items), unit="min"),
+            "Title": titles,
+            "Source": np.where(social, "Stocktwits", "Google News"),
+            "Type": np.where(social, "Social", "News"),
+        }
+    )
+
+
+class Fixtures:
+    """Eingaben pro Größe, einmal erzeugt (Aufbau wird nicht mitgemessen)."""
+
+    def __init__(self, size):
+        self.size = size
+        self.rows, self.freq, self.news_items = SIZES[size]
+        self._cache = {}
+
+    def get(self, key, build):
+        if key not in self._cache:
+            with contextlib.redirect_stdout(io.StringIO()):
+                self._cache[key] = build()
+        return self._cache[key]
+
+    @property
+    def raw(self):
+        return self.get("raw", lambda: synthetic_ohlcv(self.rows, self.freq))
+
+    @property
+    def indicators(self):
+        from src.indicators import add_indicators
+
+        return self.get("indicators", lambda: add_indicators(self.raw))
+
+    @property
+    def news(self):
+        return self.get("news", lambda: synthetic_news(self.news_items))
+
+    @property
+    def analyzer(self):
+        from src.sentiment import SentimentAnalyzer
+
+        return self.get("analyzer", SentimentAnalyzer)
+
+    @property
+    def scored_news(self):
+        return self.get("scored_news", lambda: self.analyzer.analyze_news(self.news))
+
+    @property
+    def predictor(self):
+        from src.predictor import StockPredictor
+
+        def build():
+            predictor = StockPredictor()
+            predictor.train(self.indicators)
+            return predictor
+
+        return self.get("predictor", build)
+
+    @property
+    def decomposition(self):
+        from src.indicators import calculate_seasonal_decomposition
+
+        return self.get(
+            "decomposition",
+            lambda: calculate_seasonal_decomposition(self.indicators, period=60),
+        )
+
+
+def _bench_indicators(fx):
+    from src.indicators import add_indicators
+
+    return lambda: add_indicators(fx.raw), fx.rows
+
+
+def _bench_indicators_chunked(fx):
+    import tempfile
+
+    from src.chunked import compute_indicators_chunked, write_history
+
+    # Verzeichnis lebt so lange wie die Fixtures (TemporaryDirectory räumt selbst auf)
+    directory = fx.get("history_dir", tempfile.TemporaryDirectory)
+    write_history(directory.name, fx.raw)
+    return lambda: compute_indicators_chunked(directory.name), fx.rows
+
+
+def _bench_decomposition(fx):
+    from src.indicators import calculate_seasonal_decomposition
+
+    df = fx.indicators
+    return lambda: calculate_seasonal_decomposition(df, period=60), len(df)
+
+
+def _bench_fourier(fx):
+    from src.indicators import calculate_fourier_transform
+
+    df = fx.indicators
+    return lambda: calculate_fourier_transform(df), len(df)
+
+
+def _bench_prepare_data(fx):
+    from src.predictor import StockPredictor
+
+    df = fx.indicators
+    return lambda: StockPredictor().prepare_data(df), len(df)
+
+
+def _bench_train(fx):
+    from src.predictor import StockPredictor
+
+    df = fx.indicators
+    return lambda: StockPredictor().train(df), len(df)
+
+
+def _bench_predict(fx):
+    predictor, df = fx.predictor, fx.indicators
+    return lambda: predictor.predict_with_sentiment(df, sentiment_score=0.2), 1
+
+
+def _bench_analyze_news(fx):
+    analyzer, news = fx.analyzer, fx.news
+    return lambda: analyzer.analyze_news(news), len(news)
+
+
+def _bench_wordcloud_text(fx):
+    analyzer, news = fx.analyzer, fx.news
+    return lambda: analyzer.get_text_for_wordcloud(news), len(news)
+
+
+def _bench_match_tickers(fx):
+    from src.ticker_matcher import COMPANY_NAMES, TickerMatcher
+
+    # Ganze Watchlist der bekannten Namen: Aufwand pro Text hängt nicht von ihrer Größe ab
+    matcher, news = TickerMatcher(list(COMPANY_NAMES)), fx.news
+    return lambda: matcher.route(news), len(news)
+
+
+def _bench_backtest_grid(fx):
+    from src.backtest import backtest_technical
+
+    df = fx.indicators
+    return lambda: backtest_technical(df), len(df)
+
+
+def _bench_verdict(fx):
+    from src.agents import HedgeFund
+
+    df, news = fx.indicators, fx.scored_news
+    prediction = fx.predictor.predict_with_sentiment(df)
+    decomposition = fx.decomposition
+    return lambda: HedgeFund().get_verdict(df, news, prediction, decomposition), len(df)
+
+
+# Name -> (Setup, maximale Anzahl Bars; größere Stufen werden übersprungen).
+# Alles mit Random-Forest-Training läuft nur auf Tagesdaten (auf Minutenbars dauert ein Training Minuten).
+BENCHMARKS = {
+    "indicators": (_bench_indicators, None),
+    "indicators_chunked": (_bench_indicators_chunked, None),
+    "decomposition": (_bench_decomposition, None),
+    "fourier": (_bench_fourier, None),
+    "prepare_data": (_bench_prepare_data, None),
+    "train": (_bench_train, 10_000),
+    "predict_with_sentiment": (_bench_predict, 10_000),
+    "analyze_news": (_bench_analyze_news, None),
+    "get_text_for_wordcloud": (_bench_wordcloud_text, None),
+    "match_tickers": (_bench_match_tickers, None),
+    "get_verdict": (_bench_verdict, 10_000),
+    # Ganzes Gitter (11.664 Konfigurationen); auf 100k Minutenbars ~1 Minute
+    "backtest_grid": (_bench_backtest_grid, 10_000),
+}
+
+
+def _time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_benchmarks(sizes=None, only=None, repeat=3):
+    """
+    Führt die Benchmarks aus.
+    Returns:
+        dict: {"meta": {...}, "results": {"<benchmark>/<größe>": {"median": s, "min": s, ...}}}
+    """
+    results = {}
+    for size in sizes or DEFAULT_SIZES:
+        fx = Fixtures(size)
+        for name, (setup, max_rows) in BENCHMARKS.items():
+            if only and name not in only:
+                continue
+            if max_rows is not None and fx.rows > max_rows:
+                continue
+
+            key = f"{name}/{size}"
+            try:
+                func, rows = setup(fx)
+                timings = _time(func, repeat)
+            except Exception as e:
+                # Ein kaputter Benchmark (z.B. fehlende NLTK-Daten) stoppt nicht die ganze Suite
+                message = " ".join(str(e).replace("*", "").split())[:200]
+                results[key] = {"error": f"{type(e).__name__}: {message}"}
+                print(f"⚠️ {key}: {results[key]['error']}")
+                continue
+
+            median = statistics.median(timings)
+            results[key] = {
+                "median": median,
+                "min": min(timings),
+                "repeat": repeat,
+                "rows": rows,
+                "rows_per_s": rows / median if median > 0 else None,
+            }
+            print(f"⏱️ {key:<40} {median * 1000:>10.1f} ms  ({rows:,} Zeilen)")
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance=0.25, min_delta=0.005):
+    """
+    Vergleicht die Mediane mit der Baseline.
+    Eine Regression ist ein Anstieg um mehr als `tolerance` (relativ) UND mehr als
+    `min_delta` Sekunden (gegen Rauschen bei sehr kurzen Messungen).
+
+    Returns:
+        list[dict]: Alle Regressionen (leer = alles ok).
+    """
+    regressions = []
+    for key, current in report["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if not base or "median" not in base:
+            continue
+        if "median" not in current:
+            regressions.append({"benchmark": key, "error": current.get("error")})
+            continue
+
+        ratio = current["median"] / base["median"] if base["median"] > 0 else 1.0
+        if ratio > 1 + tolerance and current["median"] - base["median"] > min_delta:
+            regressions.append(
+                {
+                    "benchmark": key,
+                    "baseline": base["median"],
+                    "current": current["median"],
+                    "ratio": ratio,
+                }
+            )
+    return regressions
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline-Benchmarks")
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help=f"Größen aus {list(SIZES)} oder 'all'",
+    )
+    parser.add_argument("--only", nargs="+", help=f"Nur diese aus {list(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default=DEFAULT_RESULTS_PATH)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Ergebnis als neue Baseline speichern"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="Erlaubter Anstieg (0.25 = +25%%)"
+    )
+    args = parser.parse_args(argv)
+
+    sizes = list(SIZES) if args.sizes == ["all"] else args.sizes
+    report = run_benchmarks(sizes, args.only, args.repeat)
+    _write_json(args.out, report)
+    print(f"💾 Ergebnisse gespeichert unter: {args.out}")
+
+    if args.save_baseline:
+        _write_json(args.baseline, report)
+        print(f"📌 Neue Baseline: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("ℹ️ Keine Baseline vorhanden (mit --save-baseline anlegen).")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(report, baseline, args.tolerance)
+    if not regressions:
+        print("✅ Keine Regressionen gegenüber der Baseline.")
+        return 0
+
+    for r in regressions:
+        if "error" in r:
+            print(f"❌ {r['benchmark']}: lief in der Baseline, jetzt Fehler: {r['error']}")
+        else:
+            print(
+                f"❌ {r['benchmark']}: {r['baseline'] * 1000:.1f} ms → "
+                f"{r['current'] * 1000:.1f} ms ({(r['ratio'] - 1) * 100:+.0f}%)"
+            )
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
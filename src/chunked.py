@@ -0,0 +1,195 @@
+"""
+Out-of-core Indikatoren für sehr lange Historien (z.B. Minutenbars über Jahre).
+Die OHLCV-Historie liegt memory-mapped auf der Platte (Format wie src/artifacts.py), wird
+blockweise gelesen und blockweise in eine memory-mapped Ausgabe geschrieben. Fensterränder,
+EWM-Startwerte und der OBV-Stand werden über die Blockgrenzen mitgeführt
+(indicator_columns(carry=...)), das Ergebnis ist bitgleich mit add_indicators() im Speicher.
+Speicherbedarf und Durchsatz hängen nur von der Blockgröße ab, nicht von der Länge der Historie.
+
+Layout:
+    <dir>/ohlcv.npy, ohlcv.index.npy              # Eingabe (OHLCV x Zeilen, float64)
+    <dir>/indicators.npy, indicators.index.npy    # Ausgabe (Spalten x Zeilen, gültige Zeilen vorne)
+    <dir>/indicators.json                         # Spalten & Anzahl gültiger Zeilen
+
+Start:
+    uv run python -m src.chunked NVDA --interval 1h --sync
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+
+from src.artifacts import read_frame, write_frame
+from src.indicators import INDICATOR_COLUMNS, indicator_columns
+from src.price_store import OHLCV, PriceStore, sync_bars
+
+DEFAULT_CHUNK_DIR = os.path.join("data", "chunked")
+DEFAULT_CHUNK_ROWS = 2**16
+# Darunter reicht ein Block nicht, damit die RSI-Startwerte (EWM, adjust=True) exakt sind
+MIN_CHUNK_ROWS = 1024
+
+HISTORY = "ohlcv"
+OUTPUT = "indicators"
+
+
+def write_history(directory, bars):
+    """Legt einen OHLCV-DataFrame als memory-mapped Historie ab."""
+    os.makedirs(directory, exist_ok=True)
+    return write_frame(directory, HISTORY, bars[OHLCV])
+
+
+def export_history(store, ticker, interval, directory, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Schreibt die Bars aus dem PriceStore blockweise in eine memory-mapped Historie,
+    ohne sie komplett in den Speicher zu laden.
+    Returns:
+        int: Anzahl der Bars.
+    """
+    until = store.last_bar(ticker, interval)
+    rows = store.count(ticker, interval, until=until) if until is not None else 0
+
+    os.makedirs(directory, exist_ok=True)
+    values = open_memmap(
+        os.path.join(directory, f"{HISTORY}.npy"),
+        mode="w+",
+        dtype=np.float64,
+        shape=(len(OHLCV), rows),
+    )
+    index = open_memmap(
+        os.path.join(directory, f"{HISTORY}.index.npy"),
+        mode="w+",
+        dtype="datetime64[ns]",
+        shape=(rows,),
+    )
+
+    position = 0
+    if rows:
+        for ts, block in store.iter_bars(ticker, interval, chunk_rows, until=until):
+            values[:, position : position + len(ts)] = block.T
+            index[position : position + len(ts)] = ts
+            position += len(ts)
+    values.flush()
+    index.flush()
+    return rows
+
+
+def compute_indicators_chunked(directory, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Berechnet add_indicators() blockweise über die memory-mapped Historie in `directory`.
+
+    Returns:
+        dict: Manifest der Ausgabe (Spalten, gültige Zeilen, Zeilen der Eingabe).
+    """
+    if chunk_rows < MIN_CHUNK_ROWS:
+        raise ValueError(f"chunk_rows muss mindestens {MIN_CHUNK_ROWS} sein.")
+
+    values = np.load(os.path.join(directory, f"{HISTORY}.npy"), mmap_mode="r")
+    index = np.load(os.path.join(directory, f"{HISTORY}.index.npy"), mmap_mode="r")
+    n = values.shape[1]
+    columns = OHLCV + INDICATOR_COLUMNS
+
+    out = open_memmap(
+        os.path.join(directory, f"{OUTPUT}.npy"),
+        mode="w+",
+        dtype=np.float64,
+        shape=(len(columns), n),
+    )
+    out_index = open_memmap(
+        os.path.join(directory, f"{OUTPUT}.index.npy"),
+        mode="w+",
+        dtype="datetime64[ns]",
+        shape=(n,),
+    )
+
+    # Ein Arbeitspuffer für alle Blöcke (Spalten x Zeilen)
+    block = np.empty((len(columns), min(chunk_rows, n)))
+    carry = {}
+    written = 0
+    for start in range(0, n, chunk_rows):
+        stop = min(start + chunk_rows, n)
+        raw = values[:, start:stop]
+        if np.isnan(raw).any():
+            # Die Startwerte der EWMs setzen lückenlose Bars voraus
+            raise ValueError(
+                f"Historie enthält NaN (Zeilen {start}-{stop}), bitte vorher bereinigen."
+            )
+
+        chunk = pd.DataFrame(
+            raw.T, index=pd.DatetimeIndex(index[start:stop]), columns=OHLCV, copy=False
+        )
+        rows = block[:, : stop - start]
+        rows[: len(OHLCV)] = raw
+        for row, (_, series) in enumerate(indicator_columns(chunk, carry), start=len(OHLCV)):
+            rows[row] = series.to_numpy()
+
+        # Wie dropna(): nur Zeilen ohne NaN, lückenlos hintereinander in die Ausgabe
+        valid = ~np.isnan(rows).any(axis=0)
+        count = int(valid.sum())
+        out[:, written : written + count] = rows[:, valid]
+        out_index[written : written + count] = index[start:stop][valid]
+        written += count
+
+    out.flush()
+    out_index.flush()
+
+    manifest = {
+        "columns": columns,
+        "rows": written,
+        "source_rows": n,
+        "chunk_rows": chunk_rows,
+        "built_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    with open(os.path.join(directory, f"{OUTPUT}.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_indicators(directory, mmap=True):
+    """Die blockweise berechneten Indikatoren als DataFrame (memory-mapped, ohne Kopie)."""
+    with open(os.path.join(directory, f"{OUTPUT}.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    frame = read_frame(directory, OUTPUT, manifest["columns"], mmap=mmap)
+    return frame.iloc[: manifest["rows"]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Indikatoren blockweise über memory-mapped Historien berechnen"
+    )
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--interval", default="1d", choices=["1d", "1h"])
+    parser.add_argument("--root", default=DEFAULT_CHUNK_DIR)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument(
+        "--sync", action="store_true", help="Vorher neue Bars in den PriceStore laden"
+    )
+    args = parser.parse_args(argv)
+
+    store = PriceStore()
+    for ticker in args.tickers:
+        ticker = ticker.upper()
+        if args.sync:
+            sync_bars(store, ticker, args.interval)
+
+        directory = os.path.join(args.root, f"{ticker}_{args.interval}")
+        start = time.perf_counter()
+        rows = export_history(store, ticker, args.interval, directory, args.chunk_rows)
+        if rows == 0:
+            print(f"⚠️ {ticker}: Keine Bars im PriceStore ({args.interval}).")
+            continue
+
+        manifest = compute_indicators_chunked(directory, args.chunk_rows)
+        elapsed = time.perf_counter() - start
+        print(
+            f"🧮 {ticker} ({args.interval}): {manifest['rows']:,} Zeilen → {directory} "
+            f"in {elapsed:.1f}s ({rows / elapsed:,.0f} Bars/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Hintergrund-Collector: Scraped News & Social Posts, bewertet sie und legt sie im NewsStore ab.
+Das Dashboard liest nur noch aus dem Store.
+
+Start:
+    uv run python -m src.collector --tickers NVDA AMD TSM --interval 900
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from src.dedup import NearDuplicateIndex
+from src.news_store import DEFAULT_DB_PATH, NewsStore
+from src.scraper import NewsScraper
+from src.sentiment import SentimentAnalyzer
+from src.sentiment_index import DailySentimentIndex
+from src.ticker_matcher import TickerMatcher
+
+
+def collect_ticker(ticker, store, scraper, analyzer, dedup_index=None, shared_posts=None):
+    """
+    Holt alle Quellen für einen Ticker und speichert nur neue Items (bewertet).
+    `shared_posts`: schon verteilte Posts aus NewsScraper.get_shared_posts().
+    """
+    reposts = {}
+    raw_df = scraper.get_all_sources(
+        ticker, dedup_index=dedup_index, shared_posts=shared_posts, reposts=reposts
+    )
+    if reposts:
+        # Kopien schon gespeicherter Items zählen dort (Cluster-Größe & ihr Tag im Index)
+        DailySentimentIndex(store).update(ticker, store.add_reposts(ticker, reposts))
+        for original, copies in reposts.items():
+            dedup_index.remember(copies, original=original)
+    if raw_df.empty:
+        return 0
+
+    # Schon gespeicherte Titel müssen nicht noch einmal durch das NLP
+    known = store.known_titles(ticker, raw_df["Title"].astype(str))
+    new_df = raw_df[~raw_df["Title"].astype(str).isin(known)]
+    if not new_df.empty:
+        scored_df = analyzer.analyze_news(new_df)
+        inserted = store.append(ticker, scored_df)
+        # Tages-Index nur für die Tage der neuen Items aktualisieren
+        DailySentimentIndex(store).update(ticker, scored_df)
+    else:
+        inserted = 0
+
+    # Erst jetzt (alles gespeichert) gelten die Items als bekannt für spätere Reposts
+    if dedup_index is not None:
+        dedup_index.remember(raw_df["Title"].astype(str))
+    return inserted
+
+
+def collect_once(
+    tickers, store, scraper=None, analyzer=None, dedup_indexes=None, matcher=None
+):
+    """
+    Ein Durchlauf über alle Ticker. Gibt die Anzahl neuer Items pro Ticker zurück.
+    `dedup_indexes` (Ticker -> NearDuplicateIndex) bleibt zwischen den Läufen erhalten,
+    damit Reposts älterer Items gar nicht erst bewertet werden.
+    Subreddits über viele Ticker werden pro Durchlauf nur einmal geholt und per
+    `matcher` (TickerMatcher über die Watchlist) auf die erwähnten Ticker verteilt.
+    """
+    scraper = scraper or NewsScraper()
+    analyzer = analyzer or SentimentAnalyzer()
+    dedup_indexes = {} if dedup_indexes is None else dedup_indexes
+    matcher = matcher or TickerMatcher(tickers)
+
+    try:
+        shared = scraper.get_shared_posts(matcher)
+    except Exception as e:
+        print(f"❌ Collector Fehler bei den gemeinsamen Posts: {e}")
+        shared = {}
+
+    results = {}
+    for ticker in tickers:
+        index = dedup_indexes.setdefault(ticker, NearDuplicateIndex())
+        posts = shared.get(ticker, pd.DataFrame())
+        try:
+            results[ticker] = collect_ticker(
+                ticker, store, scraper, analyzer, index, shared_posts=posts
+            )
+        except Exception as e:
+            # Ein kaputter Ticker darf den Daemon nicht stoppen
+            print(f"❌ Collector Fehler bei {ticker}: {e}")
+            results[ticker] = 0
+        print(f"📥 {ticker}: {results[ticker]} neue Items gespeichert.")
+    return results
+
+
+def run(tickers, interval=900, db_path=DEFAULT_DB_PATH):
+    """Sammelt endlos alle `interval` Sekunden (Abbruch mit Strg+C)."""
+    store = NewsStore(db_path)
+    scraper = NewsScraper()
+    analyzer = SentimentAnalyzer()
+    dedup_indexes = {}
+    # Der Automat wird nur einmal pro Watchlist gebaut
+    matcher = TickerMatcher(tickers)
+
+    print(f"🛰️ Collector gestartet für {', '.join(tickers)} (alle {interval}s)")
+    try:
+        while True:
+            started = time.monotonic()
+            collect_once(tickers, store, scraper, analyzer, dedup_indexes, matcher)
+            # Intervall vom Start des Laufs messen, damit lange Läufe nicht driften
+            elapsed = time.monotonic() - started
+            time.sleep(max(interval - elapsed, 0))
+    except KeyboardInterrupt:
+        print("👋 Collector beendet.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="News & Sentiment Collector")
+    parser.add_argument("--tickers", nargs="+", default=["NVDA"])
+    parser.add_argument(
+        "--interval", type=int, default=900, help="Sekunden zwischen zwei Läufen"
+    )
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Pfad zur SQLite-Datei")
+    parser.add_argument(
+        "--once", action="store_true", help="Nur einen Durchlauf ausführen"
+    )
+    args = parser.parse_args(argv)
+
+    tickers = [t.upper() for t in args.tickers]
+    if args.once:
+        collect_once(tickers, NewsStore(args.db))
+    else:
+        run(tickers, args.interval, args.db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Rollierende Korrelationen & Kovarianzen über ein Renditen-Panel (Ticker als Spalten),
+z.B. NVDA gegen Peers und Indizes (AMD, TSM, ^SOX, QQQ) bis zu einigen hundert Tickern.
+
+Statt jedes Fenster neu zu rechnen, werden laufende Summen fortgeschrieben: Zeilen, die ins
+Fenster kommen, werden addiert, Zeilen, die herausfallen, abgezogen (als Matrixprodukte).
+Fehlende Werte zählen paarweise wie bei pandas (nur Zeilen, in denen beide Ticker Werte haben).
+Damit sich Rundungsfehler (vor allem in float32) nicht aufsummieren, werden die Summen
+regelmäßig exakt aus dem Fenster neu aufgebaut.
+
+Start:
+    uv run python -m src.correlation NVDA AMD TSM ^SOX QQQ --window 60 --float32
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import instrumented
+from src.price_store import PriceStore, sync_bars
+
+DEFAULT_PEERS = ["AMD", "TSM", "^SOX", "QQQ"]
+DEFAULT_WINDOW = 60
+
+# Spalten-Präfixe der Features für den StockPredictor
+CORRELATION_PREFIXES = ("Beta_", "Corr_")
+
+
+def load_close_panel(tickers, interval="1d", store=None, sync=True):
+    """Schlusskurse aus dem PriceStore als Panel (eine Spalte pro Ticker, Zeiten vereinigt)."""
+    store = store or PriceStore()
+    closes = {}
+    for ticker in tickers:
+        if sync:
+            sync_bars(store, ticker, interval)
+        bars = store.load(ticker, interval)
+        if bars.empty:
+            print(f"⚠️ Keine Kurse für {ticker}, wird ausgelassen.")
+            continue
+        closes[ticker] = bars["Close"]
+    return pd.DataFrame(closes)
+
+
+def return_panel(closes, dtype=np.float64):
+    """
+    Renditen pro Ticker, jeweils über die eigenen Handelstage gerechnet (ein Feiertag an einer
+    Börse macht die Rendite danach nicht zu NaN). Tage ohne Kurs bleiben NaN.
+    """
+    returns = pd.DataFrame(
+        {ticker: closes[ticker].dropna().pct_change() for ticker in closes.columns},
+        index=closes.index,
+    )
+    return returns.dropna(how="all").astype(dtype)
+
+
+class RollingCovariance:
+    """
+    Kovarianz- & Korrelationsmatrix über die letzten `window` Zeilen, fortgeschrieben per update().
+
+    Laufende Summen pro Paar (i, j), jeweils nur über Zeilen, in denen beide Werte haben:
+        N = Mᵀ M,  SX = Xᵀ M (Summe von x_i),  SXX = (X²)ᵀ M,  SXY = Xᵀ X
+    (X = Renditen mit 0 statt NaN, M = 1, wo ein Wert vorhanden ist)
+
+    Args:
+        columns (list): Ticker (Spalten des Panels).
+        min_periods (int, optional): Mindestanzahl gemeinsamer Zeilen pro Paar
+            (Standard: die Hälfte des Fensters, Ticker mit anderen Feiertagen fallen nicht heraus).
+        dtype: np.float32 halbiert Speicher & Rechenzeit der Matrixprodukte.
+        refresh (int, optional): Nach so vielen Zeilen die Summen exakt neu aufbauen
+            (Standard: window).
+    """
+
+    def __init__(
+        self, columns, window=DEFAULT_WINDOW, min_periods=None, dtype=np.float64, refresh=None
+    ):
+        self.columns = list(columns)
+        self.window = window
+        self.min_periods = window // 2 if min_periods is None else min_periods
+        self.dtype = np.dtype(dtype)
+        self.refresh = refresh or window
+
+        k = len(self.columns)
+        # Ringpuffer mit den Zeilen im Fenster (für das Herausnehmen & den Neuaufbau)
+        self._buffer = np.full((window, k), np.nan, dtype=self.dtype)
+        self._rows = 0
+        self._since_refresh = 0
+        self._sums = [np.zeros((k, k), dtype=self.dtype) for _ in range(4)]
+
+    @staticmethod
+    def _moments(rows, signs=None):
+        """
+        (N, SX, SXX, SXY) eines Zeilenblocks als zwei Matrixprodukte.
+        `signs` (+1/-1 pro Zeile): Zeilen, die herausfallen, werden im selben Produkt abgezogen.
+        """
+        present = ~np.isnan(rows)
+        mask = present.astype(rows.dtype)
+        values = np.where(present, rows, 0)
+        right_mask, right_values = mask, values
+        if signs is not None:
+            signs = signs.astype(rows.dtype)[:, None]
+            right_mask, right_values = mask * signs, values * signs
+
+        k = rows.shape[1]
+        # [X | X² | M]ᵀ M liefert SX, SXX und N auf einmal
+        stacked = np.concatenate([values, values * values, mask], axis=1).T @ right_mask
+        return stacked[2 * k :], stacked[:k], stacked[k : 2 * k], values.T @ right_values
+
+    def _window_rows(self):
+        """Die Zeilen im Fenster in zeitlicher Reihenfolge."""
+        filled = min(self._rows, self.window)
+        start = self._rows % self.window if self._rows >= self.window else 0
+        return np.roll(self._buffer, -start, axis=0)[:filled]
+
+    def update(self, rows):
+        """Nimmt neue Zeilen auf (eine Zeile oder ein Block, NaN erlaubt)."""
+        rows = np.atleast_2d(np.asarray(rows, dtype=self.dtype))
+        if len(rows) >= self.window:
+            # Das ganze Fenster ist neu: direkt aus dem Block aufbauen
+            self._rows += len(rows)
+            tail = rows[-self.window :]
+            self._buffer[:] = np.roll(tail, self._rows % self.window, axis=0)
+            self._sums = list(self._moments(tail))
+            self._since_refresh = 0
+            return
+
+        absolute = self._rows + np.arange(len(rows))
+        positions = absolute % self.window
+        # Heraus fällt, was `window` Zeilen vorher auf demselben Platz lag (solange belegt)
+        leaving = self._buffer[positions[absolute >= self.window]]
+        changed = np.concatenate([rows, leaving])
+        signs = np.concatenate([np.ones(len(rows)), -np.ones(len(leaving))])
+        for total, delta in zip(self._sums, self._moments(changed, signs)):
+            total += delta
+
+        self._buffer[positions] = rows
+        self._rows += len(rows)
+        self._since_refresh += len(rows)
+        if self._since_refresh >= self.refresh:
+            self._sums = list(self._moments(self._window_rows()))
+            self._since_refresh = 0
+
+    def _pairwise(self):
+        count, sx, sxx, sxy = (s.astype(np.float64) for s in self._sums)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_i = sx / count
+            cov = (sxy - sx * mean_i.T) / (count - 1)
+            var = (sxx - sx * mean_i) / (count - 1)
+        valid = (count >= max(self.min_periods, 2)) & (self._rows > 0)
+        return count, cov, var, valid
+
+    def count(self):
+        """Gemeinsame Zeilen pro Paar im aktuellen Fenster."""
+        return pd.DataFrame(
+            self._sums[0].astype(np.int64), index=self.columns, columns=self.columns
+        )
+
+    def covariance(self):
+        _, cov, _, valid = self._pairwise()
+        return pd.DataFrame(
+            np.where(valid, cov, np.nan).astype(self.dtype),
+            index=self.columns,
+            columns=self.columns,
+        )
+
+    def correlation(self):
+        _, cov, var, valid = self._pairwise()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # var[i, j]: Varianz von i über die gemeinsamen Zeilen mit j
+            corr = np.clip(cov / np.sqrt(var * var.T), -1, 1)
+        corr = np.where(valid & (var > 0) & (var.T > 0), corr, np.nan)
+        return pd.DataFrame(corr.astype(self.dtype), index=self.columns, columns=self.columns)
+
+
+@instrumented("correlation:matrices")
+def rolling_matrices(returns, window=DEFAULT_WINDOW, at=None, dtype=np.float64, min_periods=None):
+    """
+    Kovarianz & Korrelation des Panels an ausgewählten Zeitpunkten.
+
+    Args:
+        returns (pd.DataFrame): Renditen-Panel (return_panel).
+        at (list, optional): Zeilenpositionen, an denen ausgegeben wird (Standard: nur die letzte).
+
+    Returns:
+        dict: Zeitstempel -> (Kovarianz, Korrelation) als DataFrames.
+    """
+    at = sorted(at) if at is not None else [len(returns) - 1]
+    engine = RollingCovariance(returns.columns, window, min_periods, dtype)
+    values = returns.to_numpy(dtype=engine.dtype)
+
+    results = {}
+    done = 0
+    for position in at:
+        # Nur die Zeilen seit der letzten Ausgabe kommen hinzu
+        engine.update(values[done : position + 1])
+        done = position + 1
+        results[returns.index[position]] = (engine.covariance(), engine.correlation())
+    return results
+
+
+@instrumented("correlation:beta")
+def rolling_beta_corr(returns, target, window=DEFAULT_WINDOW, dtype=np.float64, min_periods=None):
+    """
+    Rollierendes Beta & Korrelation von `target` gegen jede andere Spalte, für jede Zeile.
+    Laufende Summen als Präfix-Summen (float64), Fenster = Differenz zweier Präfixe.
+
+    Returns:
+        pd.DataFrame: Spalten Beta_<Peer> und Corr_<Peer>.
+    """
+    min_periods = max(window // 2 if min_periods is None else min_periods, 2)
+    peers = [column for column in returns.columns if column != target]
+    y = returns[target].to_numpy(dtype=np.float64)[:, None]
+    x = returns[peers].to_numpy(dtype=np.float64)
+
+    both = ~np.isnan(x) & ~np.isnan(y)
+    x = np.where(both, x, 0)
+    y = np.where(both, y, 0)
+
+    def window_sum(values):
+        prefix = np.cumsum(values, axis=0)
+        shifted = np.zeros_like(prefix)
+        shifted[window:] = prefix[:-window]
+        return prefix - shifted
+
+    n = window_sum(both.astype(np.float64))
+    sx, sy = window_sum(x), window_sum(y)
+    sxx, syy, sxy = window_sum(x * x), window_sum(y * y), window_sum(x * y)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        beta = np.where(var_x > 0, cov / var_x, np.nan)
+        corr = np.where(
+            (var_x > 0) & (var_y > 0), np.clip(cov / np.sqrt(var_x * var_y), -1, 1), np.nan
+        )
+    enough = n >= min_periods
+    beta = np.where(enough, beta, np.nan).astype(dtype)
+    corr = np.where(enough, corr, np.nan).astype(dtype)
+
+    return pd.concat(
+        [
+            pd.DataFrame(beta, index=returns.index, columns=[f"Beta_{p}" for p in peers]),
+            pd.DataFrame(corr, index=returns.index, columns=[f"Corr_{p}" for p in peers]),
+        ],
+        axis=1,
+    )
+
+
+def add_correlation_features(df, returns, target, window=DEFAULT_WINDOW, dtype=np.float64):
+    """
+    Hängt Beta_/Corr_-Spalten gegen die Peers an (neuer DataFrame), passend zu df.index.
+    Der StockPredictor nimmt alle Spalten mit diesen Präfixen automatisch als Features.
+    """
+    features = rolling_beta_corr(returns, target, window, dtype)
+    # Tage ohne Panel-Zeile bekommen den letzten bekannten Wert (kein Blick in die Zukunft)
+    features = features.reindex(df.index, method="ffill")
+
+    # Peers mit zu wenig gemeinsamen Handelstagen würden beim dropna() fast alle Zeilen kosten
+    coverage = features.notna().mean()
+    for peer in [c[len("Corr_") :] for c in features.columns if c.startswith("Corr_")]:
+        if coverage[f"Corr_{peer}"] < 0.5:
+            print(f"⚠️ Zu wenig gemeinsame Handelstage mit {peer}, kein Feature.")
+            features = features.drop(columns=[f"Beta_{peer}", f"Corr_{peer}"])
+    return df.join(features)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Rollierende Korrelationen & Betas über ein Ticker-Panel"
+    )
+    parser.add_argument("tickers", nargs="+", help="Erster Ticker = Ziel für die Betas")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW)
+    parser.add_argument("--interval", default="1d", choices=["1d", "1h"])
+    parser.add_argument("--float32", action="store_true")
+    parser.add_argument("--no-sync", action="store_true", help="Nur den lokalen PriceStore nutzen")
+    parser.add_argument("--out", help="Korrelationsmatrix zusätzlich als CSV speichern")
+    args = parser.parse_args(argv)
+
+    tickers = [t.upper() for t in args.tickers]
+    dtype = np.float32 if args.float32 else np.float64
+    closes = load_close_panel(tickers, args.interval, sync=not args.no_sync)
+    if tickers[0] not in closes:
+        print(f"❌ Keine Kurse für {tickers[0]}.")
+        return
+    returns = return_panel(closes, dtype)
+
+    (timestamp, (_, corr)), = rolling_matrices(returns, args.window, dtype=dtype).items()
+    print(f"🔗 Korrelation über {args.window} Bars bis {timestamp} ({len(returns.columns)} Ticker):")
+    print(corr.round(2).to_string())
+
+    latest = rolling_beta_corr(returns, tickers[0], args.window, dtype).iloc[-1]
+    print(f"\n📐 {tickers[0]} gegen Peers:")
+    for peer in returns.columns.drop(tickers[0]):
+        print(f"   {peer:8s} Beta {latest[f'Beta_{peer}']:6.2f}   Korrelation {latest[f'Corr_{peer}']:6.2f}")
+
+    if args.out:
+        corr.to_csv(args.out)
+        print(f"💾 Gespeichert unter: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,10 @@ import os
 
 import yfinance as yf
 
+from src.instrumentation import instrumented
 
+
+@instrumented("load")
 def load_stock_data(ticker_symbol, period="5y", interval="1d"):
     """
     Lädt historische Aktiendaten von Yahoo Finance.
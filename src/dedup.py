@@ -0,0 +1,205 @@
+import re
+import zlib
+from collections import defaultdict, deque
+
+import numpy as np
+import pandas as pd
+
+# Mersenne-Primzahl für die Hash-Permutationen (a * x + b) mod P; a * x passt in uint64
+_PRIME = np.uint64((1 << 31) - 1)
+
+
+def normalize_title(text):
+    """Kleinschreibung, nur Buchstaben/Ziffern. Der '@user: ' Prefix von Stocktwits fällt weg."""
+    text = re.sub(r"^@\w+:\s*", "", str(text))
+    text = re.sub(r"[^0-9a-zäöüß]+", " ", text.lower())
+    return " ".join(text.split())
+
+
+class MinHasher:
+    """
+    Erzeugt MinHash-Signaturen aus Zeichen-Shingles.
+    Zwei Signaturen stimmen an einer Position mit der Wahrscheinlichkeit der Jaccard-Ähnlichkeit überein.
+    """
+
+    def __init__(self, num_perm=64, shingle_size=5, seed=42):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text):
+        text = normalize_title(text)
+        k = self.shingle_size
+        if len(text) <= k:
+            return {text}
+        return {text[i : i + k] for i in range(len(text) - k + 1)}
+
+    def signature(self, text):
+        # crc32 ist stabil über Prozesse hinweg (im Gegensatz zu hash())
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in self.shingles(text)),
+            dtype=np.uint64,
+        )
+        hashes %= _PRIME
+        # Alle Permutationen auf einmal: (num_perm, n_shingles) -> Minimum je Zeile
+        permuted = (self.a[:, None] * hashes[None, :] + self.b[:, None]) % _PRIME
+        return permuted.min(axis=1)
+
+
+class NearDuplicateIndex:
+    """
+    LSH-Index (Banding) über MinHash-Signaturen.
+    Neue Items werden nur mit Kandidaten aus denselben Buckets verglichen statt mit allen.
+    Es werden maximal `capacity` der jüngsten Items vorgehalten.
+    """
+
+    def __init__(self, num_perm=64, bands=16, threshold=0.6, capacity=5000):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm muss durch bands teilbar sein.")
+
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.capacity = capacity
+
+        self._buckets = defaultdict(set)
+        self._signatures = {}
+        self._order = deque()
+        # Key einer gemerkten Kopie -> Key des gespeicherten Items
+        self._originals = {}
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def __contains__(self, key):
+        return key in self._signatures
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            chunk = signature[band * self.rows : (band + 1) * self.rows]
+            yield band, chunk.tobytes()
+
+    def query(self, signature):
+        """
+        Gibt die Key des ähnlichsten bekannten Items zurück (oder None).
+        Für eine gemerkte Kopie ist das die Key ihres Originals.
+        """
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+
+        best_key, best_score = None, self.threshold
+        for candidate in candidates:
+            score = np.mean(self._signatures[candidate] == signature)
+            if score >= best_score:
+                best_key, best_score = candidate, score
+        return self._originals.get(best_key, best_key)
+
+    def add(self, key, signature):
+        if key in self._signatures:
+            return
+        self._signatures[key] = signature
+        self._order.append(key)
+        for band_key in self._band_keys(signature):
+            self._buckets[band_key].add(key)
+
+        # Älteste Items verdrängen
+        while len(self._order) > self.capacity:
+            self._remove(self._order.popleft())
+
+    def _remove(self, key):
+        signature = self._signatures.pop(key)
+        self._originals.pop(key, None)
+        for band_key in self._band_keys(signature):
+            bucket = self._buckets[band_key]
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[band_key]
+
+    def find_or_add(self, key, text):
+        """Liefert die Key eines Near-Duplicates oder nimmt den Text neu in den Index auf (None)."""
+        signature = self.hasher.signature(text)
+        match = self.query(signature)
+        if match is None:
+            self.add(key, signature)
+        return match
+
+    def remember(self, texts, original=None):
+        """
+        Nimmt Texte (Key = Text) auf, z.B. erst nachdem sie erfolgreich gespeichert wurden.
+        So unterdrückt ein fehlgeschlagener Lauf ihre Reposts nicht für immer.
+        Mit `original` sind die Texte Kopien dieses Items: query() verweist dann auf das Original.
+        """
+        for text in texts:
+            text = str(text)
+            if text not in self._signatures:
+                self.add(text, self.hasher.signature(text))
+                if original is not None:
+                    self._originals[text] = original
+
+
+def collapse_near_duplicates(news_df, index=None, threshold=0.6, reposts=None):
+    """
+    Fasst fast gleiche Titel (Reposts, Syndication, Copy-Paste) zu Clustern zusammen.
+    Pro Cluster bleibt das erste Item stehen, `Cluster_Size` zählt die Mitglieder.
+    Cluster, deren erstes Item einem schon im `index` bekannten Item entspricht, fallen weg.
+    Items, deren Titel der `index` noch nicht kennt, sind neue Kopien davon und landen in
+    `reposts`, damit sie beim gespeicherten Item mitzählen. Ein bekannter Titel ist nur
+    das Item (oder eine schon gezählte Kopie), das erneut im Feed auftaucht.
+    Der `index` wird nur gelesen; neue Items kommen per index.remember() erst hinein,
+    wenn sie gespeichert sind (siehe collector.collect_ticker).
+
+    Args:
+        news_df (pd.DataFrame): DataFrame mit einer 'Title' Spalte.
+        index (NearDuplicateIndex, optional): Index über frühere Läufe (z.B. im Collector).
+        threshold (float): Geschätzte Jaccard-Ähnlichkeit ab der zwei Titel als gleich gelten.
+        reposts (dict, optional): Wird ergänzt um Titel des bekannten Items -> Liste der
+            Titel neuer Kopien (siehe NewsStore.add_reposts).
+    """
+    if news_df is None or news_df.empty:
+        return news_df
+
+    # Cluster innerhalb dieses DataFrames; gleiche Hash-Parameter wie der äußere Index
+    if index is None:
+        batch = NearDuplicateIndex(threshold=threshold, capacity=max(len(news_df), 1))
+    else:
+        batch = NearDuplicateIndex(
+            num_perm=index.hasher.num_perm,
+            bands=index.bands,
+            threshold=index.threshold,
+            capacity=max(len(news_df), 1),
+        )
+
+    titles = news_df["Title"].astype(str)
+    cluster_of = []
+    known = []
+    for title in titles:
+        signature = batch.hasher.signature(title)
+        # Schon aus früheren Läufen bekannt -> Key (= Titel) des gespeicherten Items
+        known.append(index.query(signature) if index is not None else None)
+        match = batch.query(signature)
+        if match is None:
+            batch.add(title, signature)
+        cluster_of.append(title if match is None else match)
+
+    cluster_of = pd.Series(cluster_of, index=news_df.index)
+    sizes = cluster_of.value_counts()
+
+    # Repräsentant = Item, das in diesem Lauf einen neuen Cluster eröffnet hat
+    is_representative = (cluster_of == titles) & ~cluster_of.duplicated()
+    known = pd.Series(known, index=news_df.index, dtype=object)
+    is_known = known.notna()
+    if reposts is not None:
+        # Nur Kopien aus Clustern, die wegfallen; sonst zählen sie schon im neuen Cluster mit
+        dropped = set(cluster_of[is_representative & is_known])
+        is_new = pd.Series([title not in index for title in titles], index=news_df.index)
+        counted = is_known & cluster_of.isin(dropped) & is_new
+        for title, original in zip(titles[counted], known[counted]):
+            reposts.setdefault(original, []).append(title)
+    is_representative &= ~is_known
+    result = news_df[is_representative].copy()
+    result["Cluster_Size"] = cluster_of[is_representative].map(sizes).astype("int64")
+    return result
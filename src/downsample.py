@@ -0,0 +1,153 @@
+"""
+Downsampling für die Charts: Kerzen werden zu gröberen OHLC-Bars zusammengefasst,
+Linien mit LTTB (Largest-Triangle-Three-Buckets) ausgedünnt.
+Pro Chart gehen so höchstens `budget` Punkte an den Browser, egal wie lang die Historie ist.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BUDGET = 2000
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: Wählt `threshold` Punkte, die die Form der Kurve erhalten.
+
+    Args:
+        x, y (np.ndarray): Gleich lange, nach x sortierte Arrays (x numerisch).
+        threshold (int): Anzahl der Punkte im Ergebnis.
+
+    Returns:
+        np.ndarray: Die Positionen der gewählten Punkte (inkl. erstem und letztem).
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # threshold-2 Buckets zwischen dem ersten und dem letzten Punkt
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    # Schwerpunkte aller Buckets vorab (vektorisiert); der letzte "Bucket" ist der letzte Punkt
+    bounds = np.append(edges, n)
+    sizes = np.diff(bounds)
+    avg_x = np.add.reduceat(x, bounds[:-1]) / sizes
+    avg_y = np.add.reduceat(y, bounds[:-1]) / sizes
+
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Dreiecksfläche zwischen dem zuletzt gewählten Punkt, jedem Kandidaten
+        # und dem Schwerpunkt des nächsten Buckets
+        area = np.abs(
+            (x[a] - avg_x[i + 1]) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (avg_y[i + 1] - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def lttb_series(series, threshold):
+    """LTTB für eine pd.Series mit DatetimeIndex (NaN-Werte werden übersprungen)."""
+    series = series.dropna()
+    if len(series) <= threshold:
+        return series
+    x = series.index.to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(np.float64)
+    positions = lttb(x, series.to_numpy(dtype=np.float64), threshold)
+    return series.iloc[positions]
+
+
+def aggregate_ohlc(df, factor):
+    """
+    Fasst je `factor` aufeinanderfolgende Bars zu einer zusammen
+    (Open: erstes, High: Max, Low: Min, Close: letztes, Volume: Summe).
+    Der Zeitstempel ist der Beginn des Blocks.
+    """
+    n = len(df)
+    if factor <= 1 or n == 0:
+        return df[["Open", "High", "Low", "Close", "Volume"]]
+
+    starts = np.arange(0, n, factor)
+    ends = np.minimum(starts + factor, n) - 1
+    return pd.DataFrame(
+        {
+            "Open": df["Open"].to_numpy()[starts],
+            "High": np.maximum.reduceat(df["High"].to_numpy(), starts),
+            "Low": np.minimum.reduceat(df["Low"].to_numpy(), starts),
+            "Close": df["Close"].to_numpy()[ends],
+            "Volume": np.add.reduceat(df["Volume"].to_numpy(dtype=np.float64), starts),
+        },
+        index=df.index[starts],
+    )
+
+
+class ChartResolutions:
+    """
+    Vorberechnete Auflösungsstufen eines Kurs-DataFrames (Faktor `factor` pro Stufe).
+    Für einen Zoom-Bereich wird die feinste Stufe gewählt, die noch ins Punkt-Budget passt,
+    und nur dieser Ausschnitt ausgeliefert.
+    """
+
+    def __init__(self, df, budget=DEFAULT_BUDGET, factor=4):
+        self.df = df
+        self.budget = budget
+        self.factor = factor
+        self._index = df.index.to_numpy(dtype="datetime64[ns]")
+
+        # Kerzen-Pyramide: jede Stufe entsteht aus der vorherigen (nicht aus den Rohdaten)
+        self._candles = []
+        if {"Open", "High", "Low", "Close", "Volume"}.issubset(df.columns):
+            level = aggregate_ohlc(df, 1)
+            self._candles.append(level)
+            while len(level) > budget:
+                level = aggregate_ohlc(level, factor)
+                self._candles.append(level)
+
+        # LTTB-Linien werden erst beim ersten Abruf pro (Spalte, Stufe) berechnet
+        self._lines = {}
+
+    def level_for(self, start=None, end=None):
+        """Die feinste Stufe, bei der der Bereich [start, end] höchstens `budget` Punkte hat."""
+        lo = 0 if start is None else np.searchsorted(self._index, np.datetime64(start, "ns"))
+        hi = (
+            len(self._index)
+            if end is None
+            else np.searchsorted(self._index, np.datetime64(end, "ns"), side="right")
+        )
+        visible = max(hi - lo, 1)
+        if visible <= self.budget:
+            return 0
+        return math.ceil(math.log(visible / self.budget, self.factor))
+
+    def candles(self, start=None, end=None):
+        """OHLCV im Bereich [start, end], höchstens ~budget Bars."""
+        level = min(self.level_for(start, end), len(self._candles) - 1)
+        return self._candles[level].loc[start:end]
+
+    def line(self, column, start=None, end=None):
+        """Eine Spalte im Bereich [start, end], per LTTB auf höchstens ~budget Punkte ausgedünnt."""
+        level = self.level_for(start, end)
+        series = self.df[column]
+        if level == 0:
+            return series.loc[start:end]
+
+        target = math.ceil(len(series) / self.factor**level)
+        if target > self.budget * self.factor**2:
+            # Tiefer Zoom in eine lange Historie: die ganze Stufe wäre zu groß zum Vorberechnen,
+            # also nur den sichtbaren Ausschnitt ausdünnen
+            return lttb_series(series.loc[start:end], self.budget)
+
+        key = (column, level)
+        if key not in self._lines:
+            self._lines[key] = lttb_series(series, target)
+
+        visible = self._lines[key].loc[start:end]
+        # LTTB verteilt Punkte ungleichmäßig, der Ausschnitt kann das Budget leicht überschreiten
+        if len(visible) > self.budget:
+            visible = lttb_series(visible, self.budget)
+        return visible
@@ -1,70 +1,302 @@
+import functools
+
 import numpy as np
 import pandas as pd
 import scipy.fftpack
+from numpy.lib.stride_tricks import sliding_window_view
 from statsmodels.tsa.seasonal import seasonal_decompose
 
+from src import low_memory
+from src.instrumentation import instrumented
+
+
+# Spalten, die add_indicators() anhängt (in dieser Reihenfolge)
+INDICATOR_COLUMNS = [
+    "SMA_20",
+    "SMA_50",
+    "RSI",
+    "Bollinger_Upper",
+    "Bollinger_Lower",
+    "Daily_Return",
+    "MACD",
+    "MACD_Signal",
+    "MACD_Hist",
+    "ATR",
+    "OBV",
+]
+
+# Längstes gleitendes Fenster (SMA_50): so viele Werte braucht ein Block vom vorherigen
+MAX_WINDOW = 50
+
+
+def rolling_mean(values, window, start=0):
+    """
+    Gleitender Mittelwert wie rolling(window).mean() (NaN, bis das Fenster voll ist).
+
+    Die Reihe wird an festen (absoluten) Positionen in Blöcke der Länge `window` geteilt,
+    jedes Fenster ist Suffix-Summe eines Blocks + Präfix-Summe des nächsten. Ein Ergebnis
+    hängt damit nur von den Werten im Fenster ab und nicht davon, ab wo gerechnet wird:
+    Blockweise (src/chunked.py) kommt bitgenau dasselbe heraus wie über die ganze Reihe.
+
+    Args:
+        start (int): Absolute Position von values[0] in der ganzen Reihe.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    out = np.full(n, np.nan)
+    if n < window:
+        return out
+
+    lead = start % window
+    blocks = np.zeros((-(-(lead + n) // window), window))
+    blocks.ravel()[lead : lead + n] = values
+    prefix = np.cumsum(blocks, axis=1).ravel()
+    suffix = np.cumsum(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    end = np.arange(lead + window - 1, lead + n)
+    left = end - window + 1
+    sums = np.where(left % window == 0, prefix[end], suffix[left] + prefix[end])
+    out[window - 1 :] = sums / window
+    return out
+
+
+def rolling_std(values, window, mean=None, rows=2**15):
+    """
+    Gleitende Standardabweichung (ddof=1), pro Fenster in zwei Durchgängen.
+    Genauer als die laufende Varianz von pandas und ebenso unabhängig vom Startpunkt.
+
+    Args:
+        mean (np.ndarray, optional): rolling_mean() derselben Werte, falls schon berechnet.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    out = np.full(n, np.nan)
+    if n < window:
+        return out
+
+    if mean is None:
+        mean = rolling_mean(values, window)
+    mean = mean[window - 1 :]
+    windows = sliding_window_view(values, window)
+    # In Stücken, damit die Abweichungen (Zeilen x Fenster) klein bleiben
+    for a in range(0, len(windows), rows):
+        dev = windows[a : a + rows] - mean[a : a + rows, None]
+        squares = np.einsum("ij,ij->i", dev, dev)
+        out[window - 1 + a : window - 1 + a + len(dev)] = np.sqrt(squares / (window - 1))
+    return out
+
+
+@functools.lru_cache
+def _ewm_seed_length(com):
+    """Schritte, bis das interne EWM-Gewicht (adjust=True) in float64 seinen Fixpunkt erreicht."""
+    factor = 1.0 - 1.0 / (1.0 + com)
+    weight, steps = 1.0, 1
+    while weight * factor + 1.0 != weight:
+        weight = weight * factor + 1.0
+        steps += 1
+    return steps
+
+
+def _ewm_mean(series, carry, key, **kwargs):
+    """
+    series.ewm(**kwargs).mean(), fortgesetzt ab dem Zustand des vorherigen Blocks (carry[key]).
+
+    Als Startwert reicht bei adjust=False der letzte Mittelwert. Bei adjust=True wird er so oft
+    wiederholt, bis das interne Gewicht seinen Fixpunkt erreicht hat (gleiche Werte ändern den
+    Mittelwert in pandas nicht). Beides ergibt exakt die Werte wie über die ganze Reihe.
+    """
+    if carry is None:
+        return series.ewm(**kwargs).mean()
+
+    seed = carry.get(key)
+    if seed is None:
+        result = series.ewm(**kwargs).mean()
+    else:
+        values = np.concatenate([seed, series.to_numpy(dtype=np.float64)])
+        mean = pd.Series(values).ewm(**kwargs).mean().to_numpy()
+        result = pd.Series(mean[len(seed) :], index=series.index)
+
+    last = result.iloc[-1]
+    if not np.isnan(last):
+        length = _ewm_seed_length(kwargs["com"]) if kwargs.get("adjust", True) else 1
+        carry[key] = np.full(length, last)
+    return result
+
+
+def _cumsum(series, carry, key):
+    """Kumulierte Summe ab dem Stand des vorherigen Blocks (np.cumsum rechnet streng der Reihe nach)."""
+    if carry is None or key not in carry:
+        result = series.cumsum()
+    else:
+        values = np.concatenate([[carry[key]], series.to_numpy(dtype=np.float64)])
+        result = pd.Series(np.cumsum(values)[1:], index=series.index)
+    if carry is not None:
+        carry[key] = result.iloc[-1]
+    return result
+
+
+def _with_tail(values, carry, key):
+    """Hängt die letzten Werte des vorherigen Blocks vorne an (für Fenster über die Blockgrenze)."""
+    tail = carry.get(key) if carry is not None else None
+    if tail is None or len(tail) == 0:
+        return values, 0
+    return np.concatenate([tail, values]), len(tail)
+
 
 def calculate_rsi(data, window=14):
     """Berechnet den RSI (Relative Strength Index)."""
-    delta = data.diff()
+    return _rsi(data.diff(), window)
+
+
+def _rsi(delta, window, carry=None):
     up = delta.clip(lower=0)
     down = -1 * delta.clip(upper=0)
-    ma_up = up.ewm(com=window - 1, adjust=True, min_periods=window).mean()
-    ma_down = down.ewm(com=window - 1, adjust=True, min_periods=window).mean()
+    ma_up = _ewm_mean(up, carry, "rsi_up", com=window - 1, adjust=True, min_periods=window)
+    ma_down = _ewm_mean(
+        down, carry, "rsi_down", com=window - 1, adjust=True, min_periods=window
+    )
     rs = ma_up / ma_down
     rsi = 100 - (100 / (1 + rs))
     return rsi
 
 
-def add_indicators(df):
-    """Fügt SMA, Bollinger, RSI, MACD, ATR und OBV hinzu."""
-    if df is None or df.empty:
-        return None
+def indicator_columns(df, carry=None):
+    """
+    Liefert die Indikatoren nacheinander als (Name, Series); gerechnet wird in float64.
 
-    df = df.copy()
+    Args:
+        carry (dict, optional): Zustand am Ende des vorherigen Blocks (Fensterränder,
+            EWM-Startwerte, OBV-Stand, Position). Wird für den nächsten Block fortgeschrieben,
+            damit blockweise exakt dasselbe herauskommt (src/chunked.py).
+    """
+    close = df["Close"].astype(np.float64, copy=False)
+    start = carry.get("start", 0) if carry is not None else 0
+    previous = close.shift()
+    if carry is not None and "close" in carry:
+        previous.iloc[0] = carry["close"]
 
     # --- Bestehende Indikatoren ---
-    df["SMA_20"] = df["Close"].rolling(window=20).mean()
-    df["SMA_50"] = df["Close"].rolling(window=50).mean()
-    df["RSI"] = calculate_rsi(df["Close"])
+    close_ext, skip = _with_tail(close.to_numpy(), carry, "close_tail")
+    sma20 = rolling_mean(close_ext, 20, start - skip)
+    yield "SMA_20", pd.Series(sma20[skip:], index=close.index)
+    yield "SMA_50", pd.Series(rolling_mean(close_ext, 50, start - skip)[skip:], index=close.index)
+    yield "RSI", _rsi(close - previous, 14, carry)
 
-    std_dev = df["Close"].rolling(window=20).std()
-    df["Bollinger_Upper"] = df["SMA_20"] + (2 * std_dev)
-    df["Bollinger_Lower"] = df["SMA_20"] - (2 * std_dev)
+    std_dev = rolling_std(close_ext, 20, mean=sma20)[skip:]
+    yield "Bollinger_Upper", pd.Series(sma20[skip:] + (2 * std_dev), index=close.index)
+    yield "Bollinger_Lower", pd.Series(sma20[skip:] - (2 * std_dev), index=close.index)
 
-    df["Daily_Return"] = df["Close"].pct_change()
+    yield "Daily_Return", close / previous - 1
 
     # --- NEU: MACD (Trend) ---
     # EMA 12 (schnell) - EMA 26 (langsam)
-    ema12 = df["Close"].ewm(span=12, adjust=False).mean()
-    ema26 = df["Close"].ewm(span=26, adjust=False).mean()
-    df["MACD"] = ema12 - ema26
+    ema12 = _ewm_mean(close, carry, "ema12", span=12, adjust=False)
+    ema26 = _ewm_mean(close, carry, "ema26", span=26, adjust=False)
+    macd = ema12 - ema26
+    yield "MACD", macd
     # Signal Linie (9-Tage EMA des MACD)
-    df["MACD_Signal"] = df["MACD"].ewm(span=9, adjust=False).mean()
+    signal = _ewm_mean(macd, carry, "macd_signal", span=9, adjust=False)
+    yield "MACD_Signal", signal
     # Histogramm (Differenz)
-    df["MACD_Hist"] = df["MACD"] - df["MACD_Signal"]
+    yield "MACD_Hist", macd - signal
 
     # --- NEU: ATR (Volatilität) ---
     # True Range ist das Maximum aus 3 Werten
-    high_low = df["High"] - df["Low"]
-    high_close = np.abs(df["High"] - df["Close"].shift())
-    low_close = np.abs(df["Low"] - df["Close"].shift())
+    high = df["High"].astype(np.float64, copy=False)
+    low = df["Low"].astype(np.float64, copy=False)
+    high_low = high - low
+    high_close = np.abs(high - previous)
+    low_close = np.abs(low - previous)
 
     ranges = pd.concat([high_low, high_close, low_close], axis=1)
     true_range = np.max(ranges, axis=1)
     # ATR ist der gleitende Durchschnitt der True Range
-    df["ATR"] = true_range.rolling(window=14).mean()
+    range_ext, range_skip = _with_tail(true_range.to_numpy(), carry, "range_tail")
+    atr = rolling_mean(range_ext, 14, start - range_skip)[range_skip:]
+    yield "ATR", pd.Series(atr, index=close.index)
 
     # --- NEU: OBV (Volumen-Fluss) ---
     # Wenn Close > Vorheriges Close: Addiere Volumen
     # Wenn Close < Vorheriges Close: Subtrahiere Volumen
-    df["OBV"] = (np.sign(df["Close"].diff()) * df["Volume"]).fillna(0).cumsum()
+    flow = (np.sign(close - previous) * df["Volume"]).fillna(0)
+    yield "OBV", _cumsum(flow, carry, "obv")
+
+    if carry is not None:
+        carry["start"] = start + len(close)
+        carry["close"] = close.iloc[-1]
+        carry["close_tail"] = close_ext[-(MAX_WINDOW - 1) :].copy()
+        carry["range_tail"] = range_ext[-13:].copy()
+
+
+@instrumented("indicators")
+def add_indicators(df):
+    """Fügt SMA, Bollinger, RSI, MACD, ATR und OBV hinzu."""
+    if df is None or df.empty:
+        return None
+
+    if low_memory.is_enabled():
+        return _add_indicators_compact(df)
+
+    df = df.copy()
+    for name, values in indicator_columns(df):
+        df[name] = values
 
     # Bereinigen
     df.dropna(inplace=True)
     return df
 
 
+def _add_indicators_compact(df):
+    """
+    Sparmodus: Alle Spalten landen direkt in einem vorab angelegten Block pro Datentyp
+    (float32 für Kurse & Indikatoren). Statt df.copy() + dropna() entsteht das Ergebnis
+    als View auf diesen Block, solange die gültigen Zeilen zusammenhängen (Anlaufphase vorne).
+    """
+    names = list(df.columns) + INDICATOR_COLUMNS
+    dtypes = {
+        name: low_memory.storage_dtype(name, df[name].dtype if name in df else np.float64)
+        for name in names
+    }
+    groups = {}
+    for name in names:
+        groups.setdefault(dtypes[name], []).append(name)
+
+    n = len(df)
+    low_memory.check_budget("indicators", sum(dt.itemsize * len(g) * n for dt, g in groups.items()))
+    # Ein Block pro Datentyp (Spalten x Zeilen), damit jede Spalte zusammenhängend ist
+    blocks = {dt: np.empty((len(g), n), dtype=dt) for dt, g in groups.items()}
+    slots = {name: (dt, g.index(name)) for dt, g in groups.items() for name in g}
+
+    def put(name, values):
+        dt, row = slots[name]
+        blocks[dt][row] = values
+
+    for name in df.columns:
+        put(name, df[name].to_numpy())
+    for name, values in indicator_columns(df):
+        put(name, values.to_numpy())
+
+    # dropna(): gültig sind Zeilen ohne NaN in irgendeiner Spalte
+    valid = np.ones(n, dtype=bool)
+    for dt, block in blocks.items():
+        if dt.kind == "f":
+            valid &= ~np.isnan(block).any(axis=0)
+    bounds = low_memory.valid_range(valid)
+    rows = slice(*bounds) if bounds is not None else valid
+
+    frames = [
+        pd.DataFrame(block[:, rows].T, index=df.index[rows], columns=groups[dt], copy=False)
+        for dt, block in blocks.items()
+    ]
+    # Übrige Blöcke in der ursprünglichen Spaltenreihenfolge einhängen (ohne Reindex-Kopie)
+    result, others = frames[0], {name: f[name] for f in frames[1:] for name in f.columns}
+    for position, name in enumerate(names):
+        if name in others:
+            result.insert(position, name, others[name], allow_duplicates=False)
+    return result
+
+
+@instrumented("decomposition")
 def calculate_seasonal_decomposition(df, period=252):
     """
     Zerlegt den Chart in Trend, Saisonalität und Rauschen (Residuals).
@@ -82,6 +314,7 @@ def calculate_seasonal_decomposition(df, period=252):
     return {"trend": result.trend, "seasonal": result.seasonal, "resid": result.resid}
 
 
+@instrumented("fft")
 def calculate_fourier_transform(df):
     """
     Identifiziert zyklische Muster mittels Fast Fourier Transform (FFT).
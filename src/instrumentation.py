@@ -0,0 +1,310 @@
+"""
+Instrumentierung der Pipeline: Spans messen Wall-Zeit, CPU-Zeit, verarbeitete Zeilen,
+Speicher-Peak (optional, tracemalloc) und Cache-Treffer. Jeder Span wird als JSON-Zeile
+geloggt und kann für das Performance-Panel im Dashboard gesammelt werden.
+
+Ausgeschaltet (Standard) kostet ein instrumentierter Aufruf nur eine if-Abfrage.
+
+enable() gilt prozessweit (Start-Einstellung), enable_session() nur für den aktuellen Kontext,
+z.B. einen Streamlit-Run; so schaltet eine Session die Messung nicht für alle anderen um.
+
+Speicher-Peaks kommen aus tracemalloc, das nur einen Peak pro Prozess kennt. Gemessen wird daher
+immer nur in einem Thread zur Zeit: Spans in anderen Threads (z.B. im Thread-Pool des Agenten-Rats
+oder in einer zweiten Session) laufen solange ohne Peak (und ohne Budget). Der Peak eines Spans
+enthält dabei auch Allokationen, die andere Threads parallel machen.
+
+Einschalten:
+    STOCK_PERF=1 STOCK_PERF_LOG=data/perf.jsonl STOCK_PERF_MEMORY=1 uv run streamlit run app.py
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+logger = logging.getLogger("perf")
+
+# (an, Speicher, Budget): prozessweit und optional pro Kontext überschrieben (enable_session)
+_default = (False, False, None)
+
+# Offene Spans (für Verschachtelung) und der aktuelle Sammler; über contextvars pro Thread/Kontext
+_stack = contextvars.ContextVar("perf_stack", default=())
+_collector = contextvars.ContextVar("perf_collector", default=None)
+_session = contextvars.ContextVar("perf_session", default=None)
+
+# Thread, der gerade Speicher-Peaks misst (tracemalloc.reset_peak() wirkt prozessweit)
+_memory_lock = threading.Lock()
+_memory_owner = None
+
+
+class MemoryBudgetExceeded(MemoryError):
+    """Eine Stufe hat mehr Speicher belegt als das eingestellte Budget."""
+
+
+def _settings():
+    return _session.get() or _default
+
+
+def _settings_for(on, memory, memory_budget):
+    memory = on and memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return on, memory, memory_budget if memory else None
+
+
+def enable(on=True, memory=False, log_path=None, memory_budget=None):
+    """
+    Schaltet die Messung an oder aus.
+
+    Args:
+        memory (bool): Speicher-Peaks per tracemalloc messen (merklich langsamer).
+        log_path (str, optional): JSON-Zeilen zusätzlich in diese Datei schreiben.
+        memory_budget (int, optional): Bytes; ein Span mit höherem Peak bricht mit
+            MemoryBudgetExceeded ab (nur zusammen mit memory=True).
+    """
+    global _default
+    _default = _settings_for(on, memory, memory_budget)
+    if not _default[1] and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+    if log_path:
+        os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+        path = os.path.abspath(log_path)
+        if not any(getattr(h, "baseFilename", None) == path for h in logger.handlers):
+            handler = logging.FileHandler(log_path, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+
+def enable_session(on=True, memory=False, memory_budget=None):
+    """
+    Wie enable(), aber nur für den aktuellen Kontext (und Threads, die ihn kopieren).
+    tracemalloc wird bei Bedarf gestartet, aber nie für andere Sessions gestoppt.
+    """
+    _session.set(_settings_for(on, memory, memory_budget))
+
+
+def is_enabled():
+    return _settings()[0]
+
+
+def memory_enabled():
+    return _settings()[1]
+
+
+def memory_budget():
+    return _settings()[2]
+
+
+def _claim_memory():
+    """
+    Darf dieser Thread Speicher messen? "owner" für den äußersten Span, der die Messung
+    übernimmt, "nested" für Spans darin, None solange ein anderer Thread misst.
+    """
+    global _memory_owner
+    thread = threading.get_ident()
+    if _memory_owner == thread:
+        return "nested"
+    if _memory_lock.acquire(blocking=False):
+        _memory_owner = thread
+        return "owner"
+    return None
+
+
+def _release_memory():
+    global _memory_owner
+    _memory_owner = None
+    _memory_lock.release()
+
+
+class Span:
+    """Ein gemessener Abschnitt. `cached=True`: zählt als Miss, sobald darin gerechnet wird."""
+
+    def __init__(self, name, cached=False, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.rows = None
+        self.cached = cached
+        self.cache = "hit" if cached else None
+        self.peak = 0
+        self._memory = None
+        self._budget = None
+
+    def set(self, rows=None, **attrs):
+        if rows is not None:
+            self.rows = rows
+        self.attrs.update(attrs)
+
+    def miss(self):
+        if self.cached:
+            self.cache = "miss"
+
+    def __enter__(self):
+        stack = _stack.get()
+        self.parent = stack[-1] if stack else None
+        if self.parent is not None:
+            # Ein Kind-Span im gecachten Aufruf heißt: Der Cache hat nicht gegriffen
+            self.parent.miss()
+        self.depth = len(stack)
+        self._token = _stack.set(stack + (self,))
+
+        _, memory, self._budget = _settings()
+        self._memory = _claim_memory() if memory else None
+        if self._memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.parent is not None:
+                self.parent.peak = max(self.parent.peak, peak)
+            self._memory_start = current
+            tracemalloc.reset_peak()
+
+        self._ts = time.time()
+        self._start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wall_ms = (time.perf_counter() - self._start) * 1000
+        cpu = time.thread_time() - self._cpu_start
+        _stack.reset(self._token)
+
+        record = {
+            "span": self.name,
+            "parent": self.parent.name if self.parent is not None else None,
+            "depth": self.depth,
+            "wall_ms": self.wall_ms,
+            "cpu_ms": cpu * 1000,
+            "rows": self.rows,
+            "cache": self.cache,
+            "thread": threading.current_thread().name,
+            "ts": self._ts,
+            **self.attrs,
+        }
+        over_budget = None
+        if self._memory:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            if self._memory == "owner":
+                _release_memory()
+            peak = max(self.peak - self._memory_start, 0)
+            record["peak_kb"] = peak / 1024
+            if self.parent is not None:
+                self.parent.peak = max(self.parent.peak, self.peak)
+            if self._budget is not None and peak > self._budget and exc_type is None:
+                over_budget = peak
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        elif over_budget is not None:
+            record["error"] = MemoryBudgetExceeded.__name__
+
+        collector = _collector.get()
+        if collector is not None:
+            collector.append(record)
+        if logger.handlers:
+            logger.info(json.dumps(record, default=str))
+        if over_budget is not None:
+            raise MemoryBudgetExceeded(
+                f"{self.name}: Speicher-Peak {over_budget / 2**20:.1f} MB "
+                f"> Budget {self._budget / 2**20:.1f} MB"
+            )
+        return False
+
+
+class _NoopSpan:
+    """Platzhalter, wenn die Messung aus ist."""
+
+    wall_ms = None
+
+    def set(self, rows=None, **attrs):
+        pass
+
+    def miss(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name, cached=False, **attrs):
+    """with span("train") as s: ...; s.set(rows=len(df))"""
+    if not _settings()[0]:
+        return _NOOP
+    return Span(name, cached=cached, **attrs)
+
+
+def cache_miss():
+    """Im Körper einer gecachten Funktion aufrufen: Der umgebende gecachte Span wird zum Miss."""
+    if _settings()[0]:
+        stack = _stack.get()
+        if stack:
+            stack[-1].miss()
+
+
+def _count_rows(result, args):
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return len(result)
+    for arg in args:
+        if isinstance(arg, (pd.DataFrame, pd.Series)):
+            return len(arg)
+    return None
+
+
+def instrumented(name, cached=False):
+    """Decorator: misst jeden Aufruf als Span (Zeilen aus dem Ergebnis oder dem ersten DataFrame)."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _settings()[0]:
+                return func(*args, **kwargs)
+            with Span(name, cached=cached) as s:
+                result = func(*args, **kwargs)
+                s.rows = _count_rows(result, args)
+                return result
+
+        # st.cache_*-Funktionen behalten ihr .clear()
+        if hasattr(func, "clear"):
+            wrapper.clear = func.clear
+        return wrapper
+
+    return decorator
+
+
+def start_collecting():
+    """Sammelt ab jetzt alle Spans dieses Kontexts (z.B. eines Streamlit-Runs) in einer Liste."""
+    records = []
+    _collector.set(records)
+    return records
+
+
+def records_frame(records):
+    """Gesammelte Spans als Tabelle für das Dashboard."""
+    frame = pd.DataFrame(records)
+    if frame.empty:
+        return frame
+    # Spans werden beim Beenden gesammelt, für die Anzeige nach Start sortieren
+    frame = frame.sort_values("ts").reset_index(drop=True)
+    frame["Stage"] = [
+        "\u2003" * depth + name for depth, name in zip(frame["depth"], frame["span"])
+    ]
+    return frame.reindex(
+        columns=["Stage", "wall_ms", "cpu_ms", "rows", "peak_kb", "cache", "thread"]
+    )
+
+
+if os.environ.get("STOCK_PERF") == "1":
+    enable(
+        memory=os.environ.get("STOCK_PERF_MEMORY") == "1",
+        log_path=os.environ.get("STOCK_PERF_LOG"),
+    )
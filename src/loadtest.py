@@ -0,0 +1,80 @@
+"""
+Lasttest für den lokalen JSON-Service (src/service.py).
+
+Start:
+    uv run python -m src.loadtest --url "http://127.0.0.1:8502/verdict?ticker=NVDA" -n 500 -c 20
+"""
+
+import argparse
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def _request(url, timeout):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = None
+    return time.perf_counter() - start, status
+
+
+def run_load_test(urls, requests=200, concurrency=10, timeout=120):
+    """
+    Schickt `requests` Anfragen (reihum über `urls`) mit `concurrency` parallelen Clients.
+    Returns:
+        dict: Latenzen (ms) als p50/p90/p99/max, Durchsatz und Fehleranzahl.
+    """
+    targets = [urls[i % len(urls)] for i in range(requests)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda url: _request(url, timeout), targets))
+    wall = time.perf_counter() - start
+
+    latencies = np.array([r[0] for r in results]) * 1000
+    errors = sum(1 for _, status in results if status != 200)
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": requests / wall,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p90_ms": float(np.percentile(latencies, 90)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lasttest für den JSON-Service")
+    parser.add_argument(
+        "--url",
+        action="append",
+        help="Ziel-URL (mehrfach möglich)",
+    )
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    parser.add_argument("-c", "--concurrency", type=int, default=10)
+    parser.add_argument("--timeout", type=int, default=120)
+    args = parser.parse_args(argv)
+
+    urls = args.url or ["http://127.0.0.1:8502/verdict?ticker=NVDA"]
+    report = run_load_test(urls, args.requests, args.concurrency, args.timeout)
+
+    print(f"📊 {report['requests']} Requests, {report['concurrency']} parallel")
+    print(f"   Durchsatz: {report['throughput_rps']:.1f} req/s")
+    print(f"   p50: {report['p50_ms']:.1f} ms | p90: {report['p90_ms']:.1f} ms")
+    print(f"   p99: {report['p99_ms']:.1f} ms | max: {report['max_ms']:.1f} ms")
+    print(f"   Fehler: {report['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Sparmodus für lange (Intraday-)Historien: Stufen reichen Views statt Kopien weiter,
+Kurs- und Indikatorspalten werden als float32 gehalten und jede Stufe muss in ein
+Speicher-Budget passen (gemessen mit tracemalloc über die Spans aus src/instrumentation.py).
+
+Gerechnet wird weiterhin in float64, nur das Ergebnis wird als float32 abgelegt.
+Der Random Forest rechnet intern ohnehin mit float32, für das Modell geht also nichts verloren.
+
+enable() gilt prozessweit (Start-Einstellung, CLIs), enable_session() nur für den aktuellen
+Kontext (z.B. einen Streamlit-Run). Gecachte Ergebnisse hängen vom Modus ab, Caches brauchen
+ihn deshalb als Schlüssel.
+
+Einschalten:
+    STOCK_LOW_MEMORY=1 STOCK_MEMORY_BUDGET_MB=512 uv run streamlit run app.py
+"""
+
+import contextvars
+import os
+
+import numpy as np
+
+from src import instrumentation
+from src.instrumentation import MemoryBudgetExceeded
+
+# Bleiben float64: Volumen (ganzzahlig, > 2^24) und OBV (kumulierte Summe über die ganze Historie)
+FLOAT64_COLUMNS = {"Volume", "OBV"}
+
+# (an, Budget in Bytes): prozessweit und optional pro Kontext überschrieben (enable_session)
+_default = (False, None)
+_session = contextvars.ContextVar("low_memory_session", default=None)
+
+
+def _settings():
+    return _session.get() or _default
+
+
+def _settings_for(on, budget_mb):
+    return on, int(budget_mb * 2**20) if on and budget_mb else None
+
+
+def enable(on=True, budget_mb=None):
+    """
+    Schaltet den Sparmodus an oder aus.
+
+    Args:
+        budget_mb (float, optional): Höchster Speicher-Peak pro Stufe in MB (None = kein Limit).
+    """
+    global _default
+    _default = _settings_for(on, budget_mb)
+    if on:
+        # Peaks pro Stufe messen; das Budget greift in jedem Span
+        instrumentation.enable(True, memory=True, memory_budget=_default[1])
+
+
+def enable_session(on=True, budget_mb=None):
+    """Wie enable(), aber nur für den aktuellen Kontext (inkl. Speichermessung)."""
+    settings = _settings_for(on, budget_mb)
+    _session.set(settings)
+    if on:
+        instrumentation.enable_session(True, memory=True, memory_budget=settings[1])
+
+
+def is_enabled():
+    return _settings()[0]
+
+
+def budget_bytes():
+    return _settings()[1]
+
+
+def storage_dtype(column, dtype):
+    """Ziel-Datentyp einer Spalte im Sparmodus (nur float64 wird verkleinert)."""
+    if is_enabled() and dtype == np.float64 and column not in FLOAT64_COLUMNS:
+        return np.dtype(np.float32)
+    return np.dtype(dtype)
+
+
+def check_budget(stage, nbytes):
+    """Prüft vor einer großen Allokation, ob sie ins Budget passt (statt erst danach am Peak)."""
+    budget = budget_bytes()
+    if budget is not None and nbytes > budget:
+        raise MemoryBudgetExceeded(
+            f"{stage}: braucht ~{nbytes / 2**20:.1f} MB > Budget {budget / 2**20:.1f} MB"
+        )
+
+
+def valid_range(mask):
+    """
+    (start, stop), wenn die gültigen Zeilen ein zusammenhängender Block sind (sonst None).
+    Dann reicht ein Slice (View) statt einer Kopie per Boolean-Maske.
+    """
+    positions = np.flatnonzero(mask)
+    if len(positions) == 0:
+        return 0, 0
+    start, stop = positions[0], positions[-1] + 1
+    if stop - start == len(positions):
+        return int(start), int(stop)
+    return None
+
+
+if os.environ.get("STOCK_LOW_MEMORY") == "1":
+    budget = os.environ.get("STOCK_MEMORY_BUDGET_MB")
+    enable(budget_mb=float(budget) if budget else None)
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+
+    TEXT_DTYPE = "string[pyarrow]"
+except ImportError:
+    # Ohne pyarrow bleibt es beim (langsameren) Python-String-Typ
+    TEXT_DTYPE = "string[python]"
+
+# Kompaktes Schema für News/Social-Frames:
+# - wenige unterschiedliche Werte -> Categorical (Codes statt Python-Strings)
+# - Freitext -> Arrow-Strings (ein zusammenhängender Puffer statt einzelner Objekte)
+# - Date -> datetime64[ns] (int64 Nanosekunden, per .view("int64") ohne Kopie lesbar)
+CATEGORY_COLUMNS = ["Source", "Type", "Label"]
+TEXT_COLUMNS = ["Title"]
+FLOAT_COLUMNS = ["Sentiment_Score", "Subjectivity"]
+INT_COLUMNS = ["Cluster_Size"]
+
+
+def to_compact(df):
+    """
+    Wandelt einen News-DataFrame in das kompakte Schema um.
+    Unbekannte Spalten bleiben unverändert.
+    """
+    if df is None or df.empty:
+        return df
+
+    dtypes = {}
+    for col in df.columns:
+        if col in CATEGORY_COLUMNS:
+            dtypes[col] = "category"
+        elif col in TEXT_COLUMNS:
+            dtypes[col] = TEXT_DTYPE
+        elif col in FLOAT_COLUMNS:
+            # VADER & TextBlob liefern nur wenige Nachkommastellen -> float32 reicht
+            dtypes[col] = np.float32
+        elif col in INT_COLUMNS:
+            dtypes[col] = np.int32
+
+    df = df.astype(dtypes)
+    if "Date" in df.columns:
+        df["Date"] = pd.to_datetime(df["Date"]).astype("datetime64[ns]")
+    return df
+
+
+def news_frame(columns):
+    """
+    Baut einen kompakten DataFrame direkt aus Spalten-Listen (dict: Spalte -> Liste).
+    Die Quellen sammeln ihre Werte spaltenweise, statt eine Liste von dicts zu bauen.
+    """
+    if not columns or not any(len(values) for values in columns.values()):
+        return pd.DataFrame()
+    return to_compact(pd.DataFrame(columns))
+
+
+def to_legacy(df):
+    """Das bisherige Layout (object-Spalten, float64) – nur als Vergleich für den Report."""
+    legacy = df.copy()
+    for col in CATEGORY_COLUMNS + TEXT_COLUMNS:
+        if col in legacy.columns:
+            legacy[col] = legacy[col].astype(object)
+    for col in FLOAT_COLUMNS:
+        if col in legacy.columns:
+            legacy[col] = legacy[col].astype(np.float64)
+    for col in INT_COLUMNS:
+        if col in legacy.columns:
+            legacy[col] = legacy[col].astype(np.int64)
+    return legacy
+
+
+def memory_report(df):
+    """
+    Vergleicht den Speicherbedarf (inkl. Python-Objekte) pro Spalte:
+    bisheriges Layout vs. kompaktes Schema.
+
+    Returns:
+        pd.DataFrame: Spalten Column, Legacy_MB, Compact_MB, Ratio (inkl. Zeile 'TOTAL').
+    """
+    legacy = to_legacy(df).memory_usage(deep=True, index=False)
+    compact = to_compact(df).memory_usage(deep=True, index=False)
+
+    report = pd.DataFrame(
+        {
+            "Column": legacy.index,
+            "Legacy_MB": legacy.values / 1e6,
+            "Compact_MB": compact.reindex(legacy.index).values / 1e6,
+        }
+    )
+    total = pd.DataFrame(
+        {
+            "Column": ["TOTAL"],
+            "Legacy_MB": [report["Legacy_MB"].sum()],
+            "Compact_MB": [report["Compact_MB"].sum()],
+        }
+    )
+    report = pd.concat([report, total], ignore_index=True)
+    report["Ratio"] = report["Legacy_MB"] / report["Compact_MB"]
+    return report
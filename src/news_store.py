@@ -0,0 +1,266 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from src.news_schema import to_compact
+from src.sentiment_index import PARTIAL_COLUMNS
+
+DEFAULT_DB_PATH = os.path.join("data", "news.db")
+# Das aktuelle Stimmungsbild: nur Items der letzten Tage (wie ein frischer Scrape)
+RECENT_DAYS = 7
+
+# Spalten im DataFrame -> Spalten in der Tabelle
+COLUMNS = {
+    "Date": "date",
+    "Title": "title",
+    "Source": "source",
+    "Type": "type",
+    "Label": "label",
+    "Sentiment_Score": "sentiment_score",
+    "Subjectivity": "subjectivity",
+    "Cluster_Size": "cluster_size",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS news (
+    ticker TEXT NOT NULL,
+    date INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    source TEXT,
+    type TEXT,
+    label TEXT,
+    sentiment_score REAL,
+    subjectivity REAL,
+    collected_at INTEGER NOT NULL,
+    cluster_size INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (ticker, title)
+);
+CREATE INDEX IF NOT EXISTS idx_news_ticker_date ON news (ticker, date DESC);
+CREATE TABLE IF NOT EXISTS daily_sentiment (
+    ticker TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    count REAL NOT NULL,
+    sum REAL NOT NULL,
+    sumsq REAL NOT NULL,
+    social_count REAL NOT NULL,
+    social_sum REAL NOT NULL,
+    news_count REAL NOT NULL,
+    news_sum REAL NOT NULL,
+    PRIMARY KEY (ticker, day)
+);
+"""
+
+
+class NewsStore:
+    """
+    Lokaler, indizierter Speicher (SQLite) für bereits bewertete News & Posts.
+    Der Collector schreibt, das Dashboard liest nur.
+    Zeitstempel werden als int64 (Nanosekunden seit Epoch) abgelegt.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        with self._connect() as conn:
+            # WAL erlaubt paralleles Lesen (Dashboard) während der Collector schreibt
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            # Ältere Stores ohne Cluster-Größe nachrüsten (bisherige Items zählen einfach)
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(news)")}
+            if "cluster_size" not in existing:
+                conn.execute(
+                    "ALTER TABLE news ADD COLUMN cluster_size INTEGER NOT NULL DEFAULT 1"
+                )
+
+    @contextmanager
+    def _connect(self):
+        # Eine Verbindung pro Aufruf, damit der Store thread-sicher bleibt (Streamlit)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def known_titles(self, ticker, titles):
+        """Gibt die Titel zurück, die für diesen Ticker schon gespeichert sind."""
+        titles = list(titles)
+        if not titles:
+            return set()
+
+        known = set()
+        with self._connect() as conn:
+            # SQLite begrenzt die Anzahl der Parameter pro Query
+            for start in range(0, len(titles), 500):
+                chunk = titles[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT title FROM news WHERE ticker = ? AND title IN ({placeholders})",
+                    [ticker, *chunk],
+                )
+                known.update(row[0] for row in rows)
+        return known
+
+    def append(self, ticker, scored_df):
+        """
+        Hängt bewertete Items an. Bereits bekannte Titel werden ignoriert.
+        Returns:
+            int: Anzahl der neu gespeicherten Zeilen.
+        """
+        if scored_df is None or scored_df.empty:
+            return 0
+
+        frame = scored_df.reindex(columns=list(COLUMNS))
+        dates = pd.to_datetime(frame["Date"]).astype("int64")
+        collected_at = time.time_ns()
+
+        rows = [
+            (
+                ticker,
+                int(date),
+                str(title),
+                source,
+                kind,
+                label if isinstance(label, str) else None,
+                None if pd.isna(score) else float(score),
+                None if pd.isna(subjectivity) else float(subjectivity),
+                collected_at,
+                1 if pd.isna(cluster_size) else int(cluster_size),
+            )
+            for date, title, source, kind, label, score, subjectivity, cluster_size in zip(
+                dates,
+                frame["Title"],
+                frame["Source"],
+                frame["Type"],
+                frame["Label"],
+                frame["Sentiment_Score"],
+                frame["Subjectivity"],
+                frame["Cluster_Size"],
+            )
+        ]
+
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO news (ticker, date, title, source, type, label, "
+                "sentiment_score, subjectivity, collected_at, cluster_size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            return conn.total_changes - before
+
+    def add_reposts(self, ticker, reposts):
+        """
+        Zählt spätere Kopien auf schon gespeicherte Items auf (`cluster_size`).
+
+        Args:
+            reposts (dict): Titel des gespeicherten Items -> Titel der neuen Kopien
+                (siehe dedup.collapse_near_duplicates).
+
+        Returns:
+            pd.DataFrame: Die betroffenen Items, `Cluster_Size` = Anzahl der neuen Kopien
+                (für DailySentimentIndex.update). Nicht (mehr) gespeicherte fehlen.
+        """
+        counts = {str(title): len(copies) for title, copies in reposts.items() if copies}
+        titles = list(counts)
+        query = f"SELECT {', '.join(COLUMNS.values())} FROM news WHERE ticker = ? AND title IN"
+
+        frames = []
+        with self._connect() as conn:
+            for start in range(0, len(titles), 500):
+                chunk = titles[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                frames.append(
+                    pd.read_sql_query(
+                        f"{query} ({placeholders})", conn, params=[ticker, *chunk]
+                    )
+                )
+            conn.executemany(
+                "UPDATE news SET cluster_size = cluster_size + ? WHERE ticker = ? AND title = ?",
+                [(count, ticker, title) for title, count in counts.items()],
+            )
+
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        df = df.reindex(columns=list(COLUMNS.values()))
+        df.columns = list(COLUMNS)
+        df["Date"] = pd.to_datetime(df["Date"], unit="ns")
+        df["Cluster_Size"] = df["Title"].map(counts)
+        return to_compact(df)
+
+    def load(self, ticker, since=None, limit=None):
+        """
+        Liest die gespeicherten Items eines Tickers (neueste zuerst).
+
+        Args:
+            ticker (str): Das Aktien-Symbol.
+            since (datetime, optional): Nur Items ab diesem Zeitpunkt.
+            limit (int, optional): Maximale Anzahl Zeilen.
+        """
+        query = f"SELECT {', '.join(COLUMNS.values())} FROM news WHERE ticker = ?"
+        params = [ticker]
+        if since is not None:
+            query += " AND date >= ?"
+            params.append(int(pd.Timestamp(since).value))
+        query += " ORDER BY date DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._connect() as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+
+        df.columns = list(COLUMNS)
+        df["Date"] = pd.to_datetime(df["Date"], unit="ns")
+        return to_compact(df)
+
+    def load_recent(self, ticker, days=RECENT_DAYS, limit=1000):
+        """Die Items der letzten `days` Tage (neueste zuerst), höchstens `limit`."""
+        since = pd.Timestamp.now().normalize() - pd.Timedelta(days=days)
+        return self.load(ticker, since=since, limit=limit)
+
+    def add_daily_sentiment(self, ticker, partials):
+        """
+        Addiert Tagessummen (siehe sentiment_index.daily_partials) auf die gespeicherten Tage.
+        Nur die übergebenen Tage werden angefasst.
+        """
+        values = partials[PARTIAL_COLUMNS].to_numpy(dtype=float)
+        rows = [
+            (ticker, int(day.value), *map(float, row))
+            for day, row in zip(partials.index, values)
+        ]
+        placeholders = ", ".join("?" * (len(PARTIAL_COLUMNS) + 2))
+        updates = ", ".join(f"{col} = {col} + excluded.{col}" for col in PARTIAL_COLUMNS)
+
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT INTO daily_sentiment VALUES ({placeholders}) "
+                f"ON CONFLICT (ticker, day) DO UPDATE SET {updates}",
+                rows,
+            )
+
+    def load_daily_sentiment(self, ticker):
+        """Alle Tagessummen eines Tickers (Index: Tag)."""
+        with self._connect() as conn:
+            df = pd.read_sql_query(
+                f"SELECT day, {', '.join(PARTIAL_COLUMNS)} FROM daily_sentiment "
+                "WHERE ticker = ? ORDER BY day",
+                conn,
+                params=[ticker],
+            )
+        days = pd.to_datetime(df.pop("day"), unit="ns")
+        df.index = pd.DatetimeIndex(days, name="Day")
+        return df
+
+    def last_collected(self, ticker):
+        """Zeitpunkt des letzten Collector-Laufs für diesen Ticker (oder None)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(collected_at) FROM news WHERE ticker = ?", [ticker]
+            ).fetchone()
+        return pd.Timestamp(row[0], unit="ns") if row and row[0] else None
@@ -1,7 +1,24 @@
+import math
+
 import numpy as np
+import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import r2_score
-from sklearn.model_selection import train_test_split
+
+from src import low_memory
+from src.correlation import CORRELATION_PREFIXES
+from src.instrumentation import instrumented
+from src.sentiment_index import SENTIMENT_FEATURES, add_sentiment_features, coverage
+
+# Ab diesem Anteil der Trainingszeilen mit echten Tageswerten lernt das Modell das Sentiment,
+# darunter wären die Sentiment-Features fast überall 0 und die News-Heuristik bleibt aktiv
+MIN_SENTIMENT_COVERAGE = 0.5
+
+# Prognose-Band um den Mittelwert der Bäume, auf dem Testzeitraum so kalibriert,
+# dass es die tatsächliche Rendite in 90% der Fälle enthält
+INTERVAL = 0.9
+# Untergrenze der Baum-Streuung beim Kalibrieren (gegen Division durch 0)
+MIN_SCALE = 1e-6
 
 
 class StockPredictor:
@@ -11,22 +28,32 @@ class StockPredictor:
             n_estimators=200, max_depth=10, random_state=42
         )
         self.features = []
+        # Tages-Sentiment (siehe sentiment_index), falls beim Training übergeben
+        self.sentiment_daily = None
+        # Kennzahlen des letzten Trainings (siehe fit)
+        self.metrics = {}
+        # Abstand Ziel <-> Mittelwert in Baum-Standardabweichungen auf dem Testzeitraum (sortiert)
+        self.residual_scores = None
 
-    def prepare_data(self, df):
+    def prepare_data(self, df, sentiment_daily=None):
         """
         Bereitet die Daten vor.
         WICHTIG: Wir sagen jetzt die RENDITE (Returns) vorher, nicht den Preis!
         Das löst das Problem mit dem negativen R².
-        """
-        data = df.copy()
-
-        # 1. Zielvariable: Die prozentuale Änderung von Morgen
-        # shift(-1) schiebt die Daten um einen Tag zurück (Target)
-        data["Target_Return"] = data["Close"].pct_change().shift(-1)
 
-        # Features bereinigen (unendliche Werte entfernen)
-        data.replace([np.inf, -np.inf], np.nan, inplace=True)
-        data.dropna(inplace=True)
+        Args:
+            df: Der DataFrame mit Kursen und Indikatoren.
+            sentiment_daily: Optionaler Tages-Sentiment Index (DailySentimentIndex.daily).
+                Wird per As-of Join als zusätzliche Features angehängt.
+        """
+        if sentiment_daily is not None:
+            # merge_asof liefert ohnehin einen neuen DataFrame
+            data = add_sentiment_features(df, sentiment_daily)
+        elif low_memory.is_enabled():
+            # Sparmodus: keine Kopie, nur lesend (siehe _select_compact)
+            data = df
+        else:
+            data = df.copy()
 
         # Features definieren
         self.features = [
@@ -45,26 +72,93 @@ class StockPredictor:
             "MACD_Signal",
             "ATR",
             "OBV",
+            *SENTIMENT_FEATURES,
+            # Beta/Korrelation gegen Peers, falls angehängt (correlation.add_correlation_features)
+            *[c for c in data.columns if str(c).startswith(CORRELATION_PREFIXES)],
         ]
 
         # Nur Spalten nutzen, die wirklich da sind
         available_features = [f for f in self.features if f in data.columns]
         self.features = available_features
 
+        if low_memory.is_enabled():
+            return self._select_compact(data)
+
+        # 1. Zielvariable: Die prozentuale Änderung von Morgen
+        # shift(-1) schiebt die Daten um einen Tag zurück (Target)
+        data["Target_Return"] = data["Close"].pct_change().shift(-1)
+
+        # Features bereinigen (unendliche Werte entfernen)
+        data.replace([np.inf, -np.inf], np.nan, inplace=True)
+        data.dropna(inplace=True)
+
         X = data[self.features]
         y = data["Target_Return"]
 
         return X, y
 
-    def train(self, df):
+    def _select_compact(self, data):
+        """
+        Sparmodus von prepare_data: Ziel als Array, gültige Zeilen als Maske über
+        Features & Ziel. Kopiert werden nur die Feature-Spalten (einmal), nicht der ganze Frame.
+        """
+        close = data["Close"].to_numpy(dtype=np.float64)
+        target = np.full(len(close), np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            target[:-1] = close[1:] / close[:-1] - 1
+
+        valid = np.isfinite(target)
+        for feature in self.features:
+            valid &= np.isfinite(data[feature].to_numpy())
+
+        low_memory.check_budget(
+            "prepare_data", int(valid.sum()) * len(self.features) * 4 * 2
+        )
+        bounds = low_memory.valid_range(valid)
+        rows = slice(*bounds) if bounds is not None else valid
+        X = data.iloc[rows] if bounds is not None else data.loc[valid]
+        y = pd.Series(target[rows], index=X.index, name="Target_Return")
+        return X[self.features], y
+
+    @instrumented("train")
+    def train(self, df, sentiment_daily=None):
         print("🧠 Trainiere Modell auf RELATIVER Rendite...")
 
-        X, y = self.prepare_data(df)
+        sentiment_daily = self.usable_sentiment(df, sentiment_daily)
+        self.sentiment_daily = sentiment_daily
+        X, y = self.prepare_data(df, sentiment_daily)
+        return self.fit(X, y)
+
+    @staticmethod
+    def usable_sentiment(df, sentiment_daily):
+        """
+        Der Tages-Sentiment Index, wenn er genug Trainingszeilen abdeckt, sonst None.
+        Der News-Store reicht oft nur wenige Tage zurück; diese Zeilen landen beim
+        chronologischen Split im Test-Teil und das Modell sähe nur Nullen.
+        """
+        if sentiment_daily is None:
+            return None
+        train_rows = df.index[: len(df) - math.ceil(len(df) * 0.2)]
+        share = coverage(train_rows, sentiment_daily)
+        if share < MIN_SENTIMENT_COVERAGE:
+            print(
+                f"ℹ️ Tages-Sentiment deckt nur {share:.0%} der Trainingszeilen ab, "
+                "News fließen per Heuristik ein."
+            )
+            return None
+        return sentiment_daily
 
+    def fit(self, X, y):
+        """
+        Training & Evaluation auf fertigen Features (z.B. aus prepare_data oder dem
+        Shared-Memory Store des batch_trainer). `self.features` muss zu X passen.
+        Die Kennzahlen landen zusätzlich in `self.metrics`.
+        """
         # Split (Zeitreihen-konform, nicht mischen!)
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, shuffle=False
-        )
+        # Wie train_test_split(test_size=0.2, shuffle=False), aber als Slices statt Kopien
+        split = len(X) - math.ceil(len(X) * 0.2)
+        X_train, X_test = X.iloc[:split], X.iloc[split:]
+        y_train, y_test = y.iloc[:split], y.iloc[split:]
 
         self.model.fit(X_train, y_train)
 
@@ -79,6 +173,8 @@ class StockPredictor:
         # Haben wir korrekt vorhergesagt, ob es hoch oder runter geht?
         correct_direction = np.sign(predictions) == np.sign(y_test)
         accuracy = np.mean(correct_direction) * 100
+        self.metrics = {"accuracy": float(accuracy), "r2": float(score), "rows": len(X)}
+        self._calibrate(X_test, y_test)
 
         print("✅ Training fertig.")
         print(f"   Richtungstrefferquote: {accuracy:.1f}% (Zufall wäre 50%)")
@@ -86,6 +182,90 @@ class StockPredictor:
 
         return self.model
 
+    def _calibrate(self, X_test, y_test):
+        """
+        Split-Conformal auf dem Testzeitraum (vom Wald nicht gesehen): Die Streuung der Bäume
+        allein ist zu eng, das Band wird daher in Vielfachen davon so breit gewählt, wie die
+        echten Abweichungen es verlangen.
+        """
+        trees = self.tree_predictions(X_test)
+        scale = np.maximum(trees.std(axis=0), MIN_SCALE)
+        residuals = np.abs(np.asarray(y_test, dtype=np.float64) - trees.mean(axis=0))
+        self.residual_scores = np.sort(residuals / scale)
+
+    def _feature_rows(self, df):
+        """Die Feature-Spalten für `df`, inkl. Tages-Sentiment falls das Modell damit trainiert wurde."""
+        if any(f in SENTIMENT_FEATURES for f in self.features):
+            df = add_sentiment_features(df, self.sentiment_daily)
+        return df[self.features]
+
+    def predict_returns(self, df):
+        """
+        Technische Rendite-Prognose für alle Zeilen auf einmal (ein einziger predict-Aufruf).
+        Achtung: Für Zeilen aus dem Trainingszeitraum ist das In-Sample.
+        """
+        return pd.Series(self.model.predict(self._feature_rows(df)), index=df.index)
+
+    def tree_predictions(self, X):
+        """
+        Prognose jedes einzelnen Baums für alle Zeilen von X (Bäume x Zeilen).
+        Der Mittelwert über die Bäume ist model.predict(X) (bis auf Rundung).
+
+        X wird einmal nach float32 gewandelt (wie intern im Wald), danach läuft jeder Baum
+        ohne erneute Prüfung direkt in seine Zeile des Ergebnisses.
+        """
+        rows = np.ascontiguousarray(X, dtype=np.float32)
+        estimators = self.model.estimators_
+        low_memory.check_budget("tree_predictions", len(estimators) * len(rows) * 8)
+
+        trees = np.empty((len(estimators), len(rows)))
+        for i, estimator in enumerate(estimators):
+            # Ein Output: ein Wert pro Zeile (Form je nach sklearn-Version (n, 1) oder (n, 1, 1))
+            trees[i] = estimator.tree_.predict(rows).ravel()
+        return trees
+
+    def forecast_bands(self, X, interval=INTERVAL):
+        """
+        Prognose-Verteilung aus den Einzelbäumen, ohne zusätzliche Quantil-Modelle.
+
+        Returns:
+            pd.DataFrame: Pro Zeile Mean (= Punktprognose), Lower/Upper (Prognoseband, das laut
+                Testzeitraum `interval` der echten Renditen abdeckt), Median & Std der Bäume,
+                Up (Anteil der Bäume mit positiver Prognose) und Confidence (Anteil der Bäume
+                in der Mehrheitsrichtung, also mindestens 0.5).
+        """
+        trees = self.tree_predictions(X)
+        mean = trees.mean(axis=0)
+        std = trees.std(axis=0)
+        # Ältere gespeicherte Modelle haben noch keine Kalibrierung
+        scores = getattr(self, "residual_scores", None)
+        if scores is not None and len(scores):
+            n = len(scores)
+            level = min(1.0, math.ceil((n + 1) * interval) / n)
+            width = np.quantile(scores, level, method="higher") * np.maximum(std, MIN_SCALE)
+            lower, upper = mean - width, mean + width
+        else:
+            tail = (1 - interval) / 2
+            lower, upper = np.quantile(trees, [tail, 1 - tail], axis=0)
+        up = (trees > 0).mean(axis=0)
+        return pd.DataFrame(
+            {
+                "Mean": mean,
+                "Lower": lower,
+                "Median": np.median(trees, axis=0),
+                "Upper": upper,
+                "Std": std,
+                "Up": up,
+                "Confidence": np.maximum(up, 1 - up),
+            },
+            index=X.index,
+        )
+
+    def predict_bands(self, df, interval=INTERVAL):
+        """forecast_bands() für alle Zeilen von `df` (Batch, z.B. für Rückschau oder Screener)."""
+        return self.forecast_bands(self._feature_rows(df), interval)
+
+    @instrumented("predict")
     def predict_with_sentiment(self, df, sentiment_score=0):
         """
         Kombiniert technische Analyse (ML) mit News-Sentiment.
@@ -94,38 +274,56 @@ class StockPredictor:
             df: Der DataFrame mit den Aktienkursen.
             sentiment_score: Der Score aus der News-Analyse (-1 bis +1).
                              0 bedeutet Neutral (oder keine News).
+                             Wird ignoriert, wenn das Modell mit Tages-Sentiment trainiert wurde.
         """
-        # 1. Technische Vorhersage holen
-        latest_data = df.iloc[[-1]][self.features]
-        predicted_return = self.model.predict(latest_data)[0]
+        uses_sentiment = any(f in SENTIMENT_FEATURES for f in self.features)
+
+        # 1. Technische Vorhersage holen (Mittelwert der Bäume + Prognoseband)
+        bands = self.forecast_bands(self._feature_rows(df.iloc[[-1]])).iloc[0]
+        predicted_return = bands["Mean"]
 
         current_price = df["Close"].iloc[-1]
 
-        # 2. Sentiment-Einfluss berechnen (Heuristik)
-        # Wir nehmen an: Sehr starke News (+1.0) können den Kurs um extra 1-2% bewegen.
-        # Das ist ein einstellbarer Faktor ("Impact Factor").
-        sentiment_impact = (
-            sentiment_score * 0.015
-        )  # 0.015 = max 1.5% Einfluss durch News
+        # 2. Sentiment-Einfluss berechnen
+        if uses_sentiment:
+            # Das Modell hat den Sentiment-Effekt aus dem Index gelernt,
+            # er steckt bereits in predicted_return
+            sentiment_impact = 0.0
+        else:
+            # Heuristik: Sehr starke News (+1.0) können den Kurs um extra 1-2% bewegen.
+            # Das ist ein einstellbarer Faktor ("Impact Factor").
+            sentiment_impact = (
+                sentiment_score * 0.015
+            )  # 0.015 = max 1.5% Einfluss durch News
 
         # 3. Fusion: Technik + News
         final_predicted_return = predicted_return + sentiment_impact
 
         predicted_price = current_price * (1 + final_predicted_return)
 
+        # Das Prognoseband wird genauso um den News-Einfluss verschoben
+        return_low = bands["Lower"] + sentiment_impact
+        return_high = bands["Upper"] + sentiment_impact
+
         return {
             "current_price": current_price,
             "technical_return": predicted_return,
             "sentiment_impact": sentiment_impact,
             "final_predicted_return": final_predicted_return,
             "predicted_price": predicted_price,
+            "return_low": return_low,
+            "return_high": return_high,
+            "price_low": current_price * (1 + return_low),
+            "price_high": current_price * (1 + return_high),
+            "confidence": float(bands["Confidence"]),
+            "share_up": float(bands["Up"]),
         }
 
 
 # --- Test-Bereich ---
 if __name__ == "__main__":
-    from data_loader import load_stock_data
-    from indicators import add_indicators
+    from src.data_loader import load_stock_data
+    from src.indicators import add_indicators
 
     # 1. Daten laden
     df = load_stock_data("NVDA", period="5y")
@@ -145,3 +343,7 @@ if __name__ == "__main__":
     print(f"News Einfluss:       {result['sentiment_impact'] * 100:.2f}%")
     print(f"Gesamt-Prognose:     {result['final_predicted_return'] * 100:.2f}%")
     print(f"Zielpreis Morgen:  ${result['predicted_price']:.2f}")
+    print(
+        f"{INTERVAL:.0%}-Band:         ${result['price_low']:.2f} - ${result['price_high']:.2f} "
+        f"(Konfidenz {result['confidence']:.0%})"
+    )
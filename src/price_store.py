@@ -0,0 +1,232 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PRICE_DB_PATH = os.path.join("data", "prices.db")
+
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    ticker TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume REAL,
+    PRIMARY KEY (ticker, interval, ts)
+);
+"""
+
+# Erster Download pro Basis-Intervall (Yahoo liefert Stundenbars nur für die letzten ~2 Jahre)
+INITIAL_PERIOD = {"1d": "max", "1h": "1y"}
+
+# Relative Abweichung, ab der eine schon gespeicherte Bar als neu bereinigt gilt.
+# Yahoo liefert bereinigte Kurse: nach Split oder Dividende ändern sich alle älteren Bars.
+ADJUSTMENT_TOLERANCE = 1e-6
+
+# Gültige yfinance-Zeiträume mit ihrer Länge in Tagen (für inkrementelle Nachladungen)
+FETCH_PERIODS = [
+    ("5d", 5),
+    ("1mo", 30),
+    ("3mo", 90),
+    ("6mo", 180),
+    ("1y", 365),
+    ("2y", 730),
+    ("5y", 1825),
+    ("10y", 3650),
+]
+
+
+def _rows(ticker, interval, bars):
+    """Zeilen für die bars-Tabelle (Zeitstempel als int64 Nanosekunden)."""
+    frame = bars[OHLCV].astype(np.float64)
+    return zip(
+        [ticker] * len(frame),
+        [interval] * len(frame),
+        frame.index.to_numpy(dtype="datetime64[ns]").astype(np.int64).tolist(),
+        *(frame[col].tolist() for col in OHLCV),
+    )
+
+
+class PriceStore:
+    """
+    Lokaler Speicher (SQLite) für Kursbars in einer Basis-Auflösung.
+    Gröbere Auflösungen werden daraus aggregiert (src/pyramid.py), nicht separat geladen.
+    Zeitstempel werden als int64 (Nanosekunden seit Epoch) abgelegt.
+    """
+
+    def __init__(self, path=DEFAULT_PRICE_DB_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def append(self, ticker, interval, bars):
+        """
+        Speichert Bars. Bereits vorhandene Zeitstempel werden überschrieben
+        (die letzte Bar eines laufenden Tages ändert sich noch).
+        Returns:
+            int: Anzahl der geschriebenen Zeilen.
+        """
+        if bars is None or bars.empty:
+            return 0
+
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                _rows(ticker, interval, bars),
+            )
+        return len(bars)
+
+    def replace(self, ticker, interval, bars):
+        """
+        Ersetzt die komplette Historie eines Tickers in einer Transaktion
+        (z.B. nach einem Split, wenn Yahoo alle älteren Kurse neu bereinigt hat).
+        Returns:
+            int: Anzahl der geschriebenen Zeilen.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM bars WHERE ticker = ? AND interval = ?", (ticker, interval)
+            )
+            conn.executemany(
+                "INSERT INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                _rows(ticker, interval, bars),
+            )
+        return len(bars)
+
+    def load(self, ticker, interval="1d", since=None):
+        """Bars eines Tickers (aufsteigend sortiert), optional erst ab `since`."""
+        query = "SELECT ts, open, high, low, close, volume FROM bars WHERE ticker = ? AND interval = ?"
+        params = [ticker, interval]
+        if since is not None:
+            query += " AND ts >= ?"
+            params.append(int(pd.Timestamp(since).value))
+        query += " ORDER BY ts"
+
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        values = np.array([row[1:] for row in rows], dtype=np.float64).reshape(-1, 5)
+        index = pd.DatetimeIndex(
+            np.array([row[0] for row in rows], dtype="datetime64[ns]"), name="Date"
+        )
+        return pd.DataFrame(values, index=index, columns=OHLCV)
+
+    def count(self, ticker, interval="1d", until=None):
+        """Anzahl gespeicherter Bars (optional nur bis einschließlich `until`)."""
+        query = "SELECT COUNT(*) FROM bars WHERE ticker = ? AND interval = ?"
+        params = [ticker, interval]
+        if until is not None:
+            query += " AND ts <= ?"
+            params.append(int(pd.Timestamp(until).value))
+        with self._connect() as conn:
+            return conn.execute(query, params).fetchone()[0]
+
+    def iter_bars(self, ticker, interval="1d", rows=65536, until=None):
+        """
+        Bars aufsteigend in Blöcken von höchstens `rows` Zeilen, ohne alles auf einmal zu laden.
+        Yields:
+            (np.ndarray datetime64[ns], np.ndarray float64 (Zeilen x OHLCV))
+        """
+        query = "SELECT ts, open, high, low, close, volume FROM bars WHERE ticker = ? AND interval = ?"
+        params = [ticker, interval]
+        if until is not None:
+            query += " AND ts <= ?"
+            params.append(int(pd.Timestamp(until).value))
+        query += " ORDER BY ts"
+
+        with self._connect() as conn:
+            cursor = conn.execute(query, params)
+            while True:
+                batch = cursor.fetchmany(rows)
+                if not batch:
+                    break
+                yield (
+                    np.array([row[0] for row in batch], dtype="datetime64[ns]"),
+                    np.array([row[1:] for row in batch], dtype=np.float64),
+                )
+
+    def last_bar(self, ticker, interval="1d"):
+        """Zeitstempel der letzten gespeicherten Bar oder None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(ts) FROM bars WHERE ticker = ? AND interval = ?",
+                (ticker, interval),
+            ).fetchone()
+        return pd.Timestamp(row[0]) if row[0] is not None else None
+
+
+def adjustment_changed(stored, fetched, tolerance=ADJUSTMENT_TOLERANCE):
+    """
+    True, wenn sich überlappende, abgeschlossene Bars im Close unterscheiden,
+    d.h. Yahoo die Historie seit dem letzten Sync neu bereinigt hat.
+    """
+    overlap = stored.index.intersection(fetched.index)
+    if overlap.empty:
+        return False
+    old = stored.loc[overlap, "Close"].to_numpy(dtype=np.float64)
+    new = fetched.loc[overlap, "Close"].to_numpy(dtype=np.float64)
+    return not np.allclose(old, new, rtol=tolerance, atol=0.0, equal_nan=True)
+
+
+def sync_bars(store, ticker, interval="1d"):
+    """
+    Lädt nur die Bars nach, die seit dem letzten Sync dazugekommen sind
+    (inkl. der letzten gespeicherten Bar, die sich noch geändert haben kann).
+    Weichen die mitgeladenen älteren Bars von den gespeicherten ab (Split, Dividende),
+    wird die komplette Historie neu geladen und ersetzt.
+    Returns:
+        pd.DataFrame: Die neu geschriebenen Bars (leer, wenn nichts Neues da ist;
+        nach einer Neu-Bereinigung die ganze Historie).
+    """
+    from src.data_loader import load_stock_data
+
+    last = store.last_bar(ticker, interval)
+    if last is None:
+        period = INITIAL_PERIOD[interval]
+    else:
+        gap = (pd.Timestamp.now() - last).days + 1
+        period = next((p for p, days in FETCH_PERIODS if days >= gap), "max")
+
+    bars = load_stock_data(ticker, period=period, interval=interval)
+    if bars is None:
+        return pd.DataFrame(columns=OHLCV)
+    if last is None:
+        store.append(ticker, interval, bars)
+        return bars[OHLCV]
+
+    # Die letzte gespeicherte Bar kann noch offen gewesen sein, verglichen werden nur die davor
+    earlier = bars[bars.index < last]
+    if not earlier.empty and adjustment_changed(
+        store.load(ticker, interval, since=earlier.index[0]), earlier
+    ):
+        print(f"✂️ {ticker}: Kurse wurden neu bereinigt (Split/Dividende), lade alles neu...")
+        bars = load_stock_data(ticker, period=INITIAL_PERIOD[interval], interval=interval)
+        if bars is None:
+            return pd.DataFrame(columns=OHLCV)
+        store.replace(ticker, interval, bars)
+        return bars[OHLCV]
+
+    bars = bars[bars.index >= last]
+    store.append(ticker, interval, bars)
+    return bars[OHLCV]
@@ -0,0 +1,142 @@
+"""
+OHLCV-Pyramide: Tagesbars aus dem PriceStore werden zu Wochen- und Monatsbars aggregiert.
+Neue Tagesbars aktualisieren nur die letzten (offenen) Buckets jeder Stufe.
+Indikatoren werden pro Stufe einmal über die ganze Historie berechnet und dann nur zugeschnitten.
+"""
+
+import threading
+
+import pandas as pd
+
+from src.indicators import add_indicators
+from src.price_store import OHLCV, sync_bars
+
+# Stufe -> Resample-Regel (Bucket-Label = Beginn des Buckets)
+AGGREGATED_LEVELS = {"1wk": "W-MON", "1mo": "MS"}
+
+RESOLUTIONS = {
+    "1h": "Stündlich",
+    "1d": "Täglich",
+    "1wk": "Wöchentlich",
+    "1mo": "Monatlich",
+}
+
+PERIOD_OFFSETS = {
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+}
+
+AGGREGATION = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum",
+}
+
+
+def aggregate(bars, rule):
+    """Fasst Bars zu gröberen Buckets zusammen (leere Buckets, z.B. Feiertage, fallen weg)."""
+    grouped = bars[OHLCV].resample(rule, label="left", closed="left").agg(AGGREGATION)
+    return grouped.dropna(subset=["Close"])
+
+
+def _merge(old, new):
+    """Hängt neue Bars an; überlappende Zeitstempel werden durch die neuen ersetzt."""
+    if old is None or old.empty:
+        return new
+    if new is None or new.empty:
+        return old
+    return pd.concat([old[old.index < new.index[0]], new])
+
+
+class BarPyramid:
+    """
+    Tages-, Wochen- und Monatsbars (plus optional Stundenbars für die jüngste Zeit)
+    aus einer gespeicherten Basis-Auflösung.
+    """
+
+    def __init__(self, daily, intraday=None):
+        self._lock = threading.Lock()
+        self._levels = {"1d": daily[OHLCV]}
+        for level, rule in AGGREGATED_LEVELS.items():
+            self._levels[level] = aggregate(daily, rule)
+        if intraday is not None:
+            self._levels["1h"] = intraday[OHLCV]
+        self._indicators = {}
+
+    @classmethod
+    def from_store(cls, store, ticker, sync=True):
+        """Baut die Pyramide aus den Tagesbars im PriceStore (vorher inkrementell nachladen)."""
+        if sync:
+            sync_bars(store, ticker, "1d")
+        return cls(store.load(ticker, "1d"))
+
+    def ensure_intraday(self, store, ticker, sync=True):
+        """Nimmt die Stundenbars der jüngsten Zeit erst dazu, wenn sie gebraucht werden."""
+        if "1h" in self._levels:
+            return
+        if sync:
+            sync_bars(store, ticker, "1h")
+        # Auch leer anlegen: refresh() lädt dann ab jetzt mit
+        with self._lock:
+            self._levels["1h"] = store.load(ticker, "1h")
+
+    @property
+    def levels(self):
+        return [level for level in RESOLUTIONS if level in self._levels]
+
+    def refresh(self, store, ticker):
+        """Lädt neue Bars nach und aktualisiert nur die betroffenen Buckets."""
+        self.extend(sync_bars(store, ticker, "1d"))
+        if "1h" in self._levels:
+            self.extend(sync_bars(store, ticker, "1h"), interval="1h")
+
+    def extend(self, new_bars, interval="1d"):
+        """
+        Übernimmt neue Basis-Bars. Jede aggregierte Stufe wird erst ab dem Bucket neu berechnet,
+        in den die erste neue Bar fällt.
+        """
+        if new_bars is None or new_bars.empty:
+            return
+
+        with self._lock:
+            if interval == "1h":
+                self._levels["1h"] = _merge(self._levels.get("1h"), new_bars[OHLCV])
+                self._indicators.pop("1h", None)
+                return
+
+            daily = _merge(self._levels["1d"], new_bars[OHLCV])
+            self._levels["1d"] = daily
+            self._indicators.pop("1d", None)
+
+            first = new_bars.index[0]
+            for level, rule in AGGREGATED_LEVELS.items():
+                old = self._levels[level]
+                # Buckets sind mit ihrem Beginn beschriftet: der letzte Bucket-Start <= first
+                start = old.index[old.index <= first]
+                start = start[-1] if len(start) else daily.index[0]
+                tail = aggregate(daily[daily.index >= start], rule)
+                self._levels[level] = pd.concat([old[old.index < start], tail])
+                self._indicators.pop(level, None)
+
+    def bars(self, level="1d"):
+        return self._levels[level]
+
+    def indicators(self, level="1d"):
+        """add_indicators() über die ganze Historie der Stufe (gecacht bis neue Bars kommen)."""
+        with self._lock:
+            if level not in self._indicators:
+                self._indicators[level] = add_indicators(self._levels[level])
+            return self._indicators[level]
+
+    def window(self, level="1d", period="1y"):
+        """Indikator-Frame der Stufe, zugeschnitten auf den Zeitraum (Indikatoren ohne Anlaufphase)."""
+        df = self.indicators(level)
+        if df is None or df.empty or period not in PERIOD_OFFSETS:
+            return df
+        # Index ist sortiert: Slice (View auf den Cache) statt Boolean-Maske (Kopie)
+        start = df.index.searchsorted(df.index[-1] - PERIOD_OFFSETS[period])
+        return df.iloc[start:]
@@ -0,0 +1,212 @@
+import random
+import threading
+import time
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+
+# Status-Codes, bei denen sich ein erneuter Versuch lohnt (Rate Limit, Serverfehler)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# Ein Block (403) ist meist dauerhaft: höchstens ein kurzer zweiter Versuch, dann aufgeben
+BLOCK_STATUS = {403}
+
+# (Tokens pro Sekunde, Burst-Kapazität) je Host.
+# Reddit erlaubt ohne OAuth ca. 10 Requests pro Minute, Stocktwits ist ähnlich streng.
+DEFAULT_HOST_LIMITS = {
+    "news.google.com": (1.0, 5),
+    "api.stocktwits.com": (0.2, 3),
+    "www.reddit.com": (0.15, 2),
+}
+DEFAULT_LIMIT = (1.0, 2)
+
+
+class TokenBucket:
+    """
+    Token Bucket für einen Host.
+    Füllt sich mit `rate` Tokens pro Sekunde auf, maximal `capacity` Tokens auf Vorrat.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Reserviert ein Token und gibt zurück, wie lange (Sekunden) gewartet werden muss."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+
+            wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+            # Ein aktiver Block (Retry-After / Backoff) gilt für alle Requests an den Host
+            return max(wait, self.blocked_until - now)
+
+    def block(self, seconds):
+        """Sperrt den Host für `seconds` Sekunden (z.B. nach einem 429)."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+def parse_retry_after(value):
+    """Liest den Retry-After Header (Sekunden oder HTTP-Datum). None, falls ungültig."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        target = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(target.timestamp() - time.time(), 0.0)
+
+
+class RequestScheduler:
+    """
+    Verteilt HTTP-Requests über einen Token Bucket pro Host.
+    Bei 429/5xx wird mit Jitter exponentiell gewartet, Retry-After hat Vorrang.
+    Verlangt der Server länger als `max_delay`, wird aufgegeben statt zu früh neu zu fragen.
+    403 wird nur einmal wiederholt (ohne lange Sperre des Hosts).
+    """
+
+    def __init__(
+        self,
+        session=None,
+        host_limits=None,
+        max_retries=4,
+        base_delay=1.0,
+        max_delay=60.0,
+    ):
+        self.session = session or requests.Session()
+        self.host_limits = {**DEFAULT_HOST_LIMITS, **(host_limits or {})}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._stats = defaultdict(
+            lambda: {
+                "queue_depth": 0,
+                "in_flight": 0,
+                "requests": 0,
+                "retries": 0,
+                "failures": 0,
+                "wait_seconds": 0.0,
+            }
+        )
+
+    def _bucket(self, host):
+        with self._lock:
+            if host not in self._buckets:
+                rate, capacity = self.host_limits.get(host, DEFAULT_LIMIT)
+                self._buckets[host] = TokenBucket(rate, capacity)
+            return self._buckets[host]
+
+    def _update(self, host, key, delta):
+        with self._lock:
+            self._stats[host][key] += delta
+
+    def _backoff(self, attempt):
+        """Exponentielles Backoff mit 'Full Jitter'."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def request(self, method, url, **kwargs):
+        """
+        Führt einen Request unter Einhaltung der Host-Limits aus.
+        Gibt die letzte Response zurück (auch wenn sie nach allen Versuchen noch ein Fehler ist).
+        Netzwerkfehler werden nach dem letzten Versuch weitergereicht.
+        """
+        host = urlparse(url).netloc
+        bucket = self._bucket(host)
+
+        for attempt in range(self.max_retries + 1):
+            # In der Warteschlange, bis ein Token frei ist
+            self._update(host, "queue_depth", 1)
+            wait = bucket.reserve()
+            if wait > 0:
+                time.sleep(wait)
+            self._update(host, "queue_depth", -1)
+            self._update(host, "wait_seconds", wait)
+
+            self._update(host, "in_flight", 1)
+            self._update(host, "requests", 1)
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException:
+                if attempt == self.max_retries:
+                    self._update(host, "failures", 1)
+                    raise
+                bucket.block(self._backoff(attempt))
+                self._update(host, "retries", 1)
+                continue
+            finally:
+                self._update(host, "in_flight", -1)
+
+            if response.status_code in BLOCK_STATUS:
+                if attempt >= min(1, self.max_retries):
+                    break
+                delay = self._backoff(0)
+                time.sleep(delay)
+                self._update(host, "retries", 1)
+                print(f"⏳ {host} antwortet mit 403, ein neuer Versuch in {delay:.1f}s...")
+                continue
+            if response.status_code not in RETRY_STATUS:
+                return response
+            if attempt == self.max_retries:
+                break
+
+            # Retry-After respektieren, sonst Backoff mit Jitter
+            delay = parse_retry_after(response.headers.get("Retry-After"))
+            if delay is None:
+                delay = self._backoff(attempt)
+            elif delay > self.max_delay:
+                print(
+                    f"⚠️ {host} verlangt {delay:.0f}s Pause (Retry-After), "
+                    f"mehr als {self.max_delay:.0f}s: kein neuer Versuch."
+                )
+                break
+            bucket.block(delay)
+            self._update(host, "retries", 1)
+            print(
+                f"⏳ {host} antwortet mit {response.status_code}, neuer Versuch in {delay:.1f}s..."
+            )
+
+        self._update(host, "failures", 1)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def metrics(self):
+        """Momentaufnahme der Warteschlangen und Zähler pro Host."""
+        with self._lock:
+            return {host: dict(stats) for host, stats in self._stats.items()}
+
+    def queue_depth(self):
+        """Gesamtzahl der Requests, die gerade auf ein Token warten."""
+        with self._lock:
+            return sum(stats["queue_depth"] for stats in self._stats.values())
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def get_default_scheduler():
+    """Gemeinsamer Scheduler, damit sich alle Scraper-Instanzen die Host-Limits teilen."""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler()
+        return _default_scheduler
@@ -2,14 +2,25 @@ import random
 from datetime import datetime
 
 import pandas as pd
-import requests
 from bs4 import BeautifulSoup
 
+from src.dedup import collapse_near_duplicates
+from src.instrumentation import instrumented
+from src.news_schema import news_frame, to_compact
+from src.rate_limiter import get_default_scheduler
+from src.ticker_matcher import TickerMatcher
+
 
 class NewsScraper:
-    def __init__(self):
-        # Wir rotieren User-Agents, um weniger wie ein Bot zu wirken
-        self.session = requests.Session()
+    # Subreddits über viele Ticker: einmal holen, per TickerMatcher auf die Ticker verteilen
+    SHARED_SUBREDDITS = ["wallstreetbets"]
+    # Subreddits über genau einen Ticker: nur für diesen holen, jeder Post zählt für ihn
+    TICKER_SUBREDDITS = {"NVDA": ["nvidia"]}
+
+    def __init__(self, scheduler=None):
+        # Alle Requests laufen über den Scheduler (Token Bucket pro Host + Backoff)
+        self.scheduler = scheduler or get_default_scheduler()
+        self.session = self.scheduler.session
 
     def _get_headers(self):
         """
@@ -32,17 +43,19 @@ class NewsScraper:
             "Connection": "keep-alive",
         }
 
+    @instrumented("scrape:google_news")
     def get_nvidia_news(self, query="NVIDIA stock", max_items=200):
         """Google News RSS"""
         print(f"🕷️ Crawle Google News: '{query}'...")
         url = f"https://news.google.com/rss/search?q={query}&hl=en-US&gl=US&ceid=US:en"
 
         try:
-            response = requests.get(url, headers=self._get_headers(), timeout=10)
+            response = self.scheduler.get(url, headers=self._get_headers(), timeout=10)
             soup = BeautifulSoup(response.content, features="lxml-xml")
             items = soup.findAll("item")
 
-            news_list = []
+            # Spaltenweise sammeln, der DataFrame wird nur einmal gebaut
+            columns = {"Date": [], "Title": [], "Source": [], "Type": []}
             for item in items[:max_items]:
                 try:
                     pub_date = datetime.strptime(
@@ -51,30 +64,31 @@ class NewsScraper:
                 except ValueError:
                     pub_date = datetime.now()
 
-                news_list.append(
-                    {
-                        "Date": pub_date,
-                        "Title": item.title.text,
-                        "Source": item.source.text if item.source else "GoogleNews",
-                        "Type": "News",
-                    }
+                columns["Date"].append(pub_date)
+                columns["Title"].append(item.title.text)
+                columns["Source"].append(
+                    item.source.text if item.source else "GoogleNews"
                 )
-            return pd.DataFrame(news_list)
+                columns["Type"].append("News")
+            return news_frame(columns)
         except Exception as e:
             print(f"❌ Fehler Google News: {e}")
             return pd.DataFrame()
 
+    @instrumented("scrape:stocktwits")
     def get_stocktwits_feed(self, symbol="NVDA"):
         """Stocktwits API mit maximaler Tarnung"""
         print(f"🐦 Hole Stocktwits für {symbol}...")
         url = f"https://api.stocktwits.com/api/2/streams/symbol/{symbol}.json"
 
         try:
-            # Wir nutzen die Session und die vollen Header
-            r = self.session.get(url, headers=self._get_headers(), timeout=5)
+            # Wir nutzen die Session und die vollen Header (Retries macht der Scheduler)
+            r = self.scheduler.get(url, headers=self._get_headers(), timeout=5)
 
             if r.status_code == 403:
-                print("⚠️ Stocktwits Block (403). Versuche Reddit als Fallback...")
+                print(
+                    "⚠️ Stocktwits Block (403) trotz Backoff. Versuche Reddit als Fallback..."
+                )
                 return (
                     pd.DataFrame()
                 )  # Leeres DF zurückgeben, damit der Code weiterläuft
@@ -84,7 +98,7 @@ class NewsScraper:
                 return pd.DataFrame()
 
             data = r.json()
-            messages = []
+            columns = {"Date": [], "Title": [], "Source": [], "Type": [], "Label": []}
             for msg in data.get("messages", []):
                 body = msg["body"]
                 user = msg["user"]["username"]
@@ -96,22 +110,19 @@ class NewsScraper:
 
                 dt = datetime.strptime(time_str, "%Y-%m-%dT%H:%M:%SZ")
 
-                messages.append(
-                    {
-                        "Date": dt,
-                        "Title": f"@{user}: {body}",
-                        "Source": "Stocktwits",
-                        "Type": "Social",
-                        "Label": sentiment_label,
-                    }
-                )
+                columns["Date"].append(dt)
+                columns["Title"].append(f"@{user}: {body}")
+                columns["Source"].append("Stocktwits")
+                columns["Type"].append("Social")
+                columns["Label"].append(sentiment_label)
 
-            return pd.DataFrame(messages)
+            return news_frame(columns)
 
         except Exception as e:
             print(f"❌ Fehler Stocktwits: {e}")
             return pd.DataFrame()
 
+    @instrumented("scrape:reddit")
     def get_reddit_posts(self, subreddit="nvidia", limit=200):
         """Reddit JSON"""
         print(f"👽 Crawle r/{subreddit}...")
@@ -122,10 +133,15 @@ class NewsScraper:
             headers = {
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
             }
-            r = requests.get(url, headers=headers, timeout=5)
+            r = self.scheduler.get(url, headers=headers, timeout=5)
+
+            if r.status_code != 200:
+                print(f"⚠️ Reddit Status: {r.status_code}")
+                return pd.DataFrame()
+
             data = r.json()
 
-            posts = []
+            columns = {"Date": [], "Title": [], "Source": [], "Type": []}
             if "data" in data and "children" in data["data"]:
                 for child in data["data"]["children"]:
                     post = child["data"]
@@ -135,32 +151,60 @@ class NewsScraper:
 
                     dt = datetime.fromtimestamp(post["created_utc"])
 
-                    posts.append(
-                        {
-                            "Date": dt,
-                            "Title": full_text,
-                            "Source": f"Reddit r/{subreddit}",
-                            "Type": "Social",
-                        }
-                    )
-            return pd.DataFrame(posts)
+                    columns["Date"].append(dt)
+                    columns["Title"].append(full_text)
+                    columns["Source"].append(f"Reddit r/{subreddit}")
+                    columns["Type"].append("Social")
+            return news_frame(columns)
         except Exception as e:
             print(f"❌ Fehler Reddit: {e}")
             return pd.DataFrame()
 
-    def get_all_sources(self, ticker="NVDA"):
+    def get_shared_posts(self, matcher, limit=200):
+        """
+        Holt SHARED_SUBREDDITS einmal für alle Ticker des Matchers.
+        Returns:
+            dict: Ticker -> Posts, die ihn erwähnen (ein Post kann bei mehreren Tickern landen).
+        """
+        frames = [self.get_reddit_posts(sub, limit=limit) for sub in self.SHARED_SUBREDDITS]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return {}
+        return matcher.route(to_compact(pd.concat(frames, ignore_index=True)))
+
+    @instrumented("scrape")
+    def get_all_sources(
+        self, ticker="NVDA", dedup_index=None, shared_posts=None, reposts=None
+    ):
+        """
+        Holt alle Quellen und fasst (fast) gleiche Titel zusammen.
+
+        Args:
+            ticker (str): Das Aktien-Symbol.
+            dedup_index (NearDuplicateIndex, optional): Index über frühere Läufe.
+                Items, die dort schon bekannt sind, fallen komplett weg.
+            shared_posts (pd.DataFrame, optional): Schon verteilte Posts aus get_shared_posts()
+                (z.B. vom Collector für das ganze Universum). Ohne werden sie hier für
+                diesen einen Ticker geholt.
+            reposts (dict, optional): Sammelt neue Kopien von Items, die der Index schon
+                kennt (siehe dedup.collapse_near_duplicates).
+        """
         # Parallel holen
         df_news = self.get_nvidia_news(f"{ticker} stock")
         df_st = self.get_stocktwits_feed(ticker)
 
-        # Reddit holen (WallStreetBets & Nvidia Subreddit)
-        df_reddit_wsb = self.get_reddit_posts("wallstreetbets", limit=200)
-        df_reddit_nvda = self.get_reddit_posts("nvidia", limit=200)
-
-        dfs = [
-            d for d in [df_news, df_st, df_reddit_wsb, df_reddit_nvda] if not d.empty
+        # Reddit: WallStreetBets nur mit Posts, die den Ticker erwähnen,
+        # dazu das eigene Subreddit des Tickers (falls es eins gibt, z.B. r/nvidia für NVDA)
+        if shared_posts is None:
+            matcher = TickerMatcher([ticker])
+            shared_posts = self.get_shared_posts(matcher).get(ticker.upper(), pd.DataFrame())
+        df_reddit_ticker = [
+            self.get_reddit_posts(sub, limit=200)
+            for sub in self.TICKER_SUBREDDITS.get(ticker.upper(), [])
         ]
 
+        dfs = [d for d in [df_news, df_st, shared_posts, *df_reddit_ticker] if not d.empty]
+
         if not dfs:
             return pd.DataFrame(
                 columns=[
@@ -170,10 +214,13 @@ class NewsScraper:
                     "Type",
                     "Sentiment_Score",
                     "Subjectivity",
+                    "Cluster_Size",
                 ]
             )
 
-        full_df = pd.concat(dfs, ignore_index=True)
+        # Categoricals mit unterschiedlichen Kategorien werden beim concat zu object,
+        # daher das kompakte Schema danach einmal neu anwenden
+        full_df = to_compact(pd.concat(dfs, ignore_index=True))
 
         # Duplikate entfernen (manchmal posten Leute das Gleiche)
         full_df.drop_duplicates(subset=["Title"], inplace=True)
@@ -181,4 +228,8 @@ class NewsScraper:
         if "Date" in full_df.columns:
             full_df = full_df.sort_values(by="Date", ascending=False)
 
+        # Reposts & leicht veränderte Kopien zu Clustern zusammenfassen (MinHash LSH),
+        # damit sie das Sentiment nicht mehrfach verzerren
+        full_df = collapse_near_duplicates(full_df, index=dedup_index, reposts=reposts)
+
         return full_df
@@ -0,0 +1,197 @@
+"""
+Headless Screener: Führt die komplette Pipeline (Laden, Indikatoren, Training, Zerlegung, Agenten-Rat)
+für eine ganze Ticker-Liste parallel aus und schreibt eine sortierte Verdict-Tabelle.
+
+Start:
+    uv run python -m src.screener NVDA AMD TSM AVGO --workers 4 --timeout 120
+"""
+
+import argparse
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+
+import pandas as pd
+
+from src.agents import VOTE_CODES, HedgeFund
+from src.data_loader import load_stock_data
+from src.indicators import add_indicators, calculate_seasonal_decomposition
+from src.news_store import DEFAULT_DB_PATH, NewsStore
+from src.predictor import StockPredictor
+from src.sentiment_index import DailySentimentIndex
+
+STAGES = ["load", "indicators", "train", "predict", "decomposition", "council"]
+
+# Read-only Daten, die jeder Worker-Prozess einmal beim Start bekommt (nicht pro Task)
+_shared = {}
+
+
+def _init_worker(shared):
+    _shared.update(shared)
+
+
+class TickerTimeout(Exception):
+    pass
+
+
+@contextmanager
+def _time_limit(seconds):
+    """Bricht die Pipeline eines Tickers nach `seconds` ab (nur Unix, sonst ohne Limit)."""
+    if not seconds or not hasattr(signal, "SIGALRM"):
+        yield
+        return
+
+    def _raise(signum, frame):
+        raise TickerTimeout(f"Timeout nach {seconds}s")
+
+    previous = signal.signal(signal.SIGALRM, _raise)
+    signal.alarm(int(seconds))
+    try:
+        yield
+    finally:
+        signal.alarm(0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+@contextmanager
+def _stage(timings, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[f"t_{name}"] = time.perf_counter() - start
+
+
+def screen_ticker(ticker, period="2y", timeout=120):
+    """
+    Führt die Pipeline für einen Ticker aus.
+    Returns:
+        dict: Eine Zeile der Verdict-Tabelle inkl. Laufzeit pro Stufe (Sekunden).
+    """
+    timings = {f"t_{stage}": None for stage in STAGES}
+    row = {"Ticker": ticker, "Status": "ok", "Error": None}
+
+    news_df = _shared.get("news", {}).get(ticker)
+    sentiment_daily = _shared.get("sentiment", {}).get(ticker)
+
+    try:
+        with _time_limit(timeout):
+            with _stage(timings, "load"):
+                df = load_stock_data(ticker, period=period)
+            if df is None:
+                raise ValueError("Keine Kursdaten")
+
+            with _stage(timings, "indicators"):
+                df = add_indicators(df)
+
+            with _stage(timings, "train"):
+                predictor = StockPredictor()
+                predictor.train(df, sentiment_daily=sentiment_daily)
+
+            with _stage(timings, "predict"):
+                avg_sentiment = (
+                    float(news_df["Sentiment_Score"].mean())
+                    if news_df is not None and not news_df.empty
+                    else 0.0
+                )
+                prediction = predictor.predict_with_sentiment(df, avg_sentiment)
+
+            with _stage(timings, "decomposition"):
+                decomposition = calculate_seasonal_decomposition(df, period=60)
+
+            with _stage(timings, "council"):
+                agents, verdict, _ = HedgeFund().get_verdict(
+                    df, news_df, prediction, decomposition
+                )
+    except Exception as e:
+        row.update(
+            Status="timeout" if isinstance(e, TickerTimeout) else "error",
+            Error=str(e),
+        )
+        return {**row, **timings}
+
+    votes = [VOTE_CODES[a.vote] for a in agents]
+    row.update(
+        Verdict=verdict,
+        Bullish=votes.count(1),
+        Bearish=votes.count(-1),
+        # Überzeugung: Voten gewichtet mit der Sicherheit der Agenten
+        Conviction=sum(v * a.confidence for v, a in zip(votes, agents)),
+        Predicted_Return=prediction["final_predicted_return"],
+        Close=prediction["current_price"],
+        RSI=df["RSI"].iloc[-1],
+        **{a.name: a.vote for a in agents},
+    )
+    return {**row, **timings}
+
+
+def load_shared_inputs(tickers, db_path=DEFAULT_DB_PATH):
+    """Liest News & Tages-Sentiment aller Ticker einmal im Hauptprozess (read-only für die Worker)."""
+    if not os.path.exists(db_path):
+        return {"news": {}, "sentiment": {}}
+
+    store = NewsStore(db_path)
+    index = DailySentimentIndex(store)
+    return {
+        "news": {t: store.load_recent(t) for t in tickers},
+        "sentiment": {t: index.daily(t) for t in tickers},
+    }
+
+
+def run_screener(tickers, period="2y", workers=None, timeout=120, db_path=None):
+    """
+    Screent alle Ticker auf einem Prozess-Pool.
+    Returns:
+        pd.DataFrame: Nach Bullish-Bearish und Überzeugung sortierte Verdict-Tabelle.
+    """
+    shared = load_shared_inputs(tickers, db_path or DEFAULT_DB_PATH)
+    workers = workers or os.cpu_count()
+
+    rows = []
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(shared,)
+    ) as pool:
+        futures = {
+            pool.submit(screen_ticker, ticker, period, timeout): ticker
+            for ticker in tickers
+        }
+        for future in as_completed(futures):
+            row = future.result()
+            print(f"🔎 {row['Ticker']}: {row.get('Verdict', row['Status'])}")
+            rows.append(row)
+
+    table = pd.DataFrame(rows)
+    if "Verdict" not in table.columns:
+        return table
+
+    table["Net_Votes"] = table["Bullish"] - table["Bearish"]
+    return table.sort_values(
+        by=["Net_Votes", "Conviction"], ascending=False, na_position="last"
+    ).reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HedgeFund Universe Screener")
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--period", default="2y")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--timeout", type=int, default=120, help="Sekunden pro Ticker (0 = ohne)"
+    )
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="News-Store (optional)")
+    parser.add_argument("--out", default=os.path.join("data", "screener.csv"))
+    args = parser.parse_args(argv)
+
+    tickers = [t.upper() for t in args.tickers]
+    table = run_screener(tickers, args.period, args.workers, args.timeout, args.db)
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    table.to_csv(args.out, index=False)
+    print(table.to_string(index=False))
+    print(f"💾 Verdict-Tabelle gespeichert unter: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
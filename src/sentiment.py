@@ -1,11 +1,15 @@
 import re
 
 import nltk
+import numpy as np
 import pandas as pd
 from nltk.corpus import stopwords
 from nltk.sentiment.vader import SentimentIntensityAnalyzer
 from textblob import TextBlob
 
+from src.instrumentation import instrumented
+from src.news_schema import to_compact
+
 # NLTK Ressourcen herunterladen (Caching)
 for resource in ["vader_lexicon", "stopwords", "punkt"]:
     try:
@@ -110,6 +114,11 @@ class SentimentAnalyzer:
         text = re.sub(r"[^a-zA-ZäöüÄÖÜß\s]", "", text)
         return text.lower()
 
+    def tokenize(self, text):
+        """Bereinigt einen Text und gibt die Wörter ohne Stopwörter zurück."""
+        words = self.clean_text(text).split()
+        return [w for w in words if w not in self.stop_words and len(w) > 2]
+
     def get_text_for_wordcloud(self, news_df):
         """
         Gibt einen bereinigten String zurück, aus dem alle Stopwörter entfernt wurden.
@@ -130,6 +139,7 @@ class SentimentAnalyzer:
 
         return " ".join(filtered_words)
 
+    @instrumented("sentiment")
     def analyze_news(self, news_df):
         """
         Fügt Sentiment (VADER) und Subjektivität (TextBlob) hinzu.
@@ -137,24 +147,20 @@ class SentimentAnalyzer:
         if news_df is None or news_df.empty:
             return pd.DataFrame()
 
-        results = []
-        for index, row in news_df.iterrows():
-            title = str(row["Title"])
+        # Scores direkt in Arrays schreiben statt Liste von dicts + zweitem concat
+        titles = news_df["Title"].astype(str).tolist()
+        scores = np.empty(len(titles), dtype=np.float32)
+        subjectivity = np.empty(len(titles), dtype=np.float32)
 
+        for i, title in enumerate(titles):
             # 1. VADER (Emotion)
-            vader_score = self.sia.polarity_scores(title)["compound"]
+            scores[i] = self.sia.polarity_scores(title)["compound"]
 
             # 2. TextBlob (Fakt vs Meinung)
-            blob = TextBlob(title)
-            subjectivity = blob.sentiment.subjectivity
-
-            results.append(
-                {"Sentiment_Score": vader_score, "Subjectivity": subjectivity}
-            )
+            subjectivity[i] = TextBlob(title).sentiment.subjectivity
 
-        metrics_df = pd.DataFrame(results)
-        # Indizes zurücksetzen für sauberen Concat
         news_df = news_df.reset_index(drop=True)
-        metrics_df = metrics_df.reset_index(drop=True)
+        news_df["Sentiment_Score"] = scores
+        news_df["Subjectivity"] = subjectivity
 
-        return pd.concat([news_df, metrics_df], axis=1)
+        return to_compact(news_df)
@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+# Features, die nach dem As-of Join im Kurs-DataFrame landen
+SENTIMENT_FEATURES = [
+    "Sent_Mean",
+    "Sent_Count",
+    "Sent_Social",
+    "Sent_News",
+    "Sent_Std",
+]
+
+# Rohsummen pro Tag. Aus Summen lassen sich neue Items einfach aufaddieren,
+# ohne die alten Items erneut lesen zu müssen.
+PARTIAL_COLUMNS = [
+    "count",
+    "sum",
+    "sumsq",
+    "social_count",
+    "social_sum",
+    "news_count",
+    "news_sum",
+]
+
+
+def daily_partials(scored_df):
+    """
+    Aggregiert bewertete Items zu Tagessummen (Index: Kalendertag).
+    Nur die Tage, an denen es neue Items gibt, tauchen auf.
+    Ein Item zählt so oft wie sein Near-Duplicate-Cluster groß ist (`Cluster_Size`, sonst 1):
+    bewertet wird es nur einmal, ein oft geteilter Post wiegt aber schwerer.
+    """
+    if scored_df is None or scored_df.empty:
+        return pd.DataFrame(columns=PARTIAL_COLUMNS, index=pd.DatetimeIndex([]))
+
+    score = scored_df["Sentiment_Score"].astype(np.float64).to_numpy()
+    weight = np.ones_like(score)
+    if "Cluster_Size" in scored_df.columns:
+        weight = scored_df["Cluster_Size"].fillna(1).to_numpy(dtype=np.float64)
+    kind = scored_df["Type"].astype(str).to_numpy()
+    is_social = (kind == "Social") * weight
+    is_news = (kind == "News") * weight
+
+    parts = pd.DataFrame(
+        {
+            "count": weight,
+            "sum": score * weight,
+            "sumsq": score**2 * weight,
+            "social_count": is_social,
+            "social_sum": score * is_social,
+            "news_count": is_news,
+            "news_sum": score * is_news,
+        },
+        index=pd.to_datetime(scored_df["Date"]).dt.normalize().to_numpy(),
+    )
+    parts = parts.groupby(level=0).sum()
+    parts.index = pd.DatetimeIndex(parts.index, name="Day")
+    return parts
+
+
+def finalize(partials):
+    """Wandelt Tagessummen in Features um (Mittelwert, Anzahl, Social/News Split, Streuung)."""
+    if partials is None or partials.empty:
+        return pd.DataFrame(columns=SENTIMENT_FEATURES, index=pd.DatetimeIndex([]))
+
+    count = partials["count"]
+    mean = partials["sum"] / count
+    # Populations-Varianz aus den Summen, gegen negative Rundungsfehler abgesichert
+    variance = (partials["sumsq"] / count - mean**2).clip(lower=0)
+
+    daily = pd.DataFrame(
+        {
+            "Sent_Mean": mean,
+            "Sent_Count": count,
+            "Sent_Social": partials["social_sum"] / partials["social_count"],
+            "Sent_News": partials["news_sum"] / partials["news_count"],
+            "Sent_Std": np.sqrt(variance),
+        },
+        index=partials.index,
+    )
+    # Tage ohne Social- oder News-Items gelten als neutral
+    return daily.fillna(0.0).sort_index()
+
+
+class DailySentimentIndex:
+    """
+    Tages-Sentiment pro Ticker, inkrementell aktualisiert.
+    Mit `store` (NewsStore) werden die Summen dort persistiert, sonst nur im Speicher gehalten.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self._partials = {}
+
+    def update(self, ticker, scored_df):
+        """
+        Addiert neue (noch nicht gezählte!) Items auf ihre Tage.
+        Returns:
+            pd.DatetimeIndex: Die Tage, die sich verändert haben.
+        """
+        parts = daily_partials(scored_df)
+        if parts.empty:
+            return parts.index
+
+        if self.store is not None:
+            self.store.add_daily_sentiment(ticker, parts)
+        else:
+            current = self._partials.get(ticker)
+            self._partials[ticker] = (
+                parts if current is None else current.add(parts, fill_value=0)
+            )
+        return parts.index
+
+    def daily(self, ticker):
+        """Die fertigen Tages-Features für einen Ticker."""
+        if self.store is not None:
+            return finalize(self.store.load_daily_sentiment(ticker))
+        return finalize(self._partials.get(ticker))
+
+
+def add_sentiment_features(df, daily, max_staleness="3D"):
+    """
+    Hängt die Tages-Features per As-of Join an die Handelstage an.
+    Jeder Handelstag bekommt den letzten Sentiment-Tag <= Handelstag, höchstens `max_staleness` alt.
+    Ohne Daten wird neutral (0) aufgefüllt.
+    """
+    if daily is None or daily.empty:
+        return df.assign(**{col: 0.0 for col in SENTIMENT_FEATURES})
+
+    # merge_asof braucht sortierte Keys; beide Indizes sind es normalerweise schon
+    left = df if df.index.is_monotonic_increasing else df.sort_index()
+    right = daily[SENTIMENT_FEATURES].sort_index()
+    right.index = right.index.astype(left.index.dtype)
+
+    merged = pd.merge_asof(
+        left.drop(columns=SENTIMENT_FEATURES, errors="ignore"),
+        right,
+        left_index=True,
+        right_index=True,
+        direction="backward",
+        tolerance=pd.Timedelta(max_staleness),
+    )
+    merged[SENTIMENT_FEATURES] = merged[SENTIMENT_FEATURES].fillna(0.0)
+    return merged
+
+
+def coverage(index, daily, max_staleness="3D"):
+    """
+    Anteil der Zeitpunkte in `index`, für die add_sentiment_features() echte Tageswerte
+    findet (statt neutral aufzufüllen).
+    """
+    if daily is None or daily.empty or len(index) == 0:
+        return 0.0
+    days = daily.index[daily["Sent_Count"].to_numpy() > 0].sort_values()
+    if days.empty:
+        return 0.0
+    days = days.astype(index.dtype)
+
+    # Wie merge_asof(direction="backward", tolerance=max_staleness)
+    positions = days.searchsorted(index, side="right") - 1
+    found = positions >= 0
+    age = index[found] - days[positions[found]]
+    covered = int((age <= pd.Timedelta(max_staleness)).sum())
+    return covered / len(index)
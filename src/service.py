@@ -0,0 +1,274 @@
+"""
+Lokaler JSON-Service für Verdict, Prognose und Indikator-Snapshot pro Ticker.
+
+Start:
+    uv run python -m src.service --port 8502 --workers 4 --ttl 300
+
+Endpoints:
+    GET /verdict?ticker=NVDA&period=1y
+    GET /prediction?ticker=NVDA&period=1y
+    GET /snapshot?ticker=NVDA&period=1y
+    GET /health
+"""
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from src.agents import HedgeFund
+from src.data_loader import load_stock_data
+from src.indicators import add_indicators, calculate_seasonal_decomposition
+from src.news_store import NewsStore
+from src.predictor import StockPredictor
+from src.sentiment_index import DailySentimentIndex
+
+
+class ResultCache:
+    """
+    In-Process Cache mit TTL und Request-Coalescing:
+    Gleichzeitige Anfragen nach demselben Key lösen nur EINE Berechnung aus.
+    Abgelaufene Einträge fliegen beim Einfügen raus, höchstens `max_entries` bleiben.
+    """
+
+    def __init__(self, ttl=300, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            # Fehler werden nicht gecacht, aber an alle Wartenden weitergereicht
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            # Neu einfügen statt überschreiben: die Dict-Reihenfolge ist die Ablauf-Reihenfolge
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._evict()
+            del self._inflight[key]
+        future.set_result(value)
+        return value
+
+    def _evict(self):
+        """Abgelaufene & überzählige Einträge entfernen (Lock muss gehalten werden)."""
+        now = time.monotonic()
+        for key in list(self._entries):
+            expires, _ = self._entries[key]
+            if expires > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "inflight": len(self._inflight),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def _to_json(value):
+    """numpy/pandas Skalare in Python-Typen umwandeln."""
+    if isinstance(value, dict):
+        return {k: _to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+class AnalysisService:
+    """Berechnet die Ergebnisse (gecacht pro Ticker & Zeitraum)."""
+
+    def __init__(self, ttl=300):
+        self.cache = ResultCache(ttl)
+        self.store = NewsStore()
+
+    def data(self, ticker, period):
+        def compute():
+            df = load_stock_data(ticker, period=period)
+            if df is None:
+                raise LookupError(f"Keine Daten für {ticker}")
+            return add_indicators(df)
+
+        return self.cache.get(("data", ticker, period), compute)
+
+    def news(self, ticker):
+        return self.cache.get(("news", ticker), lambda: self.store.load_recent(ticker))
+
+    def model(self, ticker, period):
+        def compute():
+            predictor = StockPredictor()
+            predictor.train(
+                self.data(ticker, period),
+                sentiment_daily=DailySentimentIndex(self.store).daily(ticker),
+            )
+            return predictor
+
+        return self.cache.get(("model", ticker, period), compute)
+
+    def prediction(self, ticker, period):
+        def compute():
+            news_df = self.news(ticker)
+            sentiment = (
+                float(news_df["Sentiment_Score"].mean()) if not news_df.empty else 0.0
+            )
+            result = self.model(ticker, period).predict_with_sentiment(
+                self.data(ticker, period), sentiment_score=sentiment
+            )
+            return {"ticker": ticker, "period": period, **_to_json(result)}
+
+        return self.cache.get(("prediction", ticker, period), compute)
+
+    def verdict(self, ticker, period):
+        def compute():
+            df = self.data(ticker, period)
+            agents, verdict, color = HedgeFund().get_verdict(
+                df,
+                self.news(ticker),
+                self.prediction(ticker, period),
+                calculate_seasonal_decomposition(df, period=60),
+            )
+            return {
+                "ticker": ticker,
+                "period": period,
+                "verdict": verdict,
+                "color": color,
+                "agents": [
+                    {
+                        "name": a.name,
+                        "role": a.role,
+                        "vote": a.vote,
+                        "confidence": _to_json(a.confidence),
+                        "reason": a.reason,
+                    }
+                    for a in agents
+                ],
+            }
+
+        return self.cache.get(("verdict", ticker, period), compute)
+
+    def snapshot(self, ticker, period):
+        def compute():
+            df = self.data(ticker, period)
+            last = df.iloc[-1]
+            return {
+                "ticker": ticker,
+                "bar": df.index[-1].isoformat(),
+                "indicators": _to_json(last.to_dict()),
+            }
+
+        return self.cache.get(("snapshot", ticker, period), compute)
+
+
+def make_handler(service, pool, request_timeout):
+    routes = {
+        "/verdict": service.verdict,
+        "/prediction": service.prediction,
+        "/snapshot": service.snapshot,
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/health":
+                return self._send(200, {"status": "ok", "cache": service.cache.stats()})
+
+            route = routes.get(url.path)
+            if route is None:
+                return self._send(404, {"error": "Unbekannter Endpoint"})
+
+            params = parse_qs(url.query)
+            ticker = params.get("ticker", ["NVDA"])[0].upper()
+            period = params.get("period", ["1y"])[0]
+
+            # Die Berechnung läuft im begrenzten Worker-Pool, nicht im Request-Thread
+            future = pool.submit(route, ticker, period)
+            try:
+                self._send(200, future.result(timeout=request_timeout))
+            except FutureTimeout:
+                self._send(504, {"error": "Timeout"})
+            except LookupError as e:
+                self._send(404, {"error": str(e)})
+            except Exception as e:
+                self._send(500, {"error": str(e)})
+
+        def log_message(self, format, *args):
+            # Kein Log pro Request (stört beim Lasttest)
+            pass
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=8502, workers=4, ttl=300, request_timeout=120):
+    service = AnalysisService(ttl)
+    pool = ThreadPoolExecutor(max_workers=workers)
+    server = ThreadingHTTPServer(
+        (host, port), make_handler(service, pool, request_timeout)
+    )
+    print(f"🌐 Service läuft auf http://{host}:{port} ({workers} Worker, TTL {ttl}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("👋 Service beendet.")
+    finally:
+        server.server_close()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lokaler Verdict/Prediction JSON-Service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--ttl", type=int, default=300, help="Cache-Dauer in Sekunden")
+    parser.add_argument("--timeout", type=int, default=120, help="Sekunden pro Request")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.workers, args.ttl, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
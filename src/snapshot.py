@@ -0,0 +1,269 @@
+"""
+Snapshot-Tabelle: Pro Ticker die letzte Bar mit allen Indikatoren und Agenten-Voten.
+Spaltenweise gespeichert (numpy/Parquet), sortierte Indizes für Schwellen- und Bereichsabfragen.
+
+Start:
+    uv run python -m src.snapshot update NVDA AMD TSM
+    uv run python -m src.snapshot query "RSI < 30" "Close < Bollinger_Lower"
+"""
+
+import argparse
+import operator
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from src.agents import TechnicalAgent
+from src.indicators import INDICATOR_COLUMNS
+from src.price_store import OHLCV
+
+DEFAULT_SNAPSHOT_PATH = os.path.join("data", "snapshot.parquet")
+
+# Letzte Bar: OHLCV & alle Indikatoren aus add_indicators() (eine Quelle, kein Abdriften)
+BAR_COLUMNS = OHLCV + INDICATOR_COLUMNS
+VOTE_COLUMNS = ["Tech_Vote", "Tech_Confidence"]
+SNAPSHOT_COLUMNS = BAR_COLUMNS + VOTE_COLUMNS
+
+# Spalten mit sortiertem Index (andere Spalten werden nur auf den Kandidaten geprüft)
+DEFAULT_INDEXED = ["RSI", "Close", "Daily_Return", "ATR", "MACD_Hist", "Tech_Vote"]
+
+OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+}
+
+
+class SnapshotTable:
+    """
+    Spaltenorientierte Tabelle: eine Zeile pro Ticker, ein numpy-Array pro Spalte.
+    Sortierte Indizes werden nach Updates nur bei der nächsten Abfrage neu aufgebaut.
+    """
+
+    def __init__(self, indexed=None, capacity=1024):
+        self.indexed = list(indexed or DEFAULT_INDEXED)
+        self._size = 0
+        self._tickers = np.empty(capacity, dtype=object)
+        self._bars = np.full(capacity, np.datetime64("NaT", "ns"))
+        self._columns = {col: np.full(capacity, np.nan) for col in SNAPSHOT_COLUMNS}
+
+        self._position = {}
+        self._sorted = {}
+        self._votes_stale = False
+
+    def __len__(self):
+        return self._size
+
+    # Sichten auf den belegten Teil der Arrays (ohne Kopie)
+    @property
+    def tickers(self):
+        return self._tickers[: self._size]
+
+    @property
+    def bars(self):
+        return self._bars[: self._size]
+
+    @property
+    def columns(self):
+        self._refresh_votes()
+        return {col: values[: self._size] for col, values in self._columns.items()}
+
+    def _append_ticker(self, ticker):
+        if self._size == len(self._tickers):
+            # Kapazität verdoppeln statt bei jedem neuen Ticker alle Arrays zu kopieren
+            grow = max(len(self._tickers), 1)
+            self._tickers = np.concatenate([self._tickers, np.empty(grow, dtype=object)])
+            self._bars = np.concatenate(
+                [self._bars, np.full(grow, np.datetime64("NaT", "ns"))]
+            )
+            for col in SNAPSHOT_COLUMNS:
+                self._columns[col] = np.concatenate(
+                    [self._columns[col], np.full(grow, np.nan)]
+                )
+
+        self._position[ticker] = self._size
+        self._tickers[self._size] = ticker
+        self._size += 1
+
+    def update(self, ticker, indicator_df):
+        """
+        Übernimmt die letzte Bar aus einem add_indicators()-DataFrame.
+        Ältere oder bereits bekannte Bars werden ignoriert.
+        Returns:
+            bool: True, wenn sich der Snapshot geändert hat.
+        """
+        if indicator_df is None or indicator_df.empty:
+            return False
+
+        bar = np.datetime64(indicator_df.index[-1], "ns")
+        if ticker not in self._position:
+            self._append_ticker(ticker)
+        pos = self._position[ticker]
+        if not np.isnat(self._bars[pos]) and bar <= self._bars[pos]:
+            return False
+
+        last = indicator_df.iloc[-1].reindex(BAR_COLUMNS)
+        self._bars[pos] = bar
+        for col, value in zip(BAR_COLUMNS, last.to_numpy(dtype=np.float64)):
+            self._columns[col][pos] = value
+
+        # Voten & sortierte Indizes sind jetzt veraltet, sie werden bei der nächsten Abfrage
+        # für alle Ticker in einem Rutsch neu berechnet
+        self._sorted.clear()
+        self._votes_stale = True
+        return True
+
+    def _refresh_votes(self):
+        if not self._votes_stale:
+            return
+        frame = pd.DataFrame(
+            {col: self._columns[col][: self._size] for col in BAR_COLUMNS}
+        )
+        votes = TechnicalAgent("Dr. Chart", "Technical Analysis").analyze_history(frame)
+        self._columns["Tech_Vote"][: self._size] = votes["Vote"].to_numpy()
+        self._columns["Tech_Confidence"][: self._size] = votes["Confidence"].to_numpy()
+        self._votes_stale = False
+
+    def _sorted_index(self, col):
+        self._refresh_votes()
+        if col not in self._sorted:
+            # NaN landet bei argsort am Ende und fällt so aus allen Bereichen heraus
+            values = self._columns[col][: self._size]
+            order = np.argsort(values, kind="stable")
+            self._sorted[col] = (order, values[order])
+        return self._sorted[col]
+
+    def range(self, col, low=None, high=None, low_inclusive=True, high_inclusive=True):
+        """Positionen aller Ticker mit low <= col <= high (über den sortierten Index)."""
+        order, values = self._sorted_index(col)
+        start = 0
+        if low is not None:
+            start = np.searchsorted(values, low, side="left" if low_inclusive else "right")
+        # NaN liegt hinter allen Zahlen, daher nie jenseits des letzten gültigen Werts suchen
+        stop = len(values) - np.isnan(values).sum()
+        if high is not None:
+            stop = min(
+                stop,
+                np.searchsorted(values, high, side="right" if high_inclusive else "left"),
+            )
+        return order[start:stop]
+
+    def _indexed_candidates(self, col, op, value):
+        if op == "<":
+            return self.range(col, high=value, high_inclusive=False)
+        if op == "<=":
+            return self.range(col, high=value)
+        if op == ">":
+            return self.range(col, low=value, low_inclusive=False)
+        if op == ">=":
+            return self.range(col, low=value)
+        return self.range(col, low=value, high=value)
+
+    def query(self, *conditions):
+        """
+        Filtert Ticker nach Bedingungen wie ("RSI", "<", 30) oder ("Close", "<", "Bollinger_Lower").
+        Schwellen auf indizierten Spalten laufen über die sortierten Indizes,
+        der Rest (inkl. Spalte-gegen-Spalte) wird nur auf den Kandidaten geprüft.
+        """
+        self._refresh_votes()
+        candidates = None
+        remaining = []
+        for col, op, value in conditions:
+            if col in self.indexed and not isinstance(value, str):
+                hits = self._indexed_candidates(col, op, value)
+                candidates = (
+                    hits if candidates is None else np.intersect1d(candidates, hits)
+                )
+            else:
+                remaining.append((col, op, value))
+
+        if candidates is None:
+            candidates = np.arange(self._size)
+
+        for col, op, value in remaining:
+            left = self._columns[col][candidates]
+            right = (
+                self._columns[value][candidates] if isinstance(value, str) else value
+            )
+            candidates = candidates[OPERATORS[op](left, right)]
+
+        return self.to_frame(np.sort(candidates))
+
+    def to_frame(self, positions=None):
+        self._refresh_votes()
+        positions = slice(0, self._size) if positions is None else positions
+        frame = pd.DataFrame(
+            {col: values[positions] for col, values in self._columns.items()},
+            index=pd.Index(self._tickers[positions], name="Ticker"),
+        )
+        frame.insert(0, "Bar", self._bars[positions])
+        return frame
+
+    def save(self, path=DEFAULT_SNAPSHOT_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.to_frame().to_parquet(path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_SNAPSHOT_PATH, indexed=None):
+        table = cls(indexed)
+        if not os.path.exists(path):
+            return table
+
+        frame = pd.read_parquet(path)
+        table._size = len(frame)
+        table._tickers = frame.index.to_numpy(dtype=object)
+        table._bars = frame["Bar"].to_numpy(dtype="datetime64[ns]")
+        table._columns = {
+            col: frame[col].to_numpy(dtype=np.float64) for col in SNAPSHOT_COLUMNS
+        }
+        table._position = {ticker: i for i, ticker in enumerate(table._tickers)}
+        return table
+
+
+def parse_condition(text):
+    """'RSI < 30' -> ('RSI', '<', 30.0); 'Close < Bollinger_Lower' -> ('Close', '<', 'Bollinger_Lower')."""
+    match = re.fullmatch(r"\s*(\w+)\s*(<=|>=|==|<|>)\s*(\S+)\s*", text)
+    if not match:
+        raise ValueError(f"Ungültige Bedingung: {text}")
+    col, op, value = match.groups()
+    try:
+        value = float(value)
+    except ValueError:
+        pass
+    return col, op, value
+
+
+def main(argv=None):
+    from src.data_loader import load_stock_data
+    from src.indicators import add_indicators
+
+    parser = argparse.ArgumentParser(description="Indikator-Snapshot Tabelle")
+    parser.add_argument("--path", default=DEFAULT_SNAPSHOT_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    update = sub.add_parser("update", help="Snapshot für Ticker aktualisieren")
+    update.add_argument("tickers", nargs="+")
+    update.add_argument("--period", default="1y")
+
+    query = sub.add_parser("query", help="z.B. 'RSI < 30' 'Close < Bollinger_Lower'")
+    query.add_argument("conditions", nargs="+")
+    args = parser.parse_args(argv)
+
+    table = SnapshotTable.load(args.path)
+    if args.command == "update":
+        for ticker in args.tickers:
+            df = add_indicators(load_stock_data(ticker.upper(), period=args.period))
+            if table.update(ticker.upper(), df):
+                print(f"📌 Snapshot für {ticker.upper()} aktualisiert.")
+        table.save(args.path)
+    else:
+        result = table.query(*[parse_condition(c) for c in args.conditions])
+        print(result.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Streaming-Modus: Bars kommen einzeln aus einer austauschbaren Quelle (Replay-Datei,
+DataFrame oder TCP-Socket mit JSON-Zeilen). Pro Bar werden die Indikatoren inkrementell
+fortgeschrieben (indicator_columns mit Übergangs-Zustand), das Modell sagt für diese eine Zeile
+vorher und der Rat stimmt neu ab. Ändert sich das Votum, bekommen alle Abonnenten ein Event.
+
+Gemessen wird die Latenz von der Ankunft der Bar bis zum fertigen Votum (p50/p99/max).
+Beim Replay mit `speed` zählt als Ankunft der geplante Zeitpunkt, Rückstau geht also mit ein.
+
+Start:
+    uv run python -m src.streaming NVDA                               # letzten Handelstag (1m) abspielen
+    uv run python -m src.streaming NVDA --speed 60                    # 60x Echtzeit
+    uv run python -m src.streaming NVDA --serve 8765                  # Replay als Socket-Quelle anbieten
+    uv run python -m src.streaming NVDA --socket 127.0.0.1:8765       # ... und davon lesen
+"""
+
+import argparse
+import json
+import socket
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.agents import HedgeFund
+from src.chunked import MIN_CHUNK_ROWS
+from src.indicators import INDICATOR_COLUMNS, indicator_columns
+from src.instrumentation import span
+from src.price_store import OHLCV
+
+COLUMNS = OHLCV + INDICATOR_COLUMNS
+# Ab so vielen Bars Vorlauf sind alle Startwerte (auch die RSI-EWMs) exakt
+MIN_WARMUP_ROWS = MIN_CHUNK_ROWS
+
+
+class ReplayFeed:
+    """
+    Spielt Bars aus einem DataFrame oder einer CSV-Datei (Index = Zeitstempel) ab.
+
+    Args:
+        source: DataFrame mit OHLCV-Spalten oder Pfad zu einer CSV-Datei.
+        speed (float, optional): Vielfaches der Echtzeit (60 = eine Minute pro Sekunde).
+            None: so schnell wie möglich.
+    """
+
+    def __init__(self, source, speed=None):
+        if isinstance(source, str):
+            source = pd.read_csv(source, index_col=0, parse_dates=True)
+        self.bars = source[OHLCV]
+        self.speed = speed
+
+    def __iter__(self):
+        index = self.bars.index
+        values = self.bars.to_numpy(dtype=np.float64)
+        start = time.perf_counter()
+        for i, timestamp in enumerate(index):
+            if self.speed:
+                due = start + (timestamp - index[0]).total_seconds() / self.speed
+                wait = due - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                arrived = due
+            else:
+                arrived = time.perf_counter()
+            yield timestamp, dict(zip(OHLCV, values[i])), arrived
+
+
+class SocketFeed:
+    """
+    Liest Bars als JSON-Zeilen von einem TCP-Socket ({"ts": "...", "Open": ..., ...}).
+    Stellvertreter für einen echten Marktdaten-Feed, siehe serve_replay().
+    """
+
+    def __init__(self, host, port, timeout=30):
+        self.address = (host, port)
+        self.timeout = timeout
+
+    def __iter__(self):
+        with socket.create_connection(self.address, timeout=self.timeout) as conn:
+            with conn.makefile("r", encoding="utf-8") as lines:
+                for line in lines:
+                    arrived = time.perf_counter()
+                    if not line.strip():
+                        continue
+                    message = json.loads(line)
+                    yield pd.Timestamp(message["ts"]), message, arrived
+
+
+def serve_replay(bars, port, host="127.0.0.1", speed=None):
+    """
+    Bietet `bars` als JSON-Zeilen auf einem TCP-Port an (ein Client, dann Ende).
+    Läuft in einem Daemon-Thread; Rückgabe ist der Thread.
+    """
+    server = socket.create_server((host, port))
+
+    def run():
+        with server:
+            conn, _ = server.accept()
+            with conn, conn.makefile("w", encoding="utf-8") as out:
+                for timestamp, bar, _ in ReplayFeed(bars, speed):
+                    out.write(json.dumps({"ts": timestamp.isoformat(), **bar}) + "\n")
+                    out.flush()
+
+    thread = threading.Thread(target=run, name="replay-server", daemon=True)
+    thread.start()
+    return thread
+
+
+class IncrementalIndicators:
+    """
+    Schreibt add_indicators() Bar für Bar fort. Der Vorlauf (`history`) setzt den Zustand,
+    danach kostet jede Bar nur noch die Fensterränder, nicht die ganze Historie.
+    """
+
+    def __init__(self, history):
+        if len(history) < MIN_WARMUP_ROWS:
+            raise ValueError(f"Mindestens {MIN_WARMUP_ROWS} Bars Vorlauf nötig.")
+        bars = history[OHLCV]
+        self.carry = {}
+        columns = dict(indicator_columns(bars, self.carry))
+        # Identisch zu add_indicators(history): z.B. fürs Training
+        self.frame = bars.assign(**columns).dropna()
+        self.last_timestamp = history.index[-1]
+
+    def update(self, timestamp, bar):
+        """
+        Nimmt eine neue Bar auf.
+        Returns:
+            pd.DataFrame: Eine Zeile mit OHLCV & Indikatoren, oder None bei veralteten Bars.
+        """
+        if timestamp <= self.last_timestamp:
+            # Schon verarbeitete Bars lassen sich nicht mehr aus dem Zustand herausrechnen
+            return None
+        self.last_timestamp = timestamp
+
+        values = [float(bar[column]) for column in OHLCV]
+        chunk = pd.DataFrame([values], index=pd.DatetimeIndex([timestamp]), columns=OHLCV)
+        for _, series in indicator_columns(chunk, self.carry):
+            values.append(series.iloc[0])
+        return pd.DataFrame([values], index=chunk.index, columns=COLUMNS)
+
+
+class VerdictStream:
+    """
+    Bar -> Indikatoren -> Prognose (eine Zeile) -> Rat. Abonnenten bekommen nur Änderungen des Votums.
+
+    Args:
+        predictor: Trainierter StockPredictor.
+        history (pd.DataFrame): OHLCV-Vorlauf (mindestens MIN_WARMUP_ROWS Bars).
+        news_df (pd.DataFrame, optional): Bewertete News für Mr. Hype.
+        decomposition (dict, optional): Saisonale Zerlegung für The Brain (bleibt im Stream fest).
+    """
+
+    def __init__(self, predictor, history, news_df=None, decomposition=None, fund=None):
+        self.predictor = predictor
+        self.indicators = IncrementalIndicators(history)
+        self.news_df = news_df
+        self.decomposition = decomposition
+        self.fund = fund or HedgeFund()
+        self.sentiment_score = (
+            float(news_df["Sentiment_Score"].mean())
+            if news_df is not None and not news_df.empty
+            else 0.0
+        )
+
+        self.verdict = None
+        self.latencies = []
+        self.skipped = 0
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """callback(event) bei jeder Änderung des Votums. Returns: Funktion zum Abmelden."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def on_bar(self, timestamp, bar, arrived=None):
+        """
+        Verarbeitet eine Bar.
+        Returns:
+            dict: Das Event, falls sich das Votum geändert hat (sonst None).
+        """
+        arrived = time.perf_counter() if arrived is None else arrived
+        with span("stream:bar", rows=1):
+            row = self.indicators.update(timestamp, bar)
+            if row is None:
+                self.skipped += 1
+                return None
+
+            prediction = self.predictor.predict_with_sentiment(
+                row, sentiment_score=self.sentiment_score
+            )
+            agents, verdict, color = self.fund.get_verdict(
+                row, self.news_df, prediction, self.decomposition
+            )
+        latency_ms = (time.perf_counter() - arrived) * 1000
+        self.latencies.append(latency_ms)
+
+        if verdict == self.verdict:
+            return None
+        event = {
+            "timestamp": timestamp,
+            "verdict": verdict,
+            "color": color,
+            "previous": self.verdict,
+            "votes": {a.name: a.vote for a in agents},
+            "predicted_return": prediction["final_predicted_return"],
+            "latency_ms": latency_ms,
+        }
+        self.verdict = verdict
+        self._publish(event)
+        return event
+
+    def _publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                # Ein kaputter Abonnent darf den Stream nicht anhalten
+                print(f"⚠️ Abonnent fehlgeschlagen: {e}")
+
+    def run(self, feed):
+        """Verarbeitet alle Bars der Quelle. Returns: latency_stats()."""
+        for timestamp, bar, arrived in feed:
+            self.on_bar(timestamp, bar, arrived)
+        return self.latency_stats()
+
+    def latency_stats(self):
+        """Latenz Ankunft -> Votum in ms über alle bisher verarbeiteten Bars."""
+        if not self.latencies:
+            return {"bars": 0, "skipped": self.skipped}
+        latencies = np.asarray(self.latencies)
+        return {
+            "bars": len(latencies),
+            "skipped": self.skipped,
+            "mean_ms": float(latencies.mean()),
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+            "max_ms": float(latencies.max()),
+        }
+
+
+def split_last_day(bars):
+    """Teilt Bars in Vorlauf und den letzten Handelstag (zum Abspielen)."""
+    last_day = bars.index[-1].normalize()
+    replay = bars.index.normalize() == last_day
+    return bars[~replay], bars[replay]
+
+
+def _print_event(event):
+    previous = event["previous"] or "-"
+    print(
+        f"📣 {event['timestamp']}: {previous} → {event['verdict']} "
+        f"({event['predicted_return'] * 100:+.2f}%, {event['latency_ms']:.1f} ms)"
+    )
+
+
+def main(argv=None):
+    from src.data_loader import load_stock_data
+    from src.indicators import calculate_seasonal_decomposition
+    from src.news_store import NewsStore
+    from src.predictor import StockPredictor
+    from src.sentiment_index import DailySentimentIndex
+
+    parser = argparse.ArgumentParser(description="Bars streamen, Votum pro Bar neu berechnen")
+    parser.add_argument("ticker")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--period", default="7d", help="Vorlauf + Replay (yfinance)")
+    parser.add_argument("--replay", help="CSV mit Bars statt des letzten Handelstags")
+    parser.add_argument("--speed", type=float, help="Vielfaches der Echtzeit (ohne: so schnell wie möglich)")
+    parser.add_argument("--socket", help="Bars von HOST:PORT lesen (JSON-Zeilen)")
+    parser.add_argument("--serve", type=int, help="Replay auf diesem Port anbieten und beenden")
+    args = parser.parse_args(argv)
+
+    ticker = args.ticker.upper()
+    bars = load_stock_data(ticker, period=args.period, interval=args.interval)
+    if bars is None or bars.empty:
+        print(f"❌ Keine Daten für {ticker}.")
+        return
+
+    history, replay = split_last_day(bars)
+    if args.replay:
+        history, replay = bars, ReplayFeed(args.replay).bars
+
+    if args.serve:
+        print(f"📡 Replay von {len(replay)} Bars auf Port {args.serve}...")
+        serve_replay(replay, args.serve, speed=args.speed).join()
+        return
+
+    store = NewsStore()
+    news_df = store.load_recent(ticker)
+    start = time.perf_counter()
+    stream = VerdictStream(
+        StockPredictor(),
+        history,
+        news_df=news_df,
+        decomposition=calculate_seasonal_decomposition(history, period=60),
+    )
+    stream.predictor.train(
+        stream.indicators.frame, sentiment_daily=DailySentimentIndex(store).daily(ticker)
+    )
+    print(f"🔥 Vorlauf: {len(history)} Bars in {time.perf_counter() - start:.1f}s")
+
+    stream.subscribe(_print_event)
+    if args.socket:
+        host, port = args.socket.rsplit(":", 1)
+        feed = SocketFeed(host, int(port))
+    else:
+        feed = ReplayFeed(replay, speed=args.speed)
+
+    stats = stream.run(feed)
+    if not stats["bars"]:
+        print("⚠️ Keine neuen Bars verarbeitet.")
+        return
+    print(
+        f"⏱️ {stats['bars']} Bars (übersprungen: {stats['skipped']}): "
+        f"p50 {stats['p50_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms, max {stats['max_ms']:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+
+import pandas as pd
+
+
+class TermFrequencyIndex:
+    """
+    Laufend gepflegter Wort-Zähler für die WordCloud.
+    Die Zählungen liegen in Buckets pro (Zeitfenster, Typ), neue Items werden nur einmal tokenisiert.
+    Buckets & bekannte Titel, die älter als `max_age` (gemessen am jüngsten Fenster) sind,
+    fallen heraus, damit der Index in einem langlebigen Prozess nicht endlos wächst.
+    """
+
+    def __init__(self, analyzer, window="1D", max_age="14D"):
+        # analyzer: SentimentAnalyzer (liefert tokenize() inkl. Stopwörter)
+        self.analyzer = analyzer
+        self.window = window
+        self.max_age = pd.Timedelta(max_age)
+        self._buckets = {}
+        # Titel -> Zeitfenster, in dem er gezählt wurde
+        self._seen = {}
+        self._newest = None
+        self._lock = threading.Lock()
+
+    def update(self, news_df):
+        """
+        Zählt nur Items, deren Titel noch nicht im Index ist.
+        Returns:
+            int: Anzahl der neu gezählten Items.
+        """
+        if news_df is None or news_df.empty:
+            return 0
+
+        titles = news_df["Title"].astype(str)
+        kinds = (
+            news_df["Type"].astype(str)
+            if "Type" in news_df.columns
+            else pd.Series("News", index=news_df.index)
+        )
+        windows = pd.to_datetime(news_df["Date"]).dt.floor(self.window)
+
+        added = 0
+        with self._lock:
+            newest = windows.max()
+            if self._newest is None or newest > self._newest:
+                self._newest = newest
+            cutoff = self._newest - self.max_age
+            for title, kind, window in zip(titles, kinds, windows):
+                if title in self._seen or window < cutoff:
+                    continue
+                self._seen[title] = window
+                bucket = self._buckets.setdefault((window, kind), Counter())
+                bucket.update(self.analyzer.tokenize(title))
+                added += 1
+            self._prune(cutoff)
+        return added
+
+    def _prune(self, cutoff):
+        """Entfernt Buckets & bekannte Titel vor `cutoff` (Lock muss gehalten werden)."""
+        for key in [key for key in self._buckets if key[0] < cutoff]:
+            del self._buckets[key]
+        for title in [t for t, window in self._seen.items() if window < cutoff]:
+            del self._seen[title]
+
+    def frequencies(self, types=None, since=None, top_n=200):
+        """
+        Summiert die passenden Buckets.
+
+        Args:
+            types (list, optional): z.B. ["Social"]. None = alle Typen.
+            since (datetime, optional): Nur Zeitfenster ab diesem Zeitpunkt.
+            top_n (int): Nur die häufigsten Wörter (mehr passt eh nicht in die Wolke).
+        """
+        since = pd.Timestamp(since).floor(self.window) if since is not None else None
+        total = Counter()
+        with self._lock:
+            for (window, kind), counts in self._buckets.items():
+                if types is not None and kind not in types:
+                    continue
+                if since is not None and window < since:
+                    continue
+                total.update(counts)
+        return dict(total.most_common(top_n))
+
+
+def frequency_hash(frequencies):
+    """Stabiler Hash über die Wort-Häufigkeiten (Reihenfolge egal)."""
+    payload = "\n".join(f"{w}\t{c}" for w, c in sorted(frequencies.items()))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+_render_cache = OrderedDict()
+_render_lock = threading.Lock()
+
+
+def render_wordcloud(frequencies, max_cached=32, **wordcloud_kwargs):
+    """
+    Rendert die WordCloud direkt aus den Häufigkeiten (kein erneutes Tokenisieren).
+    Das Bild (numpy RGB-Array) wird pro Häufigkeits-Hash gecacht.
+    """
+    from wordcloud import WordCloud
+
+    key = (frequency_hash(frequencies), tuple(sorted(wordcloud_kwargs.items())))
+    with _render_lock:
+        if key in _render_cache:
+            _render_cache.move_to_end(key)
+            return _render_cache[key]
+
+    image = (
+        WordCloud(**wordcloud_kwargs).generate_from_frequencies(frequencies).to_array()
+    )
+
+    with _render_lock:
+        _render_cache[key] = image
+        while len(_render_cache) > max_cached:
+            _render_cache.popitem(last=False)
+    return image
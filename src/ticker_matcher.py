@@ -0,0 +1,148 @@
+"""
+Ticker-Matcher: Findet in Schlagzeilen & Posts alle Ticker der Watchlist in einem Durchlauf.
+
+Cashtags ($NVDA), nackte Symbole (NVDA, nur in Großbuchstaben) und Firmennamen (Nvidia, Broadcom)
+werden einmal zu einem Aho-Corasick-Automaten kompiliert. Jeder Text wird danach genau einmal
+Zeichen für Zeichen gelesen, egal wie viele Ticker auf der Watchlist stehen. Damit kann ein
+einziger Scrape (z.B. r/wallstreetbets) das Sentiment des ganzen Universums füttern.
+"""
+
+from collections import deque
+
+import pandas as pd
+
+from src.instrumentation import instrumented
+
+# Firmennamen & gängige Schreibweisen (ohne Groß-/Kleinschreibung, nur ganze Wörter)
+COMPANY_NAMES = {
+    "NVDA": ["Nvidia"],
+    "AMD": ["Advanced Micro Devices"],
+    "TSM": ["TSMC", "Taiwan Semiconductor"],
+    "AVGO": ["Broadcom"],
+    "INTC": ["Intel"],
+    "MU": ["Micron"],
+    "ARM": ["Arm Holdings"],
+    "ASML": ["ASML"],
+    "AAPL": ["Apple"],
+    "MSFT": ["Microsoft"],
+    "GOOGL": ["Alphabet", "Google"],
+    "AMZN": ["Amazon"],
+    "META": ["Meta Platforms", "Facebook"],
+    "TSLA": ["Tesla"],
+}
+# Kürzere Symbole (ON, IT, ...) sind normale Wörter und zählen nur als Cashtag
+MIN_SYMBOL_LENGTH = 3
+
+
+def _is_word_char(text, position):
+    return 0 <= position < len(text) and text[position].isalnum()
+
+
+class TickerMatcher:
+    """
+    Aho-Corasick-Automat über alle Muster der Watchlist.
+
+    Args:
+        tickers (list): Die Watchlist.
+        names (dict, optional): Zusätzliche Namen pro Ticker (ergänzt COMPANY_NAMES).
+    """
+
+    def __init__(self, tickers, names=None):
+        self.tickers = list(dict.fromkeys(t.upper() for t in tickers))
+        aliases = {t: list(COMPANY_NAMES.get(t, [])) for t in self.tickers}
+        for ticker, extra in (names or {}).items():
+            aliases.setdefault(ticker.upper(), []).extend(extra)
+
+        # Trie: Übergänge, Fehler-Links und die Muster, die an einem Knoten enden
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        # Muster-ID -> (Länge, Ticker, exakte Schreibweise oder None)
+        self._patterns = []
+
+        for ticker in self.tickers:
+            symbol = ticker.lstrip("^")
+            self._add(f"${symbol}", ticker)
+            if len(symbol) >= MIN_SYMBOL_LENGTH:
+                self._add(symbol, ticker, exact=symbol)
+            for name in aliases[ticker]:
+                self._add(name, ticker)
+        self._link()
+
+    def _add(self, pattern, ticker, exact=None):
+        node = 0
+        for char in pattern.lower():
+            if char not in self._goto[node]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[node][char] = len(self._goto) - 1
+            node = self._goto[node][char]
+        self._out[node].append(len(self._patterns))
+        self._patterns.append((len(pattern), ticker, exact))
+
+    def _link(self):
+        """Fehler-Links per Breitensuche; jeder Knoten erbt die Treffer seines Fehler-Links."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def match(self, text):
+        """
+        Alle Ticker, die in `text` vorkommen (in der Reihenfolge der Watchlist).
+        Returns:
+            tuple: z.B. ("NVDA", "AMD").
+        """
+        text = str(text)
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Manche Unicode-Zeichen werden kleingeschrieben länger; Positionen müssen passen
+            lowered = "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self._patterns
+        found = set()
+        node = 0
+        for end, char in enumerate(lowered, start=1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for pattern in out[node]:
+                length, ticker, exact = patterns[pattern]
+                if ticker in found:
+                    continue
+                start = end - length
+                # Nur ganze Wörter: "Intel" soll nicht in "Intelligence" treffen
+                if _is_word_char(lowered, start - 1) or _is_word_char(lowered, end):
+                    continue
+                if exact is not None and text[start:end] != exact:
+                    continue
+                found.add(ticker)
+        return tuple(t for t in self.tickers if t in found)
+
+    def tag(self, df, column="Title"):
+        """Pro Zeile die erwähnten Ticker (Series von Tupeln, gleicher Index wie `df`)."""
+        return pd.Series(
+            [self.match(text) for text in df[column].tolist()], index=df.index, dtype=object
+        )
+
+    @instrumented("scrape:route")
+    def route(self, df, column="Title"):
+        """
+        Verteilt Items auf alle Ticker, die sie erwähnen (ein Item kann bei mehreren landen).
+        Returns:
+            dict: Ticker -> Teil-DataFrame. Ticker ohne Erwähnung fehlen.
+        """
+        if df is None or df.empty:
+            return {}
+        positions = {}
+        for position, tickers in enumerate(self.tag(df, column)):
+            for ticker in tickers:
+                positions.setdefault(ticker, []).append(position)
+        return {ticker: df.iloc[rows] for ticker, rows in positions.items()}